@@ -2,12 +2,107 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils import calculate_savings
-from visualizations import create_savings_chart, create_comparison_chart, create_time_savings_charts
-from report_generator import generate_report
+import numpy as np
+from utils import FTE_HOURS_WEEKLY, INPUT_COLUMNS, INPUT_LABELS, STUDENTS_PER_STAFF, input_bounds
+from visualizations import (
+    create_uncertainty_chart, create_projection_chart, create_tornado_chart, create_sensitivity_heatmap,
+    create_roi_chart
+)
+from compute_graph import calculator_graph
+from scenarios import compute_scenario, decode_scenario, encode_scenario, scenario_report
+from simulation import simulate_savings, spread_distributions
+from projections import project_savings
+from sensitivity import SENSITIVITY_INPUTS, tornado_analysis, grid_sweep
+from breakeven import payback_from_projection, solve_breakeven
+from incident_logs import ingest_logs
+from hierarchy import AggregationTree
+from optimizer import allocation_frame, optimize_budget
+from roster import read_roster_chunks
+from instrumentation import configure_from_env, record, span
+from email_sender import send_contact_email
+from outbox import start_worker
+from warmup import start_warm_up
 import base64
+import time
 from datetime import datetime
 
+configure_from_env()
+start_worker()
+start_warm_up()
+rerun_start = time.perf_counter()
+
+
+@st.cache_data(max_entries=64, show_spinner="Running simulation...")
+def run_simulation(base_inputs, distribution, rate_spread, drop_spread, cost_spread, n_draws, seed=42):
+    distributions = spread_distributions(base_inputs, distribution, rate_spread, drop_spread, cost_spread)
+    return simulate_savings(base_inputs, distributions, n_draws=n_draws, seed=seed)
+
+
+def get_report_html(offline=False):
+    # Build the report once per scenario, shared by every session viewing it
+    return scenario_report(st.session_state.scenario, st.session_state.results, offline=offline)
+
+
+def show_chart(fig):
+    with span("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def get_derived_rates(incident_file, attendance_file, num_students):
+    # Ingest each set of uploaded logs once and reuse the rates on reruns
+    enrollment = None if attendance_file is not None else num_students
+    key = (getattr(incident_file, "file_id", None), getattr(attendance_file, "file_id", None), enrollment)
+    if st.session_state.get("derived_rates_key") != key:
+        with span("ingest_logs"), st.spinner("Reading logs..."):
+            st.session_state.derived_rates = ingest_logs(incident_file, attendance_file, enrollment=enrollment)
+        st.session_state.derived_rates_key = key
+    return st.session_state.derived_rates
+
+
+def get_aggregation_tree(roster_file):
+    # Build the roll-up once per uploaded roster; school edits update it in place
+    key = getattr(roster_file, "file_id", None)
+    if st.session_state.get("aggregation_tree_key") != key:
+        with span("build_aggregation_tree"), st.spinner("Building roll-up..."):
+            roster = pd.concat(read_roster_chunks(roster_file), ignore_index=True)
+            st.session_state.aggregation_tree = AggregationTree.from_roster(roster)
+        st.session_state.aggregation_tree_key = key
+    return st.session_state.aggregation_tree
+
+
+# Inputs entered as percentages in the roll-up editor
+PERCENT_INPUTS = [name for name in INPUT_COLUMNS if name.endswith(("_rate", "_drop"))]
+
+
+def update_rollup_school(school):
+    # Runs before the fragment redraws, so the totals shown include the edit;
+    # only the school and its ancestors are recomputed
+    values = {name: st.session_state[f"rollup_{school}_{name}"] for name in INPUT_COLUMNS}
+    for name in PERCENT_INPUTS:
+        values[name] /= 100
+    with span("update_school"):
+        st.session_state.aggregation_tree.update_school(school, **values)
+
+
+# Widget key of each input derived from incident and attendance logs
+DERIVED_RATE_WIDGETS = {
+    "num_students": "main_num_students",
+    "discipline_rate": "main_discipline_rate",
+    "absenteeism_rate": "main_absenteeism_rate",
+    "crisis_rate": "main_crisis_rate",
+}
+
+
+def use_derived_rates(row):
+    # Make the derived values the input defaults and reset those widgets to them
+    values = {name: row[name] for name in DERIVED_RATE_WIDGETS if name in row and not pd.isna(row[name])}
+    if "num_students" in values:
+        values["num_students"] = max(1, int(values["num_students"]))
+    st.session_state.link_scenario = dict(st.session_state.link_scenario, **values)
+    for name in values:
+        st.session_state.pop(DERIVED_RATE_WIDGETS[name], None)
+
+
 # Page configuration
 st.set_page_config(
     page_title="Proactive Mental Health Cost Savings Calculator for K-12 Schools",
@@ -44,174 +139,557 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Main content in a single column layout
-st.header("Cost Savings Calculator")
-
-# Institution Information
-st.subheader("Institution Information")
-col_inst1, col_inst2 = st.columns([1, 1])
-with col_inst1:
-    institution_name = st.text_input("Institution Name", "My School District")
-with col_inst2:
-    num_students = st.number_input("Number of Students", min_value=1, value=1000, step=100)
-
-# Create a visual separator
-st.markdown("---")
-
-# Current Statistics
-st.subheader("Current Statistics")
-st.markdown("*Enter your institution's current rates or use the default national averages*")
-
-col_a, col_b, col_c = st.columns(3)
-with col_a:
-    discipline_rate = st.number_input("Current Disciplinary Rate (%)", 
-                                  min_value=0.0, max_value=100.0, value=10.0, step=0.5, key="main_discipline_rate") / 100
-with col_b:
-    absenteeism_rate = st.number_input("Current Chronic Absenteeism Rate (%)", 
-                                   min_value=0.0, max_value=100.0, value=15.0, step=0.5, key="main_absenteeism_rate") / 100
-with col_c:
-    crisis_rate = st.number_input("Current Crisis Management Rate (%)", 
-                              min_value=0.0, max_value=100.0, value=5.0, step=0.5, key="main_crisis_rate") / 100
-
-# Cost Per Instance
-st.subheader("Cost Per Instance")
-st.markdown("*Enter your institution's cost per case or use the default estimates*")
-
-col_d, col_e, col_f = st.columns(3)
-with col_d:
-    discipline_cost = st.number_input("Cost Per Disciplinary Issue ($)", 
-                                  min_value=0, value=250, step=10, key="main_discipline_cost")
-with col_e:
-    absenteeism_cost = st.number_input("Cost Per Chronic Absenteeism Case ($)", 
-                                   min_value=0, value=1200, step=100, key="main_absenteeism_cost")
-with col_f:
-    crisis_cost = st.number_input("Cost Per Crisis Management Case ($)", 
-                              min_value=0, value=10000, step=1000, key="main_crisis_cost")
-
-# Estimated Improvements
-st.subheader("Estimated Improvements")
-st.markdown("*These values are preset to national averages when implementing proactive mental health resources. You can adjust them based on your expectations.*")
-
-col_g, col_h, col_i = st.columns(3)
-with col_g:
-    discipline_drop = st.slider("Drop in Disciplinary Issues (%)", 
-                             min_value=0, max_value=100, value=38, step=1, key="main_discipline_drop") / 100
-with col_h:
-    absenteeism_drop = st.slider("Drop in Chronic Absenteeism (%)", 
-                              min_value=0, max_value=100, value=20, step=1, key="main_absenteeism_drop") / 100
-with col_i:
-    crisis_drop = st.slider("Drop in Crisis Management (%)", 
-                         min_value=0, max_value=100, value=30, step=1, key="main_crisis_drop") / 100
-
-# Create a visual separator
-st.markdown("---")
-
-# Calculator section
-st.subheader("Calculate Your Potential Savings")
-
-# Calculate button
-calculate_button = st.button("Calculate Potential Savings", key="calculate_button") 
-if calculate_button:
-    # Perform calculations
-    discipline_savings, absenteeism_savings, crisis_savings, total_savings = calculate_savings(
-        num_students, discipline_rate, absenteeism_rate, crisis_rate,
-        discipline_drop, absenteeism_drop, crisis_drop,
-        discipline_cost, absenteeism_cost, crisis_cost
-    )
-    
-    # Store results in session state
-    st.session_state.results = {
-        "discipline_savings": discipline_savings,
-        "absenteeism_savings": absenteeism_savings,
-        "crisis_savings": crisis_savings,
-        "total_savings": total_savings,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "institution_name": institution_name,
-        "num_students": num_students,
-        "discipline_rate": discipline_rate,
-        "absenteeism_rate": absenteeism_rate,
-        "crisis_rate": crisis_rate,
-        "discipline_drop": discipline_drop,
-        "absenteeism_drop": absenteeism_drop,
-        "crisis_drop": crisis_drop,
-        "discipline_cost": discipline_cost,
-        "absenteeism_cost": absenteeism_cost,
-        "crisis_cost": crisis_cost
-    }
-
-    st.session_state["report_ready"] = True
-    
-    # Display results
-    st.subheader("Savings Summary")
-    
-    # Create metrics in rows
-    metric_col1, metric_col2, metric_col3 = st.columns(3)
-    metric_col1.metric("Disciplinary Savings", f"${discipline_savings:,.0f}")
-    metric_col2.metric("Absenteeism Savings", f"${absenteeism_savings:,.0f}")
-    metric_col3.metric("Crisis Management Savings", f"${crisis_savings:,.0f}")
-    
-    st.metric("Total Estimated Annual Savings", f"${total_savings:,.0f}")
-    
-    # Create and display charts
-    fig = create_savings_chart(discipline_savings, absenteeism_savings, crisis_savings)
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Show comparison chart
-    compare_fig = create_comparison_chart(
-        num_students, discipline_rate, absenteeism_rate, crisis_rate,
-        discipline_drop, absenteeism_drop, crisis_drop,
-        discipline_cost, absenteeism_cost, crisis_cost
-    )
-    st.plotly_chart(compare_fig, use_container_width=True)
-    
-    from utils import calculate_time_saved  # Make sure this is at the top of the file
+# The calculator runs as a fragment: changing one of its inputs reruns only
+# this section, not the rest of the page
+@st.fragment
+def calculator():
+    fragment_start = time.perf_counter()
+
+    # Inputs from a shared scenario link, or the defaults without one. Read
+    # once per session so the widget defaults stay stable across reruns (rates
+    # derived from uploaded logs replace them via use_derived_rates)
+    if "link_scenario" not in st.session_state:
+        st.session_state.link_scenario = decode_scenario(st.query_params.to_dict())
+        st.session_state.show_link_results = bool(encode_scenario(st.session_state.link_scenario))
+    link = st.session_state.link_scenario
+
+    # Main content in a single column layout
+    st.header("Cost Savings Calculator")
+
+    # Institution Information
+    st.subheader("Institution Information")
+    col_inst1, col_inst2 = st.columns([1, 1])
+    with col_inst1:
+        institution_name = st.text_input("Institution Name", link["institution_name"], key="main_institution_name")
+    with col_inst2:
+        num_students = st.number_input("Number of Students", min_value=1, value=int(link["num_students"]), step=100,
+                                       key="main_num_students")
+
+    # Create a visual separator
+    st.markdown("---")
+
+    # Current Statistics
+    st.subheader("Current Statistics")
+    st.markdown("*Enter your institution's current rates or use the default national averages*")
+
+    with st.expander("Derive Rates From Incident and Attendance Logs"):
+        st.markdown("""
+        *Upload exports from your student information system (CSV or Parquet) to compute the rates from your own data:*
+        - *an incident log with `school_id`, `student_id` and `category` (discipline or crisis) columns, one row per incident*
+        - *an attendance log with `school_id`, `student_id` and `absent` columns, one row per student per school day*
+        """)
+        col_log1, col_log2 = st.columns(2)
+        with col_log1:
+            incident_file = st.file_uploader("Incident Log", type=["csv", "parquet"], key="log_incidents")
+        with col_log2:
+            attendance_file = st.file_uploader("Attendance Log", type=["csv", "parquet"], key="log_attendance")
+
+        if incident_file is not None or attendance_file is not None:
+            try:
+                derived = get_derived_rates(incident_file, attendance_file, num_students)
+            except (KeyError, ValueError) as e:
+                st.error(f"❌ Could not read the logs: {e}")
+            else:
+                if attendance_file is None:
+                    st.caption(f"Rates use the {num_students:,} students entered above, as no attendance log was given.")
+                unmatched = derived.attrs["unmatched_schools"]
+                if unmatched:
+                    st.caption(f"Skipped {len(unmatched):,} schools with no enrolled students: "
+                               f"{', '.join(unmatched[:10])}{', ...' if len(unmatched) > 10 else ''}")
+                school_ids = derived["school_id"].tolist()
+                school_id = school_ids[0]
+                if len(school_ids) > 1:
+                    school_id = st.selectbox("School", school_ids, key="log_school")
+                row = derived.loc[derived["school_id"] == school_id].iloc[0]
+
+                rate_columns = [name for name in ("discipline_rate", "absenteeism_rate", "crisis_rate") if name in derived]
+                rate_col1, rate_col2, rate_col3, rate_col4 = st.columns(4)
+                rate_col1.metric("Students", f"{row['num_students']:,.0f}")
+                for column, name in zip((rate_col2, rate_col3, rate_col4), rate_columns):
+                    column.metric(INPUT_LABELS[name], f"{row[name]:.1%}")
+                st.button("Use These Rates", key="log_apply", on_click=use_derived_rates, args=(row.to_dict(),))
+
+    col_a, col_b, col_c = st.columns(3)
+    with col_a:
+        discipline_rate = st.number_input("Current Disciplinary Rate (%)", 
+                                      min_value=0.0, max_value=100.0, value=round(link["discipline_rate"] * 100, 4), step=0.5, key="main_discipline_rate") / 100
+    with col_b:
+        absenteeism_rate = st.number_input("Current Chronic Absenteeism Rate (%)", 
+                                       min_value=0.0, max_value=100.0, value=round(link["absenteeism_rate"] * 100, 4), step=0.5, key="main_absenteeism_rate") / 100
+    with col_c:
+        crisis_rate = st.number_input("Current Crisis Management Rate (%)", 
+                                  min_value=0.0, max_value=100.0, value=round(link["crisis_rate"] * 100, 4), step=0.5, key="main_crisis_rate") / 100
+
+    # Cost Per Instance
+    st.subheader("Cost Per Instance")
+    st.markdown("*Enter your institution's cost per case or use the default estimates*")
+
+    col_d, col_e, col_f = st.columns(3)
+    with col_d:
+        discipline_cost = st.number_input("Cost Per Disciplinary Issue ($)", 
+                                      min_value=0, value=round(link["discipline_cost"]), step=10, key="main_discipline_cost")
+    with col_e:
+        absenteeism_cost = st.number_input("Cost Per Chronic Absenteeism Case ($)", 
+                                       min_value=0, value=round(link["absenteeism_cost"]), step=100, key="main_absenteeism_cost")
+    with col_f:
+        crisis_cost = st.number_input("Cost Per Crisis Management Case ($)", 
+                                  min_value=0, value=round(link["crisis_cost"]), step=1000, key="main_crisis_cost")
+
+    # Estimated Improvements
+    st.subheader("Estimated Improvements")
+    st.markdown("*These values are preset to national averages when implementing proactive mental health resources. You can adjust them based on your expectations.*")
+
+    col_g, col_h, col_i = st.columns(3)
+    with col_g:
+        discipline_drop = st.slider("Drop in Disciplinary Issues (%)", 
+                                 min_value=0, max_value=100, value=round(link["discipline_drop"] * 100), step=1, key="main_discipline_drop") / 100
+    with col_h:
+        absenteeism_drop = st.slider("Drop in Chronic Absenteeism (%)", 
+                                  min_value=0, max_value=100, value=round(link["absenteeism_drop"] * 100), step=1, key="main_absenteeism_drop") / 100
+    with col_i:
+        crisis_drop = st.slider("Drop in Crisis Management (%)", 
+                             min_value=0, max_value=100, value=round(link["crisis_drop"] * 100), step=1, key="main_crisis_drop") / 100
+
+    # Program Investment
+    st.subheader("Program Investment")
+    st.markdown("*Optional: enter the annual cost of the program to see ROI, payback and break-even improvements*")
+
+    col_j, col_k = st.columns(2)
+    with col_j:
+        license_cost_per_student = st.number_input("License Cost Per Student ($/year)",
+                                                   min_value=0.0, value=float(link["license_cost_per_student"]), step=1.0, key="main_license_cost")
+    with col_k:
+        fixed_program_cost = st.number_input("Fixed Staffing & Program Costs ($/year)",
+                                             min_value=0, value=round(link["fixed_program_cost"]), step=1000, key="main_fixed_program_cost")
+
+    # Staffing
+    st.subheader("Staffing")
+    st.markdown(f"*Optional: enter your staff headcounts to scale the team time savings below. Leave a headcount at 0 to estimate it from enrollment ({STUDENTS_PER_STAFF['teacher']} students per teacher, {STUDENTS_PER_STAFF['counselor']} per counselor).*")
+
+    col_l, col_m, col_n = st.columns(3)
+    with col_l:
+        teachers = st.number_input("Number of Teachers", min_value=0, value=round(link["teachers"]), step=10, key="main_teachers")
+    with col_m:
+        counselors = st.number_input("Number of Counselors", min_value=0, value=round(link["counselors"]), step=1, key="main_counselors")
+    with col_n:
+        school_weeks = st.number_input("School Weeks per Year", min_value=0, max_value=52, value=round(link["school_weeks"]), step=1, key="main_school_weeks")
+
+    # Create a visual separator
+    st.markdown("---")
+
+    # Calculator section
+    st.subheader("Calculate Your Potential Savings")
+
+    # Calculate button, or live recalculation on every input change
+    col_button, col_live = st.columns([1, 1])
+    with col_button:
+        calculate_button = st.button("Calculate Potential Savings", key="calculate_button")
+    with col_live:
+        live_recalc = st.toggle("Update results as inputs change", key="live_recalc")
+
+    # A shared link shows its results straight away
+    if calculate_button or live_recalc or st.session_state.pop("show_link_results", False):
+        scenario = {
+            "institution_name": institution_name,
+            "num_students": num_students,
+            "discipline_rate": discipline_rate,
+            "absenteeism_rate": absenteeism_rate,
+            "crisis_rate": crisis_rate,
+            "discipline_drop": discipline_drop,
+            "absenteeism_drop": absenteeism_drop,
+            "crisis_drop": crisis_drop,
+            "discipline_cost": discipline_cost,
+            "absenteeism_cost": absenteeism_cost,
+            "crisis_cost": crisis_cost,
+            "license_cost_per_student": license_cost_per_student,
+            "fixed_program_cost": fixed_program_cost,
+            "teachers": teachers,
+            "counselors": counselors,
+            "school_weeks": school_weeks,
+        }
 
-    # Calculate team time savings (per educator/counselor)
-    time_saved = calculate_time_saved(num_students, discipline_drop, crisis_drop)
-    teacher_time_saved = time_saved["teacher"]
-    counselor_time_saved = time_saved["counselor"]
+        # Scenarios already computed by any session are reused as is;
+        # otherwise only the graph nodes downstream of the inputs that
+        # changed are recomputed
+        with span("calculate_savings"):
+            graph = st.session_state.get("compute_graph")
+            if graph is None:
+                graph = st.session_state.compute_graph = calculator_graph()
+            entry = compute_scenario(scenario, graph)
+
+        results = entry["results"]
+        discipline_savings = results.discipline_savings
+        absenteeism_savings = results.absenteeism_savings
+        crisis_savings = results.crisis_savings
+        total_savings = results.total_savings
+
+        # Store results in session state, and make the page address a
+        # permalink to this scenario
+        st.session_state.results = results
+        st.session_state.scenario = scenario
+        st.query_params.from_dict(encode_scenario(scenario))
+
+        st.session_state["report_ready"] = True
+
+        # Display results
+        st.subheader("Savings Summary")
+
+        # Create metrics in rows
+        metric_col1, metric_col2, metric_col3 = st.columns(3)
+        metric_col1.metric("Disciplinary Savings", f"${discipline_savings:,.0f}")
+        metric_col2.metric("Absenteeism Savings", f"${absenteeism_savings:,.0f}")
+        metric_col3.metric("Crisis Management Savings", f"${crisis_savings:,.0f}")
+
+        st.metric("Total Estimated Annual Savings", f"${total_savings:,.0f}")
+
+        # Create and display charts
+        show_chart(entry["savings_chart"])
+
+        # Show comparison chart
+        show_chart(entry["comparison_chart"])
+
+        # Team time savings (per educator/counselor)
+        teacher_time_saved = results.teacher_hours_weekly
+        counselor_time_saved = results.counselor_hours_weekly
+
+    # Display team time savings section
+        st.markdown("### 👥 Team Time Savings")
+        st.markdown("""
+        Beyond financial savings, implementing proactive mental health strategies can lead to meaningful **time savings** for your staff.
+        """)
+        st.markdown("""
+        These estimates are based on national research on educator time spent managing discipline, crises, and referrals, adjusted by the improvements you selected above.
+        """)
+
+        st.markdown(f"""
+        - **Teachers** may save an estimated **{teacher_time_saved:.1f} hours per week** by reducing time spent on classroom disruptions, crisis management, and referrals.
+        - **Counselors** may save an estimated **{counselor_time_saved:.1f} hours per week** by decreasing time spent on disciplinary actions, crisis interventions, and processing referrals.
+
+        These reclaimed hours can be redirected to proactive student support, instructional planning, and fostering a healthy school climate.
+        """)
+
+        staff_col1, staff_col2, staff_col3 = st.columns(3)
+        staff_col1.metric("Teacher Hours Saved per Year", f"{results.teacher_hours_annual:,.0f}")
+        staff_col2.metric("Counselor Hours Saved per Year", f"{results.counselor_hours_annual:,.0f}")
+        staff_col3.metric("Full-Time Equivalents Freed", f"{results.teacher_fte + results.counselor_fte:,.1f}")
+        st.caption(f"Across {results.teacher_headcount:,.1f} teachers and {results.counselor_headcount:,.1f} counselors "
+                   f"over {results.school_weeks:,.0f} school weeks; one FTE is {FTE_HOURS_WEEKLY} hours per week.")
+
+        weekly_fig, annual_fig = entry["time_charts"]
+        show_chart(weekly_fig)
+        show_chart(annual_fig)
+        # Generate report button
+    if st.session_state.get("report_ready"):
+        st.subheader("Generate Your Report")
+
+        offline_report = st.checkbox(
+            "Offline report (works without internet access, larger file)", key="offline_report"
+        )
 
-# Display team time savings section
-    st.markdown("### 👥 Team Time Savings")
-    st.markdown("""
-    Beyond financial savings, implementing proactive mental health strategies can lead to meaningful **time savings** for your staff.
-    """)
+        try:
+            report_html = get_report_html(offline=offline_report)
+
+            st.download_button(
+                label="📄 Download Report",
+                data=report_html,
+                file_name=f"savings_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+                mime="text/html",
+                key="download_report_button"
+            )
+        except Exception as e:
+            st.error(f"❌ An error occurred while generating the report: {e}")
+
+        # Break-even and ROI
+        with st.expander("Return on Investment & Break-Even"):
+            breakeven = solve_breakeven(st.session_state.results)
+            program_cost = float(breakeven["program_cost"])
+            if program_cost <= 0:
+                st.info("Enter a program cost under Program Investment to see ROI, payback and break-even improvements.")
+            else:
+                roi_col1, roi_col2, roi_col3 = st.columns(3)
+                roi_col1.metric("Annual Program Cost", f"${program_cost:,.0f}")
+                roi_col2.metric("Net Annual Savings", f"${float(breakeven['net_savings']):,.0f}")
+                roi_col3.metric("Return on Investment", f"{float(breakeven['roi']):.0%}")
+
+                payback_months = float(breakeven["payback_months"])
+                breakeven_scale = float(breakeven["breakeven_scale"])
+                st.markdown(f"""
+                - **Payback period:** {"not reached" if np.isinf(payback_months) else f"{payback_months:.1f} months"}
+                - **Break-even improvements:** {"not reachable" if np.isinf(breakeven_scale) else f"{breakeven_scale:.0%} of the improvements you entered"}
+                """)
+
+                labels = {"discipline": "Disciplinary issues", "absenteeism": "Chronic absenteeism", "crisis": "Crisis management"}
+                lines = []
+                for category, label in labels.items():
+                    drop = float(breakeven[f"breakeven_{category}_drop"])
+                    if drop <= 0:
+                        lines.append(f"- **{label}:** already covered by the other improvements")
+                    elif drop > 1:
+                        lines.append(f"- **{label}:** cannot break even through this category alone")
+                    else:
+                        lines.append(f"- **{label}:** {drop:.1%} drop needed, with the other improvements as entered")
+                st.markdown("**Break-even drop per category**\n" + "\n".join(lines))
+
+            show_chart(create_roi_chart(st.session_state.results))
+
+        # Uncertainty analysis
+        with st.expander("Uncertainty Analysis"):
+            st.markdown("*Simulate a range of outcomes by varying the rates, improvements and costs around your inputs.*")
+
+            col_dist, col_draws = st.columns(2)
+            with col_dist:
+                distribution = st.selectbox("Distribution", ["Triangular", "Uniform", "Normal"], key="mc_distribution")
+            with col_draws:
+                n_draws = st.select_slider("Number of Simulations", options=[10_000, 50_000, 100_000, 250_000],
+                                           value=100_000, key="mc_draws")
+
+            col_sr, col_sd, col_sc = st.columns(3)
+            with col_sr:
+                rate_spread = st.slider("Rate Uncertainty (±%)", min_value=0, max_value=100, value=20, step=5, key="mc_rate_spread") / 100
+            with col_sd:
+                drop_spread = st.slider("Improvement Uncertainty (±%)", min_value=0, max_value=100, value=30, step=5, key="mc_drop_spread") / 100
+            with col_sc:
+                cost_spread = st.slider("Cost Uncertainty (±%)", min_value=0, max_value=100, value=20, step=5, key="mc_cost_spread") / 100
+
+            if st.checkbox("Run uncertainty simulation", key="mc_enabled"):
+                summary = run_simulation(
+                    st.session_state.results.inputs,
+                    distribution.lower(), rate_spread, drop_spread, cost_spread, n_draws
+                )
+
+                band_col1, band_col2, band_col3 = st.columns(3)
+                band_col1.metric("Low Estimate (P5)", f"${summary['total_savings']['p5']:,.0f}")
+                band_col2.metric("Median Estimate (P50)", f"${summary['total_savings']['p50']:,.0f}")
+                band_col3.metric("High Estimate (P95)", f"${summary['total_savings']['p95']:,.0f}")
+
+                show_chart(create_uncertainty_chart(summary))
+
+        # Multi-year projection
+        with st.expander("Multi-Year Projection"):
+            st.markdown("*Project savings over several years with enrollment growth, program ramp-up, cost inflation and discounting.*")
+
+            col_years, col_growth = st.columns(2)
+            with col_years:
+                projection_years = st.slider("Projection Length (years)", min_value=1, max_value=10, value=5, step=1, key="proj_years")
+            with col_growth:
+                enrollment_growth = st.number_input("Annual Enrollment Growth (%)", min_value=-20.0, max_value=20.0,
+                                                    value=0.0, step=0.5, key="proj_growth") / 100
+
+            col_infl, col_disc = st.columns(2)
+            with col_infl:
+                cost_inflation = st.number_input("Annual Cost Inflation (%)", min_value=0.0, max_value=20.0,
+                                                 value=3.0, step=0.5, key="proj_inflation") / 100
+            with col_disc:
+                discount_rate = st.number_input("Discount Rate (%)", min_value=0.0, max_value=20.0,
+                                                value=3.0, step=0.5, key="proj_discount") / 100
+
+            st.markdown("*Years until each improvement reaches its full effect*")
+            col_rd, col_ra, col_rc = st.columns(3)
+            with col_rd:
+                discipline_ramp = st.number_input("Disciplinary Ramp-Up (years)", min_value=1, max_value=10, value=1, key="proj_ramp_discipline")
+            with col_ra:
+                absenteeism_ramp = st.number_input("Absenteeism Ramp-Up (years)", min_value=1, max_value=10, value=2, key="proj_ramp_absenteeism")
+            with col_rc:
+                crisis_ramp = st.number_input("Crisis Management Ramp-Up (years)", min_value=1, max_value=10, value=1, key="proj_ramp_crisis")
+
+            projection = project_savings(
+                st.session_state.results.inputs,
+                years=projection_years,
+                enrollment_growth=enrollment_growth,
+                cost_inflation=cost_inflation,
+                discount_rate=discount_rate,
+                ramp={"discipline": discipline_ramp, "absenteeism": absenteeism_ramp, "crisis": crisis_ramp},
+            )
+            annual_savings = projection["savings"].sum(axis=1)  # (years, categories)
+            npv_total = float(projection["npv_total"].sum())
+
+            proj_col1, proj_col2, proj_col3 = st.columns(3)
+            proj_col1.metric(f"Cumulative Savings ({projection_years} years)", f"${annual_savings.sum():,.0f}")
+            proj_col2.metric("Net Present Value of Savings", f"${npv_total:,.0f}")
+            program_cost = st.session_state.results.program_cost
+            if program_cost > 0:
+                # Program cost grows with cost inflation, like the savings
+                payback_years = float(payback_from_projection(projection, program_cost, cost_inflation)[0])
+                proj_col3.metric("Payback Period", "not reached" if np.isinf(payback_years) else f"{payback_years:.1f} years")
+
+            projection_fig = create_projection_chart(
+                projection["years"], annual_savings[:, 0], annual_savings[:, 1], annual_savings[:, 2], npv_total
+            )
+            show_chart(projection_fig)
+
+        # Sensitivity analysis
+        with st.expander("Sensitivity Analysis"):
+            st.markdown("*See which inputs move total savings the most, and explore two inputs at once.*")
+            base_inputs = st.session_state.results.inputs
+
+            perturbation = st.slider("Vary Each Input By (±%)", min_value=5, max_value=100, value=20, step=5, key="sens_range") / 100
+            ranking = tornado_analysis(base_inputs, 1 - perturbation, 1 + perturbation)
+            tornado_fig = create_tornado_chart(
+                [entry["label"] for entry in ranking],
+                [entry["low_output"] for entry in ranking],
+                [entry["high_output"] for entry in ranking],
+                ranking[0]["base_output"]
+            )
+            show_chart(tornado_fig)
+
+            st.markdown("**What-If Grid**")
+            col_x, col_y = st.columns(2)
+            with col_x:
+                x_name = st.selectbox("Horizontal Axis", SENSITIVITY_INPUTS, index=SENSITIVITY_INPUTS.index("discipline_drop"),
+                                      format_func=INPUT_LABELS.get, key="sens_x")
+            with col_y:
+                y_name = st.selectbox("Vertical Axis", SENSITIVITY_INPUTS, index=SENSITIVITY_INPUTS.index("discipline_rate"),
+                                      format_func=INPUT_LABELS.get, key="sens_y")
+            col_span, col_res = st.columns(2)
+            with col_span:
+                grid_span = st.slider("Grid Range (% of current value)", min_value=0, max_value=300, value=(0, 200), step=10, key="sens_span")
+            with col_res:
+                grid_points = st.slider("Grid Points Per Axis", min_value=11, max_value=201, value=101, step=10, key="sens_points")
+
+            if x_name == y_name:
+                st.warning("Choose two different inputs for the what-if grid.")
+            else:
+                axes = {}
+                for name in (x_name, y_name):
+                    low, high = input_bounds(name)
+                    axes[name] = np.clip(
+                        np.linspace(base_inputs[name] * grid_span[0] / 100, base_inputs[name] * grid_span[1] / 100, grid_points),
+                        low, high
+                    )
+                grid = grid_sweep(base_inputs, x_name, axes[x_name], y_name, axes[y_name])
+                with span("build_figure.create_sensitivity_heatmap"):
+                    heatmap_fig = create_sensitivity_heatmap(
+                        INPUT_LABELS[x_name], axes[x_name], INPUT_LABELS[y_name], axes[y_name], grid
+                    )
+                show_chart(heatmap_fig)
+
+    record("calculator_fragment", time.perf_counter() - fragment_start)
+
+
+calculator()
+
+
+@st.fragment
+def rollup_drill_down():
+    st.markdown("---")
+    st.subheader("District and State Roll-Up")
     st.markdown("""
-    These estimates are based on national research on educator time spent managing discipline, crises, and referrals, adjusted by the improvements you selected above.
+    *Upload a roster (CSV or Parquet) with one row per school, the calculator inputs as columns, and `state`,
+    `region` and/or `district` columns to see savings rolled up at every level.*
     """)
-
-    st.markdown(f"""
-    - **Teachers** may save an estimated **{teacher_time_saved:.1f} hours per week** by reducing time spent on classroom disruptions, crisis management, and referrals.
-    - **Counselors** may save an estimated **{counselor_time_saved:.1f} hours per week** by decreasing time spent on disciplinary actions, crisis interventions, and processing referrals.
-    
-    These reclaimed hours can be redirected to proactive student support, instructional planning, and fostering a healthy school climate.
-    """)
-
-    from visualizations import create_time_savings_charts
-
-    weekly_fig, annual_fig = create_time_savings_charts(teacher_time_saved, counselor_time_saved)
-    st.plotly_chart(weekly_fig, use_container_width=True)
-    st.plotly_chart(annual_fig, use_container_width=True)
-
-    # Generate report button
-if st.session_state.get("report_ready"):
-    st.subheader("Generate Your Report")
-
+    roster_file = st.file_uploader("School Roster", type=["csv", "parquet"], key="rollup_roster")
+    if roster_file is None:
+        return
     try:
-        report_html = generate_report(st.session_state.results)
-
-        st.download_button(
-            label="📄 Download Report",
-            data=report_html,
-            file_name=f"savings_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
-            mime="text/html",
-            key="download_report_button"
-        )
-    except Exception as e:
-        st.error(f"❌ An error occurred while generating the report: {e}")
-
+        tree = get_aggregation_tree(roster_file)
+    except (KeyError, ValueError) as e:
+        st.error(f"❌ Could not read the roster: {e}")
+        return
+
+    # Drill down one level at a time; every view reads the tree's precomputed totals
+    path = []
+    if tree.levels:
+        for column, level in zip(st.columns(len(tree.levels)), tree.levels):
+            with column:
+                choice = st.selectbox(
+                    level.title(), ["All"] + [tree.names[child] for child in tree.children(tree.node(*path))],
+                    key="rollup_" + "/".join([level] + path)
+                )
+            if choice == "All":
+                break
+            path.append(choice)
+    node = tree.node(*path)
+
+    totals = tree.aggregate(node)
+    rollup_col1, rollup_col2, rollup_col3, rollup_col4 = st.columns(4)
+    rollup_col1.metric("Schools", f"{totals['schools']:,.0f}")
+    rollup_col2.metric("Students", f"{totals['num_students']:,.0f}")
+    rollup_col3.metric("Current Costs", f"${totals['total_current']:,.0f}")
+    rollup_col4.metric("Estimated Savings", f"${totals['total_savings']:,.0f}")
+
+    child_level = "school" if tree.depths[node] == len(tree.levels) else tree.levels[tree.depths[node]]
+    children = tree.children_frame(node)
+    children["staff_fte"] = children["teacher_fte"] + children["counselor_fte"]
+    st.dataframe(
+        children[["name", "schools", "num_students", "total_current", "total_projected", "total_savings",
+                  "program_cost", "teacher_hours_annual", "counselor_hours_annual", "staff_fte"]],
+        column_config={
+            "name": st.column_config.TextColumn(child_level.title()),
+            "schools": st.column_config.NumberColumn("Schools", format="localized"),
+            "num_students": st.column_config.NumberColumn("Students", format="localized"),
+            "total_current": st.column_config.NumberColumn("Current Costs", format="dollar"),
+            "total_projected": st.column_config.NumberColumn("Projected Costs", format="dollar"),
+            "total_savings": st.column_config.NumberColumn("Estimated Savings", format="dollar"),
+            "program_cost": st.column_config.NumberColumn("Program Cost", format="dollar"),
+            "teacher_hours_annual": st.column_config.NumberColumn("Teacher Hours Saved", format="localized"),
+            "counselor_hours_annual": st.column_config.NumberColumn("Counselor Hours Saved", format="localized"),
+            "staff_fte": st.column_config.NumberColumn("FTEs Freed", format="%.1f"),
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
 
-    
+    with st.expander("Allocate a Program Budget"):
+        st.markdown("*Split a fixed budget across these schools and the three focus areas to maximize savings. "
+                    "Each additional dollar in a school and area has a diminishing effect, reaching the improvement "
+                    "entered for it as spending grows.*")
+        budget = st.number_input("Program Budget ($)", min_value=0.0, value=100000.0, step=10000.0,
+                                 key="rollup_budget")
+        if budget > 0:
+            schools = tree.schools_under(node)
+            with span("optimize_budget"):
+                allocation = optimize_budget(
+                    dict(zip(INPUT_COLUMNS, tree.inputs[schools, :len(INPUT_COLUMNS)].T)), budget
+                )
+            alloc_col1, alloc_col2, alloc_col3 = st.columns(3)
+            alloc_col1.metric("Estimated Savings", f"${allocation['total_savings']:,.0f}")
+            alloc_col2.metric("Savings per Dollar", f"${allocation['total_savings'] / allocation['total_spend']:,.2f}"
+                              if allocation["total_spend"] > 0 else "–")
+            alloc_col3.metric("Return on the Last Dollar", f"${allocation['shadow_price']:,.2f}")
+            if allocation["total_spend"] < budget:
+                st.caption(f"${allocation['total_spend']:,.0f} is enough to reach the full improvement "
+                           "everywhere; the rest of the budget is left unallocated.")
+
+            frame = allocation_frame(allocation, [tree.names[tree.school_start + school] for school in schools])
+            frame["category"] = frame["category"].map(
+                {"discipline": "Disciplinary Issues", "absenteeism": "Chronic Absenteeism", "crisis": "Crisis Management"}
+            )
+            st.dataframe(
+                frame[["institution_name", "category", "spend", "savings", "drop", "marginal_savings_per_dollar"]],
+                column_config={
+                    "institution_name": st.column_config.TextColumn("School"),
+                    "category": st.column_config.TextColumn("Focus Area"),
+                    "spend": st.column_config.NumberColumn("Budget", format="dollar"),
+                    "savings": st.column_config.NumberColumn("Estimated Savings", format="dollar"),
+                    "drop": st.column_config.NumberColumn("Improvement", format="percent"),
+                    "marginal_savings_per_dollar": st.column_config.NumberColumn("Next-Dollar Savings", format="dollar"),
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
+
+    if child_level != "school":
+        return
+    # Editing a school recomputes only that school and its ancestors
+    schools = tree.children(node).tolist()
+    school_node = st.selectbox("Edit a School", schools, format_func=tree.names.__getitem__,
+                               key="rollup_school_" + "/".join(path))
+    school = school_node - tree.school_start
+    inputs = tree.school_inputs(school)
+    with st.form(f"rollup_edit_{school}"):
+        edit_columns = st.columns(3)
+        for index, name in enumerate(INPUT_COLUMNS):
+            with edit_columns[index % 3]:
+                if name in PERCENT_INPUTS:
+                    st.number_input(f"{INPUT_LABELS[name]} (%)", min_value=0.0, max_value=100.0,
+                                    value=round(inputs[name] * 100, 4), step=0.5, key=f"rollup_{school}_{name}")
+                else:
+                    st.number_input(INPUT_LABELS[name], min_value=0.0, value=float(inputs[name]), step=1.0,
+                                    key=f"rollup_{school}_{name}")
+        st.form_submit_button("Update School", on_click=update_rollup_school, args=(school,))
+
+
+rollup_drill_down()
 
 # Contact Form Section
 # Contact Form Section
@@ -226,25 +704,18 @@ with st.form("contact_form"):
     name = st.text_input("Your Name")
     district = st.text_input("School District")
     email = st.text_input("Email Address")
+    send_report = st.session_state.get("report_ready") and st.checkbox(
+        "Email me a copy of my savings report", key="contact_send_report"
+    )
     submitted = st.form_submit_button("Request Information")
 
     if submitted:
-        import requests
-
-        data = {
-            "name": name,
-            "district": district,
-            "email": email,
-        }
-
-        try:
-            response = requests.post("https://getform.io/f/bpjndonb", data=data)
-            if response.status_code == 200:
-                st.success("✅ Thank you! Kris from Maro will reach out to you soon.")
-            else:
-                st.error("❌ Something went wrong. Please try again later.")
-        except Exception as e:
-            st.error(f"❌ Error: {e}")
+        # Queued in the outbox and sent in the background, so this returns at once
+        report_html = get_report_html() if send_report else None
+        if send_contact_email(name, district, email, report_html=report_html):
+            st.success("✅ Thank you! Kris from Maro will reach out to you soon.")
+        else:
+            st.error("❌ Something went wrong. Please try again later.")
 
 
 
@@ -301,3 +772,5 @@ st.markdown("""
     Proactive Mental Health Cost Savings Calculator | Developed for School Administrators and District Leaders | Product of <a href="https://meetmaro.com" target="_blank">meetmaro.com</a>
 </div>
 """, unsafe_allow_html=True)
+
+record("rerun", time.perf_counter() - rerun_start)
@@ -0,0 +1,366 @@
+"""
+Benchmarks for the calculation, chart and report hot paths.
+
+Usage:
+    python benchmarks/run_benchmarks.py                    # compare against baseline.json
+    python benchmarks/run_benchmarks.py --update-baseline  # record new baselines
+    python benchmarks/run_benchmarks.py --only report      # run matching benchmarks only
+
+Each benchmark records its best wall time over several repeats and its peak
+traced memory (tracemalloc, measured in a separate run so tracing does not
+skew the timings). The script exits with status 1 when a benchmark is slower
+or uses more memory than its baseline allows. Baselines are machine
+specific; re-record them when the reference machine changes.
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+BENCHMARKS = {}
+
+
+def benchmark(name, repeat=10):
+    """Register ``setup() -> run`` as a benchmark; only ``run()`` is timed."""
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, repeat)
+        return setup
+    return decorator
+
+
+def _default_results():
+    from calculations import DEFAULT_INPUTS, build_results
+
+    return build_results(DEFAULT_INPUTS, institution_name="Benchmark District", timestamp="2025-01-01 00:00:00")
+
+
+def _roster(rows):
+    import numpy as np
+    from calculations import DEFAULT_INPUTS
+
+    rng = np.random.default_rng(0)
+    roster = {name: np.full(rows, float(value)) for name, value in DEFAULT_INPUTS.items()}
+    roster["num_students"] = rng.integers(100, 3000, rows).astype(float)
+    for name in ("discipline_rate", "absenteeism_rate", "crisis_rate"):
+        roster[name] = rng.uniform(0, 0.3, rows)
+    return roster
+
+
+# Calculations
+
+@benchmark("import_calculations", repeat=3)
+def bench_import_calculations():
+    code = (
+        "import sys, calculations; "
+        "heavy = [m for m in ('pandas', 'plotly', 'streamlit') if m in sys.modules]; "
+        "sys.exit(f'calculations imported {heavy}' if heavy else 0)"
+    )
+
+    def run():
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+    return run
+
+
+@benchmark("warm_start", repeat=3)
+def bench_warm_start():
+    def run():
+        subprocess.run([sys.executable, "-c", "import warmup; warmup.warm_up()"], cwd=ROOT, check=True,
+                       stderr=subprocess.DEVNULL)
+    return run
+
+
+@benchmark("calculate_savings_scalar_x1000")
+def bench_calculate_savings_scalar():
+    from calculations import DEFAULT_INPUTS, INPUT_COLUMNS, calculate_savings
+
+    args = [DEFAULT_INPUTS[name] for name in INPUT_COLUMNS]
+
+    def run():
+        for _ in range(1000):
+            calculate_savings(*args)
+    return run
+
+
+@benchmark("calculate_batch_100k")
+def bench_calculate_batch():
+    from calculations import calculate_batch
+
+    roster = _roster(100_000)
+    return lambda: calculate_batch(roster)
+
+
+@benchmark("staff_time_batch_100k")
+def bench_staff_time_batch():
+    import numpy as np
+    from calculations import calculate_staff_time_batch
+
+    roster = _roster(100_000)
+    # Half the schools give headcounts, the rest are estimated from enrollment
+    teachers = np.where(np.arange(100_000) % 2, roster["num_students"] / 15, 0)
+    return lambda: calculate_staff_time_batch(
+        roster["num_students"], roster["discipline_drop"], roster["crisis_drop"], teachers=teachers
+    )
+
+
+@benchmark("export_tables_100k", repeat=3)
+def bench_export_tables():
+    from calculations import calculate_results_batch
+    from export import categories_table, projections_table, schools_table
+    from projections import project_savings
+
+    roster = _roster(100_000)
+
+    def run():
+        batch = calculate_results_batch(roster, timestamp="2025-01-01 00:00:00")
+        schools_table(batch)
+        categories_table(batch)
+        projections_table(project_savings(roster, years=5))
+    return run
+
+
+@benchmark("optimize_budget_100k", repeat=3)
+def bench_optimize_budget():
+    from optimizer import optimize_budget
+
+    roster = _roster(100_000)
+    return lambda: optimize_budget(roster, 5_000_000)
+
+
+@benchmark("create_summary_dataframe")
+def bench_create_summary_dataframe():
+    from utils import create_summary_dataframe
+
+    results = _default_results()
+    return lambda: create_summary_dataframe(results)
+
+
+@benchmark("graph_single_input_update_x100")
+def bench_graph_single_input_update():
+    from calculations import DEFAULT_INPUTS, PROGRAM_COST_COLUMNS
+    from compute_graph import calculator_graph
+
+    graph = calculator_graph()
+    graph.set_inputs(institution_name="Benchmark District", **DEFAULT_INPUTS, **dict.fromkeys(PROGRAM_COST_COLUMNS, 0))
+    nodes = ("total_savings", "results", "savings_chart", "comparison_chart", "time_charts")
+
+    def run():
+        for cost in range(10000, 10100):
+            graph.set_inputs(crisis_cost=cost)
+            for node in nodes:
+                graph.get(node)
+    return run
+
+
+# Charts (uncached builders, so the figure construction itself is measured)
+
+@benchmark("chart_savings")
+def bench_chart_savings():
+    from visualizations import create_savings_chart
+
+    results = _default_results()
+    return lambda: create_savings_chart.uncached(
+        results["discipline_savings"], results["absenteeism_savings"], results["crisis_savings"]
+    )
+
+
+@benchmark("chart_comparison")
+def bench_chart_comparison():
+    from calculations import INPUT_COLUMNS
+    from visualizations import create_comparison_chart
+
+    results = _default_results()
+    return lambda: create_comparison_chart.uncached(*[results[name] for name in INPUT_COLUMNS])
+
+
+@benchmark("chart_roi")
+def bench_chart_roi():
+    from visualizations import create_roi_chart
+
+    results = _default_results()
+    return lambda: create_roi_chart.uncached(results)
+
+
+@benchmark("chart_time_savings")
+def bench_chart_time_savings():
+    from visualizations import create_time_savings_charts
+
+    return lambda: create_time_savings_charts.uncached(2.3, 3.0)
+
+
+@benchmark("chart_uncertainty")
+def bench_chart_uncertainty():
+    from calculations import DEFAULT_INPUTS
+    from simulation import simulate_savings, spread_distributions
+    from visualizations import create_uncertainty_chart
+
+    summary = simulate_savings(DEFAULT_INPUTS, spread_distributions(DEFAULT_INPUTS), n_draws=10_000)
+    return lambda: create_uncertainty_chart.uncached(summary)
+
+
+@benchmark("chart_projection")
+def bench_chart_projection():
+    from calculations import DEFAULT_INPUTS
+    from projections import project_savings
+    from visualizations import create_projection_chart
+
+    projection = project_savings(DEFAULT_INPUTS, years=10, cost_inflation=0.03, discount_rate=0.03, ramp=2)
+    annual = projection["savings"].sum(axis=1)
+    return lambda: create_projection_chart.uncached(
+        projection["years"], annual[:, 0], annual[:, 1], annual[:, 2], float(projection["npv_total"].sum())
+    )
+
+
+@benchmark("chart_tornado")
+def bench_chart_tornado():
+    from calculations import DEFAULT_INPUTS
+    from sensitivity import tornado_analysis
+    from visualizations import create_tornado_chart
+
+    ranking = tornado_analysis(DEFAULT_INPUTS)
+    return lambda: create_tornado_chart.uncached(
+        [entry["label"] for entry in ranking],
+        [entry["low_output"] for entry in ranking],
+        [entry["high_output"] for entry in ranking],
+        ranking[0]["base_output"],
+    )
+
+
+@benchmark("chart_sensitivity_heatmap_101x101")
+def bench_chart_heatmap():
+    import numpy as np
+    from calculations import DEFAULT_INPUTS
+    from sensitivity import grid_sweep
+    from visualizations import create_sensitivity_heatmap
+
+    axis = np.linspace(0, 1, 101)
+    grid = grid_sweep(DEFAULT_INPUTS, "discipline_drop", axis, "discipline_rate", axis)
+    return lambda: create_sensitivity_heatmap("Drop", axis, "Rate", axis, grid)
+
+
+# Reports
+
+@benchmark("generate_report_cold")
+def bench_generate_report_cold():
+    import visualizations
+    from report_generator import generate_report
+
+    results = _default_results()
+
+    def run():
+        visualizations._figure_cache.clear()
+        generate_report(results)
+    return run
+
+
+@benchmark("generate_report_warm")
+def bench_generate_report_warm():
+    from report_generator import generate_report
+
+    results = _default_results()
+    generate_report(results)
+    return lambda: generate_report(results)
+
+
+# Full app rerun
+
+@benchmark("app_rerun", repeat=3)
+def bench_app_rerun():
+    from streamlit.testing.v1 import AppTest
+
+    def run():
+        os.chdir(ROOT)
+        app = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120).run()
+        app.button(key="calculate_button").click().run()
+        if app.exception:
+            raise RuntimeError(app.exception)
+    return run
+
+
+def measure(name):
+    setup, repeat = BENCHMARKS[name]
+    run = setup()
+    run()  # warm-up: first-call imports and caches
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"time": min(timings), "peak_kb": peak / 1024}
+
+
+def compare(name, result, baseline, time_tolerance, memory_tolerance):
+    """Return a list of regression messages for one benchmark."""
+    problems = []
+    if name not in baseline:
+        return problems
+    reference = baseline[name]
+    if result["time"] > reference["time"] * (1 + time_tolerance):
+        problems.append(f"time {result['time'] * 1000:.2f} ms > baseline {reference['time'] * 1000:.2f} ms")
+    # Ignore memory noise below 64 KiB
+    if result["peak_kb"] > max(reference["peak_kb"] * (1 + memory_tolerance), reference["peak_kb"] + 64):
+        problems.append(f"peak memory {result['peak_kb']:.0f} KiB > baseline {reference['peak_kb']:.0f} KiB")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to baseline.json")
+    parser.add_argument("--only", action="append", default=[], help="Run benchmarks whose name contains this text")
+    parser.add_argument("--time-tolerance", type=float, default=1.0,
+                        help="Allowed slowdown as a fraction of the baseline (default: %(default)s)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25,
+                        help="Allowed peak memory growth as a fraction of the baseline (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    names = [name for name in BENCHMARKS if not args.only or any(part in name for part in args.only)]
+
+    results = {}
+    failures = 0
+    for name in names:
+        try:
+            result = measure(name)
+        except ImportError as e:
+            print(f"{name:40s} skipped ({e})")
+            continue
+        results[name] = result
+        problems = [] if args.update_baseline else compare(
+            name, result, baseline, args.time_tolerance, args.memory_tolerance
+        )
+        status = "REGRESSION: " + "; ".join(problems) if problems else "ok"
+        failures += bool(problems)
+        print(f"{name:40s} {result['time'] * 1000:10.3f} ms {result['peak_kb']:10.0f} KiB  {status}")
+
+    if args.update_baseline:
+        baseline.update({name: {k: round(v, 6) for k, v in result.items()} for name, result in results.items()})
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if failures:
+        print(f"{failures} benchmark(s) regressed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import numpy as np
+from calculations import CATEGORIES, Results, ResultsBatch, calculate_batch, calculate_program_cost
+
+
+def _column(inputs, name, default=0):
+    return np.asarray(inputs[name] if name in inputs else default, dtype=np.float64)
+
+
+def solve_breakeven(inputs):
+    """
+    Break-even drop rates, ROI and payback period for one school or a roster.
+
+    Savings are linear in each drop rate, so every quantity has a closed
+    form and the whole roster is solved in one vectorized pass.
+
+    Parameters:
+    -----------
+    inputs : dict, pd.DataFrame, Results or ResultsBatch
+        Calculator inputs plus ``license_cost_per_student`` and
+        ``fixed_program_cost`` (missing program cost columns count as zero).
+        Costs already computed in a Results or ResultsBatch are reused.
+
+    Returns:
+    --------
+    dict
+        Arrays (one value per school):
+
+        - ``program_cost``: annual program cost
+        - ``total_savings`` and ``net_savings`` (savings minus program cost)
+        - ``roi``: net savings / program cost (NaN when the program is free)
+        - ``payback_months``: months of savings to recover one year of
+          program cost (inf when there are no savings)
+        - ``breakeven_scale``: fraction of the entered drops needed to break
+          even, applied to all categories at once (<= 1 means the entered
+          drops pay for the program)
+        - ``breakeven_<category>_drop``: drop needed in that category alone,
+          holding the other categories at their entered drops (<= 0 means
+          already covered, > 1 means unreachable through that category)
+    """
+    if isinstance(inputs, (Results, ResultsBatch)):
+        batch = inputs
+        program_cost = np.asarray(inputs.program_cost, dtype=np.float64)
+    else:
+        batch = calculate_batch(inputs)
+        program_cost = calculate_program_cost(
+            _column(inputs, "num_students"),
+            _column(inputs, "license_cost_per_student"),
+            _column(inputs, "fixed_program_cost"),
+        )
+    total_savings = np.asarray(batch["total_savings"], dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = {
+            "program_cost": program_cost,
+            "total_savings": total_savings,
+            "net_savings": total_savings - program_cost,
+            "roi": np.where(program_cost > 0, (total_savings - program_cost) / program_cost, np.nan),
+            "payback_months": np.where(total_savings > 0, program_cost / (total_savings / 12), np.inf),
+            "breakeven_scale": np.where(total_savings > 0, program_cost / total_savings, np.inf),
+        }
+        for category in CATEGORIES:
+            # Savings in this category are current cost x drop, so solve
+            # current * drop + other savings = program cost for the drop
+            current = np.asarray(batch[f"{category}_current"], dtype=np.float64)
+            other_savings = total_savings - batch[f"{category}_savings"]
+            result[f"breakeven_{category}_drop"] = np.where(
+                current > 0, (program_cost - other_savings) / current, np.inf
+            )
+    return result
+
+
+def payback_from_projection(projection, program_cost, cost_inflation=0.0):
+    """
+    Payback period in years from a multi-year projection.
+
+    Parameters:
+    -----------
+    projection : dict
+        Output of projections.project_savings
+    program_cost : float or array-like
+        Year-one program cost, scalar or one value per school
+    cost_inflation : float
+        Annual growth in the program cost (as a decimal)
+
+    Returns:
+    --------
+    np.ndarray
+        Years until cumulative savings cover cumulative program cost (one
+        value per school); inf if that never happens within the projection
+    """
+    annual_savings = projection["savings"].sum(axis=-1)                     # (Y, S)
+    years = annual_savings.shape[0]
+    annual_cost = np.broadcast_to(
+        np.asarray(program_cost, dtype=np.float64) * (1 + cost_inflation) ** np.arange(years)[:, None],
+        annual_savings.shape
+    )
+    cumulative_net = np.cumsum(annual_savings - annual_cost, axis=0)         # (Y, S)
+
+    # Program cost is paid at the start of each year and savings accrue
+    # evenly through it, matching the single-year payback in solve_breakeven
+    paid_back = cumulative_net >= 0
+    reached = paid_back.any(axis=0)
+    first = paid_back.argmax(axis=0)
+    columns = np.arange(cumulative_net.shape[1])
+    before = np.where(first > 0, cumulative_net[np.maximum(first - 1, 0), columns], 0.0)
+    cost_due = annual_cost[first, columns] - before
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(annual_savings[first, columns] > 0, cost_due / annual_savings[first, columns], 0.0)
+    return np.where(reached, first + np.clip(fraction, 0.0, 1.0), np.inf)
@@ -0,0 +1,201 @@
+import os
+import re
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+
+from calculations import DEFAULT_INPUTS, DEFAULT_STAFFING, INPUT_COLUMNS, PROGRAM_COST_COLUMNS, STAFFING_COLUMNS, build_results
+from instrumentation import span
+from roster import institution_names, map_chunks, read_roster_chunks
+
+DEFAULT_REPORT_CHUNKSIZE = 50
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(text)).strip("-").lower()[:60] or "school"
+
+
+def report_filename(row_number, name):
+    """Deterministic file name for a roster row, so reruns can skip finished reports."""
+    return f"{row_number:06d}_{_slug(name)}.html"
+
+
+def _value(record, name, default):
+    # Blank cells read as NaN; treat them like a missing column
+    value = record.get(name)
+    return default if value is None or pd.isna(value) else value
+
+
+def _row_jobs(chunk, start_row):
+    """Yield (row_number, institution_name, inputs) for each roster row."""
+    names = institution_names(chunk, start_row)
+    records = chunk.to_dict("records")
+    for offset, record in enumerate(records):
+        inputs = {name: _value(record, name, DEFAULT_INPUTS[name]) for name in INPUT_COLUMNS}
+        inputs["num_students"] = int(inputs["num_students"])
+        for name in PROGRAM_COST_COLUMNS:
+            inputs[name] = _value(record, name, 0)
+        for name in STAFFING_COLUMNS:
+            inputs[name] = _value(record, name, DEFAULT_STAFFING[name])
+        yield start_row + offset, names[offset], inputs
+
+
+def render_reports(jobs, offline=False):
+    """
+    Render a list of report jobs in the current process.
+
+    Returns:
+    --------
+    list of (str, bytes)
+        File name and UTF-8 report HTML for each job
+    """
+    from report_generator import generate_report
+
+    rendered = []
+    for row_number, name, inputs in jobs:
+        with span("bulk_report"):
+            html_content = generate_report(build_results(inputs, institution_name=name), offline=offline)
+        rendered.append((report_filename(row_number, name), html_content.encode("utf-8")))
+    return rendered
+
+
+def _render_offline(jobs):
+    return render_reports(jobs, offline=True)
+
+
+class _DirectorySink:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def existing(self):
+        return {entry.name for entry in self.path.iterdir() if entry.suffix == ".html"}
+
+    def write(self, rendered):
+        for filename, data in rendered:
+            # Write then rename, so a crash never leaves a truncated report
+            # behind that a resumed run would mistake for a finished one
+            tmp_path = self.path / (filename + ".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self.path / filename)
+
+    def close(self):
+        pass
+
+
+class _ZipSink:
+    # Each batch is written to its own part archive next to the output (write
+    # then rename, like _DirectorySink), and close() merges the parts into
+    # the output archive. Appending to a single archive in place would leave
+    # it unreadable if the run died mid-write, losing every finished report.
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.parts_dir = self.path.with_name(self.path.name + ".parts")
+
+    def _parts(self):
+        if not self.parts_dir.is_dir():
+            return []
+        return sorted(self.parts_dir.glob("*.zip"))
+
+    def existing(self):
+        names = set()
+        for archive_path in ([self.path] if self.path.exists() else []) + self._parts():
+            with zipfile.ZipFile(archive_path) as archive:
+                names.update(archive.namelist())
+        return names
+
+    def write(self, rendered):
+        parts = self._parts()
+        part_path = self.parts_dir / f"{int(parts[-1].stem) + 1 if parts else 0:06d}.zip"
+        tmp_path = part_path.with_suffix(".tmp")
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        # Parts are stored uncompressed; close() compresses once when merging
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for filename, data in rendered:
+                archive.writestr(filename, data)
+        os.replace(tmp_path, part_path)
+
+    def close(self):
+        parts = self._parts()
+        if not parts:
+            return
+        sources = ([self.path] if self.path.exists() else []) + parts
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        written = set()
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as merged:
+            for archive_path in sources:
+                with zipfile.ZipFile(archive_path) as archive:
+                    for filename in archive.namelist():
+                        # A crash between the rename and the cleanup below
+                        # leaves parts that are already in the output
+                        if filename not in written:
+                            merged.writestr(filename, archive.read(filename))
+                            written.add(filename)
+        os.replace(tmp_path, self.path)
+        for part_path in parts:
+            part_path.unlink()
+        for leftover in self.parts_dir.glob("*.tmp"):
+            leftover.unlink()
+        self.parts_dir.rmdir()
+
+
+def generate_bulk_reports(roster_path, output, chunksize=DEFAULT_REPORT_CHUNKSIZE, workers=None,
+                          offline=False, progress=None):
+    """
+    Render one HTML report per roster row into a directory or a zip archive.
+
+    Rows are streamed from the roster and rendered across a process pool in
+    batches of ``chunksize``, with a bounded number of batches in flight.
+    Reports already present in the output (from an interrupted run) are
+    skipped, so rerunning the same command resumes where it stopped.
+
+    Parameters:
+    -----------
+    roster_path : str or Path
+        CSV or Parquet roster, one row per school
+    output : str or Path
+        Output directory, or a ``.zip`` file
+    chunksize : int
+        Reports per batch handed to a worker
+    workers : int, optional
+        Worker processes (default: CPU count, 1 = in-process)
+    offline : bool
+        Render self-contained offline reports
+    progress : callable, optional
+        Called as ``progress(written, skipped)`` after each batch
+
+    Returns:
+    --------
+    dict
+        Counts of ``written`` and ``skipped`` reports
+    """
+    sink = _ZipSink(output) if str(output).lower().endswith(".zip") else _DirectorySink(output)
+    done = sink.existing()
+    render = _render_offline if offline else render_reports
+    counts = {"written": 0, "skipped": 0}
+
+    def batches():
+        start_row = 0
+        for chunk in read_roster_chunks(roster_path, chunksize):
+            jobs = []
+            for job in _row_jobs(chunk, start_row):
+                if report_filename(job[0], job[1]) in done:
+                    counts["skipped"] += 1
+                else:
+                    jobs.append(job)
+            start_row += len(chunk)
+            if jobs:
+                yield jobs
+
+    try:
+        for rendered in map_chunks(render, batches(), workers):
+            sink.write(rendered)
+            counts["written"] += len(rendered)
+            if progress is not None:
+                progress(counts["written"], counts["skipped"])
+    finally:
+        # Also on interruption, so the output holds every finished batch
+        sink.close()
+    return counts
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+
+
+def normalize_key(value):
+    """
+    Convert an input value into a canonical, hashable cache key.
+
+    Numbers (including NumPy scalars) become floats rounded to 12 significant
+    digits so ``1000``, ``1000.0`` and ``np.float64(1000)`` share a key, and
+    dicts become key-sorted tuples. NumPy arrays are keyed on their values.
+    """
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), normalize_key(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_key(v) for v in value)
+    if getattr(value, "ndim", 0) > 0:
+        return normalize_key(value.tolist())
+    try:
+        return float(f"{float(value):.12g}")
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+class LRUCache:
+    """Thread-safe, size-bounded least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key, factory):
+        """
+        Return the cached value for ``key``, building it with ``factory()`` on a miss.
+
+        The factory runs outside the lock, so two threads missing on the same
+        key at once may both build it; the last one stored wins.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,611 @@
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+CATEGORIES = ("discipline", "absenteeism", "crisis")
+
+INPUT_COLUMNS = (
+    "num_students",
+    "discipline_rate",
+    "absenteeism_rate",
+    "crisis_rate",
+    "discipline_drop",
+    "absenteeism_drop",
+    "crisis_drop",
+    "discipline_cost",
+    "absenteeism_cost",
+    "crisis_cost",
+)
+
+# Defaults shown in the calculator (national averages, rates as decimals)
+DEFAULT_INPUTS = {
+    "num_students": 1000,
+    "discipline_rate": 0.10,
+    "absenteeism_rate": 0.15,
+    "crisis_rate": 0.05,
+    "discipline_drop": 0.38,
+    "absenteeism_drop": 0.20,
+    "crisis_drop": 0.30,
+    "discipline_cost": 250,
+    "absenteeism_cost": 1200,
+    "crisis_cost": 10000,
+}
+
+# Program cost inputs; zero means no program cost was entered
+PROGRAM_COST_COLUMNS = ("license_cost_per_student", "fixed_program_cost")
+
+INPUT_LABELS = {
+    "num_students": "Number of Students",
+    "discipline_rate": "Disciplinary Rate",
+    "absenteeism_rate": "Chronic Absenteeism Rate",
+    "crisis_rate": "Crisis Management Rate",
+    "discipline_drop": "Drop in Disciplinary Issues",
+    "absenteeism_drop": "Drop in Chronic Absenteeism",
+    "crisis_drop": "Drop in Crisis Management",
+    "discipline_cost": "Cost Per Disciplinary Issue",
+    "absenteeism_cost": "Cost Per Chronic Absenteeism Case",
+    "crisis_cost": "Cost Per Crisis Management Case",
+}
+
+# Derived cost columns: current, projected and savings per category and in total
+COST_COLUMNS = tuple(f"{category}_{kind}" for kind in ("current", "projected", "savings")
+                     for category in CATEGORIES + ("total",))
+
+# Optional staffing inputs: teacher and counselor headcounts (zero means
+# estimate from enrollment) and the length of the school year in weeks
+STAFFING_COLUMNS = ("teachers", "counselors", "school_weeks")
+
+STAFF_ROLES = ("teacher", "counselor")
+
+# Staff time saved: weekly hours per teacher and per counselor, the headcounts
+# used, and hours and full-time equivalents across all of them per school year
+TIME_COLUMNS = (
+    tuple(f"{role}_hours_weekly" for role in STAFF_ROLES)
+    + tuple(f"{role}_headcount" for role in STAFF_ROLES)
+    + tuple(f"{role}_hours_annual" for role in STAFF_ROLES)
+    + tuple(f"{role}_fte" for role in STAFF_ROLES)
+)
+
+# Everything a computed scenario carries, in Results/ResultsBatch field order
+RESULT_FIELDS = (
+    ("institution_name", "timestamp") + INPUT_COLUMNS + PROGRAM_COST_COLUMNS + STAFFING_COLUMNS + COST_COLUMNS
+    + ("program_cost",) + TIME_COLUMNS
+)
+
+def input_bounds(name):
+    """Valid (low, high) range for an input: rates and drops are fractions, the rest non-negative."""
+    if name.endswith("_rate") or name.endswith("_drop"):
+        return 0.0, 1.0
+    if name == "school_weeks":
+        return 0.0, 52.0
+    return 0.0, np.inf
+
+# Weekly hours per educator/counselor spent on each kind of incident
+TEACHER_DISCIPLINE_HOURS = 3.5
+COUNSELOR_DISCIPLINE_HOURS = 2.5
+TEACHER_CRISIS_HOURS = 1.5
+COUNSELOR_CRISIS_HOURS = 6
+TEACHER_REFERRAL_HOURS = 0.5  # 30 minutes per referral
+COUNSELOR_REFERRAL_HOURS = 1.5  # Average of 1–2 hours per referral
+
+def calculate_time_saved_batch(discipline_drop, crisis_drop, referral_drop=0.25):
+    """
+    Vectorized, unrounded weekly time saved per teacher and per counselor.
+    
+    Returns:
+    --------
+    dict
+        Float arrays keyed "teacher" and "counselor" (hours per week)
+    """
+    discipline_drop = np.asarray(discipline_drop, dtype=np.float64)
+    crisis_drop = np.asarray(crisis_drop, dtype=np.float64)
+    referral_drop = np.asarray(referral_drop, dtype=np.float64)
+    return {
+        "teacher": (
+            (TEACHER_DISCIPLINE_HOURS * discipline_drop) +
+            (TEACHER_CRISIS_HOURS * crisis_drop) +
+            (TEACHER_REFERRAL_HOURS * referral_drop)
+        ),
+        "counselor": (
+            (COUNSELOR_DISCIPLINE_HOURS * discipline_drop) +
+            (COUNSELOR_CRISIS_HOURS * crisis_drop) +
+            (COUNSELOR_REFERRAL_HOURS * referral_drop)
+        ),
+    }
+
+def calculate_time_saved(num_students, discipline_drop, crisis_drop, referral_drop=0.25):
+    """
+    Estimate weekly time saved per educator and counselor at the reference
+    caseloads, rounded to one decimal. ``num_students`` is unused; see
+    calculate_staff_time_batch for headcount-scaled and school-wide hours.
+    """
+    time_saved = calculate_time_saved_batch(discipline_drop, crisis_drop, referral_drop)
+    return {
+        "teacher": round(float(time_saved["teacher"]), 1),
+        "counselor": round(float(time_saved["counselor"]), 1),
+    }
+
+# Weekly hours per staff member on each kind of incident, at the caseloads
+# in STUDENTS_PER_STAFF
+STAFF_HOURS = {
+    "teacher": {
+        "discipline": TEACHER_DISCIPLINE_HOURS,
+        "crisis": TEACHER_CRISIS_HOURS,
+        "referral": TEACHER_REFERRAL_HOURS,
+    },
+    "counselor": {
+        "discipline": COUNSELOR_DISCIPLINE_HOURS,
+        "crisis": COUNSELOR_CRISIS_HOURS,
+        "referral": COUNSELOR_REFERRAL_HOURS,
+    },
+}
+
+# Students per teacher and per counselor (national averages); used to
+# estimate headcounts a roster does not give
+STUDENTS_PER_STAFF = {"teacher": 16, "counselor": 400}
+
+SCHOOL_WEEKS = 36
+FTE_HOURS_WEEKLY = 40
+
+DEFAULT_STAFFING = {"teachers": 0, "counselors": 0, "school_weeks": SCHOOL_WEEKS}
+
+
+def calculate_staff_time_batch(
+    num_students,
+    discipline_drop,
+    crisis_drop,
+    teachers=0,
+    counselors=0,
+    school_weeks=SCHOOL_WEEKS,
+    referral_drop=0.25,
+    hours=STAFF_HOURS,
+    students_per_staff=STUDENTS_PER_STAFF,
+    fte_hours_weekly=FTE_HOURS_WEEKLY,
+):
+    """
+    Vectorized, unrounded staff time saved per school.
+
+    Each staff member's weekly hours saved are the STAFF_HOURS estimates
+    scaled by the improvements, and by their caseload relative to
+    ``students_per_staff``: a school with twice the students per counselor
+    saves each counselor twice the time. Headcounts of zero are estimated
+    from enrollment at ``students_per_staff``, so the per-person hours match
+    calculate_time_saved_batch. Hours across all staff in a role therefore
+    follow enrollment; headcounts only change how they are shared.
+
+    Parameters:
+    -----------
+    num_students : array-like or scalar
+        Students per school
+    discipline_drop, crisis_drop : array-like or scalar
+        Estimated drops (as decimals)
+    teachers, counselors : array-like or scalar
+        Headcounts; zero means estimate from ``num_students``
+    school_weeks : array-like or scalar
+        Weeks in the school year
+    referral_drop : array-like or scalar
+        Estimated drop in referrals (as a decimal)
+    hours : dict
+        Weekly hours per role and kind of incident, shaped like STAFF_HOURS
+    students_per_staff : dict
+        Students per teacher and per counselor
+    fte_hours_weekly : float
+        Weekly hours of one full-time staff member
+
+    Returns:
+    --------
+    dict
+        Float arrays keyed by TIME_COLUMNS: ``<role>_hours_weekly`` (per
+        staff member), ``<role>_headcount``, ``<role>_hours_annual`` (all
+        staff in that role, over the school year) and ``<role>_fte`` (those
+        hours as full-time equivalents)
+    """
+    num_students = np.asarray(num_students, dtype=np.float64)
+    drops = {
+        "discipline": np.asarray(discipline_drop, dtype=np.float64),
+        "crisis": np.asarray(crisis_drop, dtype=np.float64),
+        "referral": np.asarray(referral_drop, dtype=np.float64),
+    }
+    school_weeks = np.asarray(school_weeks, dtype=np.float64)
+    out = {}
+    for role, headcount in (("teacher", teachers), ("counselor", counselors)):
+        headcount = np.asarray(headcount, dtype=np.float64)
+        ratio = students_per_staff[role]
+        given = headcount > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            caseload = np.where(given, num_students / (headcount * ratio), 1.0)
+        per_person = (
+            (hours[role]["discipline"] * drops["discipline"]) +
+            (hours[role]["crisis"] * drops["crisis"]) +
+            (hours[role]["referral"] * drops["referral"])
+        ) * caseload
+        headcount = np.where(given, headcount, num_students / ratio)
+        team_weekly = per_person * headcount
+        out[f"{role}_hours_weekly"] = per_person
+        out[f"{role}_headcount"] = headcount
+        out[f"{role}_hours_annual"] = team_weekly * school_weeks
+        out[f"{role}_fte"] = team_weekly / fte_hours_weekly
+    return out
+
+
+def calculate_batch(data=None, **columns):
+    """
+    Calculate current costs, projected costs and savings for many schools
+    in one vectorized pass.
+    
+    Parameters:
+    -----------
+    data : pd.DataFrame or dict, optional
+        One row per school with the columns listed in INPUT_COLUMNS
+    **columns : array-like or scalar
+        Individual input columns; these override columns of the same name
+        in ``data``. Scalars are broadcast against the other columns.
+    
+    Returns:
+    --------
+    dict
+        Float arrays keyed ``<category>_current``, ``<category>_projected``
+        and ``<category>_savings`` for each of CATEGORIES, plus
+        ``total_current``, ``total_projected`` and ``total_savings``
+    """
+    inputs = {}
+    for name in INPUT_COLUMNS:
+        if name in columns:
+            value = columns[name]
+        elif data is not None and name in data:
+            value = data[name]
+        else:
+            raise KeyError(f"Missing input column: {name}")
+        inputs[name] = np.asarray(value, dtype=np.float64)
+
+    num_students = inputs["num_students"]
+    out = {}
+    for category in CATEGORIES:
+        rate = inputs[f"{category}_rate"]
+        drop = inputs[f"{category}_drop"]
+        cost = inputs[f"{category}_cost"]
+
+        # Same operation order as the original scalar formulas so batch and
+        # scalar results are bit-for-bit identical
+        current = num_students * rate * cost
+        out[f"{category}_current"] = current
+        out[f"{category}_projected"] = current * (1 - drop)
+        out[f"{category}_savings"] = num_students * rate * drop * cost
+
+    for kind in ("current", "projected", "savings"):
+        out[f"total_{kind}"] = (
+            out[f"discipline_{kind}"] + out[f"absenteeism_{kind}"] + out[f"crisis_{kind}"]
+        )
+
+    return out
+
+
+def _scalar_results(batch, kind):
+    """Unpack one kind of batch output for a single school into Python floats."""
+    return tuple(
+        float(batch[f"{category}_{kind}"]) for category in CATEGORIES + ("total",)
+    )
+
+
+def calculate_savings(
+    num_students, 
+    discipline_rate, 
+    absenteeism_rate, 
+    crisis_rate,
+    discipline_drop, 
+    absenteeism_drop, 
+    crisis_drop,
+    discipline_cost, 
+    absenteeism_cost, 
+    crisis_cost
+):
+    """
+    Calculate the potential savings from reducing disciplinary issues,
+    chronic absenteeism, and crisis management needs.
+    
+    Parameters:
+    -----------
+    num_students : int
+        Number of students in the school/district
+    discipline_rate : float
+        Current rate of disciplinary issues (as a decimal)
+    absenteeism_rate : float
+        Current rate of chronic absenteeism (as a decimal)
+    crisis_rate : float
+        Current rate of crisis management needs (as a decimal)
+    discipline_drop : float
+        Estimated drop in disciplinary issues (as a decimal)
+    absenteeism_drop : float
+        Estimated drop in chronic absenteeism (as a decimal)
+    crisis_drop : float
+        Estimated drop in crisis management needs (as a decimal)
+    discipline_cost : float
+        Cost per disciplinary issue ($)
+    absenteeism_cost : float
+        Cost per chronic absenteeism case ($)
+    crisis_cost : float
+        Cost per crisis management case ($)
+    
+    Returns:
+    --------
+    tuple
+        (discipline_savings, absenteeism_savings, crisis_savings, total_savings)
+    """
+    batch = calculate_batch(
+        num_students=num_students,
+        discipline_rate=discipline_rate,
+        absenteeism_rate=absenteeism_rate,
+        crisis_rate=crisis_rate,
+        discipline_drop=discipline_drop,
+        absenteeism_drop=absenteeism_drop,
+        crisis_drop=crisis_drop,
+        discipline_cost=discipline_cost,
+        absenteeism_cost=absenteeism_cost,
+        crisis_cost=crisis_cost,
+    )
+    return _scalar_results(batch, "savings")
+
+_FIELD_INDEX = {name: index for index, name in enumerate(RESULT_FIELDS)}
+
+
+class _FieldMapping:
+    """Read-only mapping access to the fields of a RESULT_FIELDS namedtuple."""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = _FIELD_INDEX[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = _FIELD_INDEX.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def __contains__(self, key):
+        return key in _FIELD_INDEX
+
+    def keys(self):
+        return RESULT_FIELDS
+
+
+class Results(_FieldMapping, namedtuple("Results", RESULT_FIELDS)):
+    """
+    Immutable results for one school: the inputs and every derived value.
+
+    A plain tuple underneath (no per-instance dict), with attribute access
+    (``results.total_savings``) and read-only mapping access
+    (``results["total_savings"]``, ``results.get(...)``, ``keys()``) so it
+    can be used wherever the old results dictionary was.
+    """
+    __slots__ = ()
+
+    @property
+    def inputs(self):
+        """The calculator inputs (INPUT_COLUMNS) as a dict."""
+        return {name: self[name] for name in INPUT_COLUMNS}
+
+
+class ResultsBatch(_FieldMapping, namedtuple("ResultsBatch", RESULT_FIELDS)):
+    """
+    Columnar results for many schools: one NumPy array per field of Results,
+    with the same attribute and mapping access.
+
+    ``institution_name`` is a NumPy string array and ``timestamp`` a single
+    string shared by the batch, so no Python object is created per school.
+    """
+    __slots__ = ()
+
+    @property
+    def size(self):
+        """Number of schools."""
+        return len(self.total_savings)
+
+    def row(self, index):
+        """The Results for one school."""
+        values = {name: getattr(self, name)[index].item() for name in RESULT_FIELDS if name != "timestamp"}
+        # Student counts are whole numbers; keep them ints, as the app does
+        if values["num_students"].is_integer():
+            values["num_students"] = int(values["num_students"])
+        return Results(timestamp=self.timestamp, **values)
+
+    def to_frame(self):
+        """A DataFrame with one row per school and one column per field."""
+        import pandas as pd
+
+        columns = self._asdict()
+        columns["timestamp"] = np.full(self.size, self.timestamp)
+        return pd.DataFrame(columns, columns=RESULT_FIELDS)
+
+
+def calculate_results_batch(data=None, institution_names=None, timestamp=None, **columns):
+    """
+    Compute ResultsBatch for many schools in one vectorized pass.
+
+    Parameters:
+    -----------
+    data : pd.DataFrame or dict, optional
+        One row per school with the columns listed in INPUT_COLUMNS;
+        missing program cost columns count as zero and missing
+        STAFFING_COLUMNS take DEFAULT_STAFFING
+    institution_names : array-like of str, optional
+        One label per school; defaults to "School <n>"
+    timestamp : str, optional
+        Defaults to the current time
+    **columns : array-like or scalar
+        Individual input columns, as for calculate_batch
+
+    Returns:
+    --------
+    ResultsBatch
+    """
+    values = {}
+    for name in INPUT_COLUMNS + PROGRAM_COST_COLUMNS + STAFFING_COLUMNS:
+        if name in columns:
+            value = columns[name]
+        elif data is not None and name in data:
+            value = data[name]
+        elif name in PROGRAM_COST_COLUMNS:
+            value = 0
+        elif name in STAFFING_COLUMNS:
+            value = DEFAULT_STAFFING[name]
+        else:
+            raise KeyError(f"Missing input column: {name}")
+        values[name] = np.asarray(value, dtype=np.float64)
+    values.update(calculate_batch(values))
+    values["program_cost"] = calculate_program_cost(
+        values["num_students"], values["license_cost_per_student"], values["fixed_program_cost"]
+    )
+    values.update(_staff_time(values))
+
+    size = np.broadcast(*values.values()).size
+    for name, value in values.items():
+        values[name] = np.broadcast_to(value, (size,))
+    if institution_names is None:
+        institution_names = [f"School {row + 1}" for row in range(size)]
+    return ResultsBatch(
+        institution_name=np.asarray(institution_names, dtype=str),
+        timestamp=timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **values,
+    )
+
+
+def _staff_time(values):
+    return calculate_staff_time_batch(
+        values["num_students"], values["discipline_drop"], values["crisis_drop"],
+        values["teachers"], values["counselors"], values["school_weeks"],
+    )
+
+
+def build_results(inputs, institution_name="My School District", timestamp=None):
+    """
+    Build the Results the app stores and the report renders.
+    
+    Parameters:
+    -----------
+    inputs : dict
+        Every name in INPUT_COLUMNS, plus optional program cost and
+        staffing inputs
+    institution_name : str
+        Label shown on the report
+    timestamp : str, optional
+        Defaults to the current time
+    
+    Returns:
+    --------
+    Results
+        The inputs as given, plus current, projected and savings costs per
+        category and in total, the program cost and staff time saved
+    """
+    values = {name: inputs.get(name, 0) for name in INPUT_COLUMNS + PROGRAM_COST_COLUMNS}
+    values.update({name: inputs.get(name, DEFAULT_STAFFING[name]) for name in STAFFING_COLUMNS})
+    batch = calculate_batch(values)
+    derived = {name: float(batch[name]) for name in COST_COLUMNS}
+    derived["program_cost"] = float(calculate_program_cost(
+        values["num_students"], values["license_cost_per_student"], values["fixed_program_cost"]
+    ))
+    derived.update({name: float(value) for name, value in _staff_time(values).items()})
+    return Results(
+        institution_name=institution_name,
+        timestamp=timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **values,
+        **derived,
+    )
+
+def as_results(results):
+    """Return ``results`` as Results, rebuilding it from a results dictionary if needed."""
+    if isinstance(results, Results):
+        return results
+    return build_results(results, results.get("institution_name", "My School District"), results.get("timestamp"))
+
+def calculate_program_cost(num_students, license_cost_per_student=0, fixed_program_cost=0):
+    """
+    Annual cost of the program: a per-student license plus fixed staffing costs.
+    
+    Works on scalars or arrays (one value per school).
+    """
+    return (
+        np.asarray(num_students, dtype=np.float64) * np.asarray(license_cost_per_student, dtype=np.float64)
+        + np.asarray(fixed_program_cost, dtype=np.float64)
+    )
+
+def format_currency(value):
+    """Format a value as currency with commas and no decimal places."""
+    return f"${value:,.0f}"
+
+def calculate_current_costs(
+    num_students, 
+    discipline_rate, 
+    absenteeism_rate, 
+    crisis_rate,
+    discipline_cost, 
+    absenteeism_cost, 
+    crisis_cost
+):
+    """
+    Calculate the current costs associated with disciplinary issues,
+    chronic absenteeism, and crisis management needs.
+    
+    Parameters:
+    -----------
+    Same as calculate_savings function
+    
+    Returns:
+    --------
+    tuple
+        (discipline_current, absenteeism_current, crisis_current, total_current)
+    """
+    batch = calculate_batch(
+        num_students=num_students,
+        discipline_rate=discipline_rate,
+        absenteeism_rate=absenteeism_rate,
+        crisis_rate=crisis_rate,
+        discipline_drop=0,
+        absenteeism_drop=0,
+        crisis_drop=0,
+        discipline_cost=discipline_cost,
+        absenteeism_cost=absenteeism_cost,
+        crisis_cost=crisis_cost,
+    )
+    return _scalar_results(batch, "current")
+
+def calculate_projected_costs(
+    num_students, 
+    discipline_rate, 
+    absenteeism_rate, 
+    crisis_rate,
+    discipline_drop, 
+    absenteeism_drop, 
+    crisis_drop,
+    discipline_cost, 
+    absenteeism_cost, 
+    crisis_cost
+):
+    """
+    Calculate the projected costs after implementing improvements.
+    
+    Parameters:
+    -----------
+    Same as calculate_savings function
+    
+    Returns:
+    --------
+    tuple
+        (discipline_projected, absenteeism_projected, crisis_projected, total_projected)
+    """
+    batch = calculate_batch(
+        num_students=num_students,
+        discipline_rate=discipline_rate,
+        absenteeism_rate=absenteeism_rate,
+        crisis_rate=crisis_rate,
+        discipline_drop=discipline_drop,
+        absenteeism_drop=absenteeism_drop,
+        crisis_drop=crisis_drop,
+        discipline_cost=discipline_cost,
+        absenteeism_cost=absenteeism_cost,
+        crisis_cost=crisis_cost,
+    )
+    return _scalar_results(batch, "projected")
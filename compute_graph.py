@@ -0,0 +1,150 @@
+"""
+Dependency-tracked, incremental recomputation of calculator results.
+
+A ComputeGraph holds named input values and derived nodes, each computed by
+a function of other nodes. Setting the inputs only bumps the version of the
+values that actually changed; reading a node recomputes it only when one of
+its dependencies has a newer version than the one it was last computed
+from. A recomputed node whose value comes out unchanged keeps its version,
+so nothing downstream of it is recomputed either.
+"""
+from datetime import datetime
+
+from calculations import (
+    CATEGORIES, DEFAULT_STAFFING, INPUT_COLUMNS, PROGRAM_COST_COLUMNS, RESULT_FIELDS, STAFFING_COLUMNS, TIME_COLUMNS,
+    Results, calculate_program_cost, calculate_staff_time_batch
+)
+from instrumentation import span
+
+_MISSING = object()
+
+
+class ComputeGraph:
+    """Memoized node values, recomputed only when a dependency changes."""
+
+    def __init__(self):
+        self._nodes = {}
+        self._values = {}
+        self._versions = {}
+        self._computed_from = {}
+        self.recomputed = []
+
+    def add_node(self, name, func, deps, cutoff=True):
+        """
+        Register node ``name`` as ``func(*values of deps)``.
+
+        With ``cutoff``, a recomputed value equal to the previous one does
+        not invalidate downstream nodes. Disable it for values (like
+        figures) that do not compare cheaply.
+        """
+        for dep in deps:
+            if dep not in self._nodes and dep not in self._versions:
+                raise KeyError(f"Unknown dependency {dep!r} for node {name!r}")
+        self._nodes[name] = (func, tuple(deps), cutoff)
+
+    def set_inputs(self, **values):
+        """Set input values; returns the names whose value changed."""
+        changed = []
+        for name, value in values.items():
+            if name in self._nodes:
+                raise KeyError(f"{name!r} is a computed node, not an input")
+            if self._values.get(name, _MISSING) != value:
+                self._values[name] = value
+                self._versions[name] = self._versions.get(name, 0) + 1
+                changed.append(name)
+        self.recomputed = []
+        return changed
+
+    def get(self, name):
+        """Return the value of ``name``, recomputing it (and stale dependencies) if needed."""
+        if name not in self._nodes:
+            if name not in self._versions:
+                raise KeyError(f"Input {name!r} has not been set")
+            return self._values[name]
+
+        func, deps, cutoff = self._nodes[name]
+        args = [self.get(dep) for dep in deps]
+        stamp = tuple(self._versions[dep] for dep in deps)
+        if self._computed_from.get(name) == stamp:
+            return self._values[name]
+
+        with span(f"graph.{name}"):
+            value = func(*args)
+        self.recomputed.append(name)
+        previous = self._values.get(name, _MISSING)
+        if not (cutoff and previous is not _MISSING and previous == value):
+            self._values[name] = value
+            self._versions[name] = self._versions.get(name, 0) + 1
+        self._computed_from[name] = stamp
+        return self._values[name]
+
+
+def _category_nodes(graph, category):
+    num, rate, drop, cost = "num_students", f"{category}_rate", f"{category}_drop", f"{category}_cost"
+    # Same operation order as calculations.calculate_batch, so the values are
+    # bit-for-bit identical to calculate_savings
+    graph.add_node(f"{category}_current", lambda n, r, c: float(n) * r * c, (num, rate, cost))
+    graph.add_node(f"{category}_projected", lambda current, d: current * (1 - d), (f"{category}_current", drop))
+    graph.add_node(f"{category}_savings", lambda n, r, d, c: float(n) * r * d * c, (num, rate, drop, cost))
+
+
+def _results(institution_name, *values):
+    return Results(institution_name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), *values)
+
+
+def calculator_graph():
+    """
+    Build the graph behind the calculator page.
+
+    Inputs are INPUT_COLUMNS, PROGRAM_COST_COLUMNS, STAFFING_COLUMNS and
+    ``institution_name``.
+    Nodes:
+
+    - ``<category>_current``, ``<category>_projected``, ``<category>_savings``
+      and ``total_*``: each category depends only on its own rate, drop and
+      cost (plus the number of students)
+    - ``program_cost``: annual program cost
+    - ``staff_time`` and one node per name in TIME_COLUMNS: hours saved per
+      teacher and counselor, and across all of them, from the staffing model
+    - ``results``: the calculations.Results stored by the app and rendered in
+      reports, built from the nodes above; its timestamp only moves when an
+      input changes
+    - ``savings_chart``, ``comparison_chart`` and ``time_charts``: figures
+    """
+    from visualizations import create_comparison_chart, create_savings_chart, create_time_savings_charts
+
+    graph = ComputeGraph()
+    graph.set_inputs(institution_name="", **{name: 0 for name in INPUT_COLUMNS + PROGRAM_COST_COLUMNS},
+                     **DEFAULT_STAFFING)
+
+    for category in CATEGORIES:
+        _category_nodes(graph, category)
+    for kind in ("current", "projected", "savings"):
+        graph.add_node(f"total_{kind}", lambda d, a, c: d + a + c, [f"{category}_{kind}" for category in CATEGORIES])
+
+    graph.add_node("program_cost", lambda *values: float(calculate_program_cost(*values)),
+                   ("num_students",) + PROGRAM_COST_COLUMNS)
+    graph.add_node(
+        "staff_time",
+        lambda *values: {name: float(value) for name, value in calculate_staff_time_batch(*values).items()},
+        ("num_students", "discipline_drop", "crisis_drop") + STAFFING_COLUMNS,
+    )
+    for column in TIME_COLUMNS:
+        graph.add_node(column, lambda staff_time, column=column: staff_time[column], ("staff_time",))
+
+    graph.add_node("results", _results, RESULT_FIELDS[:1] + RESULT_FIELDS[2:], cutoff=False)
+
+    savings = [f"{category}_savings" for category in CATEGORIES]
+    graph.add_node("savings_chart", create_savings_chart, savings, cutoff=False)
+    graph.add_node("comparison_chart", create_comparison_chart, INPUT_COLUMNS, cutoff=False)
+    graph.add_node(
+        "time_charts",
+        # Weekly hours per person are shown to one decimal place, annual
+        # hours across all staff to the hour
+        lambda teacher, counselor, teacher_annual, counselor_annual: create_time_savings_charts(
+            round(teacher, 1), round(counselor, 1), round(teacher_annual), round(counselor_annual)
+        ),
+        ("teacher_hours_weekly", "counselor_hours_weekly", "teacher_hours_annual", "counselor_hours_annual"),
+        cutoff=False,
+    )
+    return graph
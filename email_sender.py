@@ -1,11 +1,128 @@
-import streamlit as st
-import json
+import smtplib
+import ssl
+import time
 from datetime import datetime
+from email.message import EmailMessage
 
-def send_contact_email(name, district, email):
+from outbox import PermanentError, submit
+
+DEFAULT_RECIPIENT = "kris@meetmaro.com"
+
+def email_config():
+    """
+    The ``[email]`` section of the Streamlit secrets, or None if email is not configured.
+
+    Expected keys: ``smtp_server`` and ``smtp_port``, plus optional
+    ``username`` and ``password`` (for servers that need a login),
+    ``sender`` (default: username, else recipient), ``recipient``
+    (default: Kris at Maro) and ``starttls`` (default: on for port 587).
+    Port 465 uses implicit TLS.
+    """
+    try:
+        import streamlit as st
+
+        config = st.secrets.get("email")
+    except Exception:  # No secrets file
+        return None
+    if not config or "smtp_server" not in config:
+        return None
+    return dict(config)
+
+def build_email(payload, sender):
+    """Build an EmailMessage from an ``email`` outbox payload."""
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = payload["to"]
+    message["Subject"] = payload["subject"]
+    if payload.get("reply_to"):
+        message["Reply-To"] = payload["reply_to"]
+    message.set_content(payload["body"])
+    for attachment in payload.get("attachments", []):
+        message.add_attachment(attachment["content"], subtype="html", filename=attachment["filename"])
+    return message
+
+class SMTPChannel:
     """
-    Handle contact form information to Kris at Maro
-    
+    Outbox channel handler that sends ``email`` messages over SMTP.
+
+    One connection is kept open and reused across messages and batches; it
+    is closed after ``idle_timeout`` seconds without use (before the server
+    drops it) and reopened on demand, including after a disconnect.
+    """
+
+    def __init__(self, config, idle_timeout=60.0, timeout=30.0):
+        self.server = config["smtp_server"]
+        self.port = int(config.get("smtp_port", 465))
+        self.username = config.get("username")
+        self.password = config.get("password")
+        self.sender = config.get("sender") or self.username or config.get("recipient", DEFAULT_RECIPIENT)
+        self.starttls = config.get("starttls", self.port == 587)
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._smtp = None
+        self._last_used = 0.0
+
+    def _connection(self):
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        if self._smtp is None:
+            if self.port == 465:
+                smtp = smtplib.SMTP_SSL(self.server, self.port, timeout=self.timeout,
+                                        context=ssl.create_default_context())
+            else:
+                smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+                if self.starttls:
+                    smtp.starttls(context=ssl.create_default_context())
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+            self._smtp = smtp
+        return self._smtp
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def __call__(self, payloads):
+        errors = []
+        for payload in payloads:
+            try:
+                message = build_email(payload, self.sender)
+            except (KeyError, TypeError, ValueError) as e:
+                # A malformed payload (missing field, header with a newline)
+                # fails the same way on every retry; the rest of the batch
+                # still goes out
+                errors.append(PermanentError(f"Invalid email payload: {e!r}"))
+                continue
+            try:
+                self._connection().send_message(message)
+                errors.append(None)
+            except smtplib.SMTPRecipientsRefused as e:
+                errors.append(PermanentError(f"Recipient refused: {e.recipients}"))
+            except smtplib.SMTPAuthenticationError as e:
+                # Usually a configuration problem; keep retrying until it is fixed
+                self.close()
+                errors.append(e)
+            except smtplib.SMTPResponseException as e:
+                if e.smtp_code >= 500:
+                    errors.append(PermanentError(f"SMTP {e.smtp_code}: {e.smtp_error!r}"))
+                else:
+                    errors.append(e)
+            except (smtplib.SMTPException, OSError) as e:
+                # Connection problems: drop the connection and reconnect for
+                # the next message
+                self._smtp = None
+                errors.append(e)
+            self._last_used = time.monotonic()
+        return errors
+
+def send_contact_email(name, district, email, report_html=None):
+    """
+    Queue contact form information for delivery to Kris at Maro
+
     Parameters:
     -----------
     name : str
@@ -14,40 +131,55 @@ def send_contact_email(name, district, email):
         School district name
     email : str
         Contact person's email address
-    
+    report_html : str, optional
+        Savings report to email back to the contact (only when email is
+        configured)
+
     Returns:
     --------
     bool
-        True if email was processed successfully, False otherwise
+        True if the request was queued successfully, False otherwise
     """
     try:
-        # For Streamlit Cloud deployment, we'll log and store contact info
         contact_info = {
             "name": name,
             "district": district,
             "email": email,
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        
-        # In a real deployment, you would use Streamlit Secrets to configure email
-        # https://docs.streamlit.io/streamlit-community-cloud/get-started/deploy-an-app/connect-to-data-sources/secrets-management
-        
-        # Option 1: Save to session state for demo purposes
-        if "contacts" not in st.session_state:
-            st.session_state.contacts = []
-        
-        st.session_state.contacts.append(contact_info)
-        
-        # Option 2: In a real deployment with email configured:
-        # if "email" in st.secrets:
-        #     # Send email using configured SMTP settings from secrets.toml
-        #     # recipient_email = "kris@meetmaro.com"
-        #     # Code for sending email would go here using st.secrets["email"]["username"], etc.
-        #     pass
-            
-        print(f"Contact request saved: {name} from {district}, Email: {email}")
+
+        # Stored in the durable outbox and delivered by its background
+        # worker, so the page does not wait on the network and the request
+        # survives an app restart
+        message_id = submit("contact", contact_info)
+
+        config = email_config()
+        if config is not None:
+            submit("email", {
+                "to": config.get("recipient", DEFAULT_RECIPIENT),
+                "subject": f"New calculator contact request from {district or name}",
+                "body": (
+                    f"Name: {name}\nSchool District: {district}\nEmail: {email}\n"
+                    f"Submitted: {contact_info['timestamp']}\n"
+                ),
+                "reply_to": email,
+            })
+            if report_html and email:
+                submit("email", {
+                    "to": email,
+                    "subject": "Your Mental Health Cost Savings Report",
+                    "body": (
+                        f"Hi {name or 'there'},\n\n"
+                        "Thank you for your interest. Your savings report is attached; "
+                        "Kris from the Maro team will reach out to you soon.\n"
+                    ),
+                    "reply_to": config.get("recipient", DEFAULT_RECIPIENT),
+                    "attachments": [{"filename": "savings_report.html", "content": report_html}],
+                })
+
+        print(f"Contact request queued (#{message_id}): {name} from {district}, Email: {email}")
         return True
-        
+
     except Exception as e:
         print(f"Error processing contact: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,262 @@
+"""
+Columnar Arrow/Parquet export of batch results.
+
+A roster is exported as three tables that join on ``school`` (the school's
+row number in the roster):
+
+- ``schools``: one row per school with every field of calculations.Results
+- ``categories``: one row per school and category with current costs,
+  projected costs and savings
+- ``projections``: one row per year, school and category from
+  projections.project_savings
+
+Every value keeps its numeric type (dollars, hours and FTEs as float64, years and
+row numbers as int64, the timestamp as an Arrow timestamp); nothing is
+formatted, so money columns load into a warehouse without parsing or
+rounding. Format with calculations.format_currency at display time.
+
+The per-school columns are the compute arrays themselves: Arrow wraps
+their memory without copying. The long tables need one reshaping copy each,
+and the repeated categories are dictionary-encoded against one fixed
+dictionary, so every chunk shares it.
+"""
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from calculations import (
+    CATEGORIES, COST_COLUMNS, DEFAULT_INPUTS, DEFAULT_STAFFING, INPUT_COLUMNS, PROGRAM_COST_COLUMNS, RESULT_FIELDS,
+    STAFFING_COLUMNS, calculate_results_batch
+)
+from instrumentation import span
+from roster import DEFAULT_CHUNKSIZE, institution_names, read_roster_chunks
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+_CATEGORY_DICTIONARY = pa.array(CATEGORIES)
+
+_KINDS = ("current", "projected", "savings")
+
+
+def _unit(name):
+    if name in COST_COLUMNS or "cost" in name:
+        return "USD"
+    if name.endswith("_hours_weekly"):
+        return "hours/week"
+    if name.endswith("_hours_annual"):
+        return "hours/year"
+    if name.endswith("_fte"):
+        return "FTE"
+    if name in ("teachers", "counselors") or name.endswith("_headcount"):
+        return "staff"
+    if name == "school_weeks":
+        return "weeks"
+    if name.endswith(("_rate", "_drop")):
+        return "fraction"
+    return None
+
+
+def _field(name, type_):
+    unit = _unit(name)
+    return pa.field(name, type_, metadata={"unit": unit} if unit else None)
+
+
+SCHOOLS_SCHEMA = pa.schema(
+    [pa.field("school", pa.int64()), pa.field("institution_name", pa.string()),
+     pa.field("timestamp", pa.timestamp("s"))]
+    + [_field(name, pa.float64()) for name in RESULT_FIELDS[2:]]
+)
+
+CATEGORIES_SCHEMA = pa.schema(
+    [pa.field("school", pa.int64()), pa.field("institution_name", pa.string()),
+     pa.field("category", pa.dictionary(pa.int32(), pa.string()))]
+    + [pa.field(kind, pa.float64(), metadata={"unit": "USD"}) for kind in _KINDS]
+)
+
+PROJECTIONS_SCHEMA = pa.schema(
+    [pa.field("year", pa.int64()), pa.field("school", pa.int64()),
+     pa.field("category", pa.dictionary(pa.int32(), pa.string()))]
+    + [pa.field(kind, pa.float64(), metadata={"unit": "USD"}) for kind in _KINDS + ("discounted_savings",)]
+)
+
+
+def _array(values):
+    # Zero-copy for contiguous float/int arrays; broadcast scalars (strides
+    # of 0) are materialized once
+    return pa.array(np.ascontiguousarray(values))
+
+
+def _rows(start_row, size):
+    return np.arange(start_row, start_row + size, dtype=np.int64)
+
+
+def schools_table(batch, start_row=0):
+    """
+    One row per school with every field of a ResultsBatch.
+
+    Parameters:
+    -----------
+    batch : calculations.ResultsBatch
+    start_row : int
+        Roster row number of the batch's first school (the ``school`` column)
+    """
+    size = batch.size
+    timestamp = np.datetime64(datetime.strptime(batch.timestamp, "%Y-%m-%d %H:%M:%S"), "s")
+    columns = [
+        pa.array(_rows(start_row, size)),
+        pa.array(batch.institution_name, type=pa.string()),
+        pa.array(np.full(size, timestamp)),
+    ] + [_array(getattr(batch, name)) for name in RESULT_FIELDS[2:]]
+    return pa.Table.from_arrays(columns, schema=SCHOOLS_SCHEMA)
+
+
+def categories_table(batch, start_row=0):
+    """One row per school and category: current, projected and savings."""
+    size = batch.size
+    categories = np.tile(np.arange(len(CATEGORIES), dtype=np.int32), size)
+    columns = [
+        pa.array(np.repeat(_rows(start_row, size), len(CATEGORIES))),
+        # Plain strings: a per-chunk dictionary would replace the previous
+        # one, which the Arrow IPC file format rejects
+        pa.array(np.repeat(np.asarray(batch.institution_name, dtype=object), len(CATEGORIES)), type=pa.string()),
+        pa.DictionaryArray.from_arrays(categories, _CATEGORY_DICTIONARY),
+    ]
+    for kind in _KINDS:
+        # (schools, categories) in row-major order
+        values = np.column_stack([getattr(batch, f"{category}_{kind}") for category in CATEGORIES])
+        columns.append(pa.array(values.ravel()))
+    return pa.Table.from_arrays(columns, schema=CATEGORIES_SCHEMA)
+
+
+def projections_table(projection, start_row=0):
+    """
+    One row per year, school and category from projections.project_savings.
+
+    The projection arrays are (years, schools, categories) and C-ordered, so
+    they are handed over without copying.
+    """
+    years, size, num_categories = projection["savings"].shape
+    discounted = projection["savings"] * projection["discount_factors"][:, None, None]
+    columns = [
+        pa.array(np.repeat(projection["years"].astype(np.int64), size * num_categories)),
+        pa.array(np.tile(np.repeat(_rows(start_row, size), num_categories), years)),
+        pa.DictionaryArray.from_arrays(
+            np.tile(np.arange(num_categories, dtype=np.int32), years * size), _CATEGORY_DICTIONARY
+        ),
+    ]
+    for values in (projection["current"], projection["projected"], projection["savings"], discounted):
+        columns.append(pa.array(np.ascontiguousarray(values).ravel()))
+    return pa.Table.from_arrays(columns, schema=PROJECTIONS_SCHEMA)
+
+
+class ResultsExporter:
+    """
+    Append batches of results to ``schools``, ``categories`` and (when
+    projections are given) ``projections`` files in a directory.
+
+    ``format`` is ``"parquet"`` or ``"arrow"`` (the Arrow IPC file format,
+    also readable as Feather v2).
+    """
+
+    def __init__(self, directory, format="parquet"):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown export format {format!r}; use one of {', '.join(FORMATS)}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.format = format
+        self._writers = {}
+
+    def path(self, table_name):
+        return self.directory / f"{table_name}{FORMATS[self.format]}"
+
+    def _write(self, table_name, table):
+        writer = self._writers.get(table_name)
+        if writer is None:
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+
+                writer = pq.ParquetWriter(self.path(table_name), table.schema)
+            else:
+                writer = pa.ipc.new_file(str(self.path(table_name)), table.schema)
+            self._writers[table_name] = writer
+        writer.write_table(table)
+
+    def write(self, batch, start_row=0, projection=None):
+        """Write one ResultsBatch, plus its project_savings output if given."""
+        self._write("schools", schools_table(batch, start_row))
+        self._write("categories", categories_table(batch, start_row))
+        if projection is not None:
+            self._write("projections", projections_table(projection, start_row))
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_roster(input_path, output_dir, chunksize=DEFAULT_CHUNKSIZE, format="parquet", years=5,
+                  defaults=DEFAULT_INPUTS, **projection_options):
+    """
+    Score a roster chunk by chunk and export the results as Arrow/Parquet tables.
+
+    Parameters:
+    -----------
+    input_path : str or Path
+        Roster file (.csv or .parquet), one row per school; missing input
+        columns are filled from ``defaults`` and missing program cost
+        columns count as zero
+    output_dir : str or Path
+        Directory for the ``schools``, ``categories`` and ``projections`` files
+    chunksize : int
+        Rows per chunk
+    format : str
+        ``"parquet"`` or ``"arrow"``
+    years : int
+        Years to project; 0 skips the projections table
+    **projection_options
+        Passed to projections.project_savings (``enrollment_growth``,
+        ``cost_inflation``, ``discount_rate``, ``ramp``)
+
+    Returns:
+    --------
+    dict
+        Number of schools exported, summed current, projected and savings
+        totals, and summed annual staff hours and FTEs saved
+    """
+    from projections import project_savings
+
+    summary = {"schools": 0, "total_current": 0.0, "total_projected": 0.0, "total_savings": 0.0,
+               "staff_hours_annual": 0.0, "staff_fte": 0.0}
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with ResultsExporter(output_dir, format) as exporter:
+        for chunk in read_roster_chunks(input_path, chunksize):
+            columns = {
+                name: chunk[name].to_numpy(dtype="float64") if name in chunk
+                else defaults.get(name, DEFAULT_STAFFING.get(name, 0))
+                for name in INPUT_COLUMNS + PROGRAM_COST_COLUMNS + STAFFING_COLUMNS
+            }
+            start_row = summary["schools"]
+            batch = calculate_results_batch(
+                columns, institution_names=institution_names(chunk, start_row), timestamp=timestamp
+            )
+            projection = None
+            if years:
+                projection = project_savings(
+                    {name: getattr(batch, name) for name in INPUT_COLUMNS}, years=years, **projection_options
+                )
+            with span("export_chunk"):
+                exporter.write(batch, start_row, projection)
+            summary["schools"] += batch.size
+            for key in ("total_current", "total_projected", "total_savings"):
+                summary[key] += float(getattr(batch, key).sum())
+            summary["staff_hours_annual"] += float((batch.teacher_hours_annual + batch.counselor_hours_annual).sum())
+            summary["staff_fte"] += float((batch.teacher_fte + batch.counselor_fte).sum())
+    return summary
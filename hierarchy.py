@@ -0,0 +1,287 @@
+"""
+Hierarchical roll-up of schools into districts, regions and states.
+
+An AggregationTree holds a root, one node per distinct state, region and
+district, and one leaf per school. Node data lives in flat NumPy arrays: a
+parent index, a CSR-style child index and a row of precomputed totals
+(AGGREGATE_FIELDS) per node. Reading any level, e.g. for a drill-down
+table, is a row lookup.
+
+Updating one school's inputs recomputes that school and then only its
+ancestors, each as the sum of its children's totals, so a change costs the
+fan-out along one path instead of re-aggregating the whole roster. Moving
+or removing a school refreshes its old (and new) ancestors the same way.
+Children are always summed in node id order, so incremental totals match
+a fresh build bit for bit.
+
+Rosters name the levels in ``state``, ``region`` and ``district`` columns.
+Levels whose column is missing are left out of the tree; blank values are
+grouped under "Unassigned".
+"""
+import numpy as np
+import pandas as pd
+
+from calculations import (
+    COST_COLUMNS, DEFAULT_INPUTS, DEFAULT_STAFFING, INPUT_COLUMNS, PROGRAM_COST_COLUMNS, STAFFING_COLUMNS, TIME_COLUMNS,
+    calculate_results_batch
+)
+from roster import institution_names
+
+LEVELS = ("state", "region", "district")
+
+# Additive totals kept for every node; weekly hours per staff member are
+# not additive, so only headcounts, annual staff hours and FTEs are summed
+AGGREGATE_FIELDS = (
+    ("schools", "num_students") + COST_COLUMNS + ("program_cost",)
+    + tuple(name for name in TIME_COLUMNS if not name.endswith("_hours_weekly"))
+)
+
+UNASSIGNED = "Unassigned"
+
+_INPUT_FIELDS = INPUT_COLUMNS + PROGRAM_COST_COLUMNS + STAFFING_COLUMNS
+
+
+def _school_totals(batch):
+    """(schools, AGGREGATE_FIELDS) totals for the schools of a ResultsBatch."""
+    totals = np.empty((batch.size, len(AGGREGATE_FIELDS)))
+    totals[:, 0] = 1.0
+    for index, name in enumerate(AGGREGATE_FIELDS[1:], start=1):
+        totals[:, index] = getattr(batch, name)
+    return totals
+
+
+class AggregationTree:
+    """
+    Precomputed state -> region -> district -> school totals with
+    incremental updates.
+
+    Build one with from_roster. Node 0 is the root; ``levels`` lists the
+    levels below it, and schools are the leaves.
+    """
+
+    def __init__(self, levels, names, parents, depths, school_start, inputs, totals, paths):
+        self.levels = tuple(levels)
+        self.names = names
+        self.parents = parents
+        self.depths = depths
+        self.school_start = school_start
+        self.inputs = inputs
+        self.totals = totals
+        self._paths = paths
+        self._index_children()
+
+    def _index_children(self):
+        # Children of node i are child_order[child_offsets[i]:child_offsets[i + 1]],
+        # in node id order (the order from_roster sums them in)
+        parents = self.parents
+        child_ids = np.arange(1, len(parents))
+        self.child_order = child_ids[np.argsort(parents[1:], kind="stable")]
+        self.child_offsets = np.zeros(len(parents) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(parents[1:], minlength=len(parents)), out=self.child_offsets[1:])
+
+    def _refresh(self, nodes):
+        # Recompute internal nodes, listed deepest first, from their children
+        for node in nodes:
+            self.totals[node] = self.totals[self.children(node)].sum(axis=0)
+
+    @classmethod
+    def from_roster(cls, roster, defaults=DEFAULT_INPUTS, levels=LEVELS):
+        """
+        Build the tree for a roster.
+
+        Parameters:
+        -----------
+        roster : pd.DataFrame
+            One row per school with the calculator inputs (missing input
+            columns are filled from ``defaults``, missing program cost
+            columns count as zero and missing staffing columns take
+            DEFAULT_STAFFING) and any of the ``levels`` columns
+        defaults : dict
+            Fallback values for absent input columns
+        levels : sequence of str
+            Level columns, outermost first
+        """
+        levels = [level for level in levels if level in roster]
+        columns = {
+            name: roster[name].to_numpy(dtype="float64") if name in roster
+            else defaults.get(name, DEFAULT_STAFFING.get(name, 0))
+            for name in _INPUT_FIELDS
+        }
+        batch = calculate_results_batch(columns, institution_names=institution_names(roster))
+        inputs = np.column_stack([np.broadcast_to(batch[name], (batch.size,)) for name in _INPUT_FIELDS])
+        keys = pd.DataFrame({
+            level: roster[level].astype("string").str.strip().replace("", pd.NA).fillna(UNASSIGNED).to_numpy()
+            for level in levels
+        })
+
+        names, parents, depths, paths = ["All"], [-1], [0], {(): 0}
+        parent_of_row = np.zeros(batch.size, dtype=np.int64)
+        for depth in range(1, len(levels) + 1):
+            codes = keys.groupby(levels[:depth], sort=True).ngroup().to_numpy()
+            _, first_rows = np.unique(codes, return_index=True)
+            base = len(names)
+            for offset, path in enumerate(zip(*(keys[level].to_numpy()[first_rows] for level in levels[:depth]))):
+                paths[path] = base + offset
+                names.append(path[-1])
+            parents.extend(parent_of_row[first_rows].tolist())
+            depths.extend([depth] * len(first_rows))
+            parent_of_row = base + codes
+
+        school_start = len(names)
+        names.extend(batch.institution_name.tolist())
+        parents.extend(parent_of_row.tolist())
+        depths.extend([len(levels) + 1] * batch.size)
+
+        parents = np.asarray(parents, dtype=np.int64)
+        depths = np.asarray(depths, dtype=np.int64)
+        totals = np.zeros((len(names), len(AGGREGATE_FIELDS)))
+        totals[school_start:] = _school_totals(batch)
+        # Sum each level into the one above, deepest first
+        for depth in range(len(levels) + 1, 0, -1):
+            nodes = np.flatnonzero(depths == depth)
+            np.add.at(totals, parents[nodes], totals[nodes])
+        return cls(levels, names, parents, depths, school_start, inputs, totals, paths)
+
+    @property
+    def num_schools(self):
+        return len(self.names) - self.school_start
+
+    def node(self, *path):
+        """Node id for a path of level names from the outermost level down; () is the root."""
+        try:
+            return self._paths[tuple(path)]
+        except KeyError:
+            raise KeyError(f"No node at {' / '.join(map(str, path)) or 'the root'}") from None
+
+    def school_node(self, school):
+        """Node id of a school, by its row number in the roster."""
+        if not 0 <= school < self.num_schools:
+            raise IndexError(f"School {school} out of range")
+        return self.school_start + school
+
+    def level(self, node):
+        """Level name of a node: "all", one of ``levels``, or "school"."""
+        depth = self.depths[node]
+        if depth == 0:
+            return "all"
+        return self.levels[depth - 1] if depth <= len(self.levels) else "school"
+
+    def children(self, node):
+        """Child node ids (empty for a school)."""
+        return self.child_order[self.child_offsets[node]:self.child_offsets[node + 1]]
+
+    def ancestors(self, node):
+        """Node ids from the parent of ``node`` up to the root."""
+        ancestors = []
+        node = self.parents[node]
+        while node >= 0:
+            ancestors.append(int(node))
+            node = self.parents[node]
+        return ancestors
+
+    def schools_under(self, node):
+        """Roster row numbers of the schools below (or at) a node."""
+        school_depth = len(self.levels) + 1
+        ancestors = np.arange(self.school_start, len(self.names))
+        for _ in range(school_depth - self.depths[node]):
+            ancestors = self.parents[ancestors]
+        return np.flatnonzero(ancestors == node)
+
+    def aggregate(self, node):
+        """Precomputed totals of a node, keyed by AGGREGATE_FIELDS."""
+        return dict(zip(AGGREGATE_FIELDS, self.totals[node].tolist()))
+
+    def children_frame(self, node):
+        """
+        Precomputed totals of a node's children, one row per child.
+
+        Returns:
+        --------
+        pd.DataFrame
+            ``node`` (id), ``name`` and AGGREGATE_FIELDS columns
+        """
+        children = self.children(node)
+        frame = pd.DataFrame(self.totals[children], columns=AGGREGATE_FIELDS)
+        frame.insert(0, "name", [self.names[child] for child in children])
+        frame.insert(0, "node", children)
+        return frame
+
+    def school_inputs(self, school):
+        """Current inputs of a school, by its row number in the roster."""
+        self.school_node(school)
+        return dict(zip(_INPUT_FIELDS, self.inputs[school].tolist()))
+
+    def update_school(self, school, **inputs):
+        """
+        Change some of a school's inputs and refresh the affected totals.
+
+        Only the school and its ancestors are recomputed; every other
+        node keeps its precomputed totals.
+
+        Returns:
+        --------
+        list of int
+            Ids of the recomputed nodes, the school first
+        """
+        node = self.school_node(school)
+        unknown = set(inputs) - set(_INPUT_FIELDS)
+        if unknown:
+            raise KeyError(f"Unknown inputs: {', '.join(sorted(unknown))}")
+        for name, value in inputs.items():
+            self.inputs[school, _INPUT_FIELDS.index(name)] = value
+
+        values = dict(zip(_INPUT_FIELDS, self.inputs[school:school + 1].T))
+        self.totals[node] = _school_totals(calculate_results_batch(values, institution_names=[self.names[node]]))[0]
+        ancestors = self.ancestors(node)
+        self._refresh(ancestors)
+        return [node] + ancestors
+
+    def move_school(self, school, *path):
+        """
+        Move a school under another existing node of the level above
+        schools, e.g. ``move_school(12, "CA", "West", "Oakland USD")``.
+
+        Only the old and new ancestors are recomputed. A node left without
+        schools keeps a row of zero totals.
+
+        Returns:
+        --------
+        list of int
+            Ids of the recomputed nodes
+        """
+        node = self.school_node(school)
+        parent = self.node(*path)
+        if self.depths[parent] != len(self.levels):
+            raise ValueError(f"Schools sit directly under a {self.levels[-1] if self.levels else 'root'}; "
+                             f"got a path to a {self.level(parent)}")
+        old_ancestors = self.ancestors(node)
+        self.parents[node] = parent
+        self._index_children()
+        new_ancestors = self.ancestors(node)
+        # The shared ancestors are refreshed again after the new branch
+        self._refresh(old_ancestors)
+        self._refresh(new_ancestors)
+        return sorted(set(old_ancestors) | set(new_ancestors))
+
+    def remove_school(self, school):
+        """
+        Remove a school and refresh its ancestors.
+
+        Schools after it move up one row, as if the roster row were dropped.
+        A node left without schools keeps a row of zero totals.
+
+        Returns:
+        --------
+        list of int
+            Ids of the recomputed nodes
+        """
+        node = self.school_node(school)
+        ancestors = self.ancestors(node)
+        del self.names[node]
+        self.parents = np.delete(self.parents, node)
+        self.depths = np.delete(self.depths, node)
+        self.inputs = np.delete(self.inputs, school, axis=0)
+        self.totals = np.delete(self.totals, node, axis=0)
+        self._index_children()
+        self._refresh(ancestors)
+        return ancestors
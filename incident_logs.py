@@ -0,0 +1,218 @@
+"""
+Derive per-school rate inputs from event-level SIS exports.
+
+Two kinds of logs are supported, as CSV or Parquet:
+
+- Incident log: one row per incident, with ``school_id``, ``student_id``
+  and ``category`` columns. Categories are matched case-insensitively
+  against ``discipline`` and ``crisis`` (or mapped with ``category_map``);
+  other categories are ignored.
+- Attendance log: one row per student per school day, with ``school_id``,
+  ``student_id`` and ``absent`` (1/0 or true/false) columns.
+
+Each log is streamed once, in chunks. Only per-student state is kept
+(which students had an incident of each category, and each student's
+enrolled and absent days), so memory grows with the number of students,
+not the number of rows.
+
+Rates follow the calculator's definitions: the share of enrolled students
+with at least one disciplinary (or crisis) incident, and the share who were
+chronically absent, i.e. missed at least ``chronic_threshold`` (default
+10%) of their enrolled days.
+"""
+import numpy as np
+import pandas as pd
+
+from roster import DEFAULT_CHUNKSIZE, read_roster_chunks
+
+INCIDENT_CATEGORIES = ("discipline", "crisis")
+
+DEFAULT_CHRONIC_THRESHOLD = 0.10
+
+# Rows of per-student state gathered before they are merged into one frame
+_COMPACT_ROWS = 1_000_000
+
+_TRUE_VALUES = ("1", "true", "t", "yes", "y", "absent", "a")
+
+
+class _Compactor:
+    """Collect per-chunk frames, periodically merging them with ``combine``."""
+
+    def __init__(self, combine):
+        self.combine = combine
+        self.parts = []
+        self.rows = 0
+        self.compacted_rows = 0
+
+    def add(self, frame):
+        self.parts.append(frame)
+        self.rows += len(frame)
+        # Merge once the pending rows outgrow the merged state, so the
+        # merging cost stays linear in the total number of rows
+        if self.rows > max(_COMPACT_ROWS, 2 * self.compacted_rows):
+            self.compact()
+
+    def compact(self):
+        if len(self.parts) > 1 or self.rows != self.compacted_rows:
+            self.parts = [self.combine(pd.concat(self.parts))]
+            self.rows = self.compacted_rows = len(self.parts[0])
+        return self.parts[0] if self.parts else None
+
+
+class RateAccumulator:
+    """
+    Single-pass, per-school aggregation of incident and attendance events.
+
+    Feed chunks with add_incidents/add_attendance in any order, then call
+    rates().
+    """
+
+    def __init__(self, chronic_threshold=DEFAULT_CHRONIC_THRESHOLD, category_map=None, school_column="school_id",
+                 student_column="student_id", category_column="category", absent_column="absent"):
+        self.chronic_threshold = chronic_threshold
+        self.category_map = {category: category for category in INCIDENT_CATEGORIES}
+        self.category_map.update({str(k).lower(): v for k, v in (category_map or {}).items()})
+        self.school_column = school_column
+        self.student_column = student_column
+        self.category_column = category_column
+        self.absent_column = absent_column
+        self._incidents = _Compactor(lambda frame: frame.drop_duplicates())
+        self._attendance = _Compactor(lambda frame: frame.groupby(level=[0, 1]).sum())
+        self.incident_rows = 0
+        self.attendance_rows = 0
+
+    def _ids(self, chunk):
+        return chunk[self.school_column].astype(str), chunk[self.student_column].astype(str)
+
+    def add_incidents(self, chunk):
+        schools, students = self._ids(chunk)
+        categories = chunk[self.category_column].astype(str).str.strip().str.lower().map(self.category_map)
+        frame = pd.DataFrame({"school": schools, "student": students, "category": categories})
+        self._incidents.add(frame.dropna(subset=["category"]).drop_duplicates())
+        self.incident_rows += len(chunk)
+
+    def add_attendance(self, chunk):
+        schools, students = self._ids(chunk)
+        absent = chunk[self.absent_column]
+        if absent.dtype == object or pd.api.types.is_string_dtype(absent):
+            absent = absent.astype(str).str.strip().str.lower().isin(_TRUE_VALUES)
+        frame = pd.DataFrame({
+            "school": schools,
+            "student": students,
+            "days": 1.0,
+            "absent": pd.to_numeric(absent, errors="coerce").fillna(0).astype("float64"),
+        })
+        self._attendance.add(frame.groupby(["school", "student"]).sum())
+        self.attendance_rows += len(chunk)
+
+    def rates(self, enrollment=None):
+        """
+        Per-school rate inputs.
+
+        Parameters:
+        -----------
+        enrollment : int, dict or pd.Series, optional
+            Students per school (a scalar applies to every school). Defaults
+            to the distinct students in the attendance log; required when
+            only an incident log was given.
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per school: ``school_id``, ``num_students``, the rate
+            columns for the logs that were given (``discipline_rate`` and
+            ``crisis_rate`` from incidents, ``absenteeism_rate`` from
+            attendance), and the student counts behind each rate. Schools
+            with no enrolled students (no attendance rows, or zero or
+            missing ``enrollment``) are left out and listed in
+            ``attrs["unmatched_schools"]``; a ValueError is raised if that
+            leaves no schools.
+        """
+        incidents = self._incidents.compact()
+        attendance = self._attendance.compact()
+        if incidents is None and attendance is None:
+            raise ValueError("No incident or attendance rows were ingested")
+
+        table = pd.DataFrame()
+        if attendance is not None:
+            share_absent = attendance["absent"] / attendance["days"]
+            table["enrolled_students"] = attendance.groupby(level="school").size()
+            table["chronically_absent_students"] = (
+                (share_absent >= self.chronic_threshold).groupby(level="school").sum()
+            )
+        if incidents is not None:
+            counts = incidents.groupby(["school", "category"]).size().unstack(fill_value=0)
+            counts = counts.reindex(columns=INCIDENT_CATEGORIES, fill_value=0)
+            table = table.join(counts.add_suffix("_students"), how="outer")
+        table = table.fillna(0)
+
+        if enrollment is None:
+            if attendance is None:
+                raise ValueError("Enrollment is required when no attendance log is given")
+            num_students = table["enrolled_students"]
+        elif np.isscalar(enrollment):
+            num_students = pd.Series(float(enrollment), index=table.index)
+        else:
+            num_students = pd.Series(enrollment, dtype="float64").rename(index=str).reindex(table.index)
+        num_students = num_students.astype("float64")
+
+        # Schools without enrolled students (e.g. only in the incident log,
+        # or missing from ``enrollment``) have no rate to report
+        enrolled = (num_students > 0).to_numpy()
+        unmatched = table.index[~enrolled].tolist()
+        if not enrolled.any():
+            raise ValueError(f"None of the {len(table):,} schools in the logs has enrolled students")
+        table = table[enrolled]
+        num_students = num_students[enrolled]
+
+        rates = pd.DataFrame({"school_id": table.index, "num_students": num_students.to_numpy()})
+
+        def rate(count_column):
+            return np.clip(table[count_column].to_numpy() / num_students.to_numpy(), 0.0, 1.0)
+
+        if incidents is not None:
+            rates["discipline_rate"] = rate("discipline_students")
+            rates["crisis_rate"] = rate("crisis_students")
+        if attendance is not None:
+            rates["absenteeism_rate"] = rate("chronically_absent_students")
+        for column in table.columns:
+            rates[column] = table[column].to_numpy().astype("int64")
+        rates.attrs["unmatched_schools"] = unmatched
+        return rates
+
+
+def ingest_logs(incidents=None, attendance=None, enrollment=None, chunksize=DEFAULT_CHUNKSIZE, memory_map=False,
+                **accumulator_options):
+    """
+    Stream incident and/or attendance logs and derive per-school rates.
+
+    Parameters:
+    -----------
+    incidents, attendance : str, Path or file-like, optional
+        CSV or Parquet logs (see the module docstring for the columns)
+    enrollment : int, dict or pd.Series, optional
+        Students per school; see RateAccumulator.rates
+    chunksize : int
+        Rows read per chunk
+    memory_map : bool
+        Memory-map the log files
+    **accumulator_options
+        Passed to RateAccumulator (``chronic_threshold``, ``category_map``
+        and column names)
+
+    Returns:
+    --------
+    pd.DataFrame
+        Output of RateAccumulator.rates; usable directly as a roster for
+        roster.score_roster
+    """
+    accumulator = RateAccumulator(**accumulator_options)
+    if incidents is not None:
+        columns = [accumulator.school_column, accumulator.student_column, accumulator.category_column]
+        for chunk in read_roster_chunks(incidents, chunksize, columns=columns, memory_map=memory_map):
+            accumulator.add_incidents(chunk)
+    if attendance is not None:
+        columns = [accumulator.school_column, accumulator.student_column, accumulator.absent_column]
+        for chunk in read_roster_chunks(attendance, chunksize, columns=columns, memory_map=memory_map):
+            accumulator.add_attendance(chunk)
+    return accumulator.rates(enrollment)
@@ -0,0 +1,188 @@
+"""
+Lightweight latency instrumentation for app reruns and batch jobs.
+
+Timing spans are off by default, and span() then returns a shared no-op
+context manager. Enable them with the CALCULATOR_METRICS environment
+variable, a comma-separated list of sinks:
+
+- ``log``: one structured JSON log line per span on the
+  ``calculator.metrics`` logger
+- ``http``: serve per-stage histograms in Prometheus text format on
+  ``http://127.0.0.1:$CALCULATOR_METRICS_PORT/metrics`` (default port 9464)
+
+Either sink also aggregates durations into per-stage histograms, available
+from snapshot().
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("calculator.metrics")
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+DEFAULT_PORT = 9464
+
+_NULL_SPAN = contextlib.nullcontext()
+
+_enabled = False
+_log_spans = False
+_server = None
+_lock = threading.Lock()
+_histograms = {}
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+        self.total += seconds
+        self.count += 1
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start, error=exc_type is not None)
+        return False
+
+
+def enabled():
+    return _enabled
+
+
+def span(name):
+    """Time a block of code as stage ``name``; a shared no-op when metrics are disabled."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def record(name, seconds, error=False):
+    """Record a duration for stage ``name`` (no-op when metrics are disabled)."""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = _Histogram()
+        histogram.observe(seconds)
+    if _log_spans:
+        logger.info(json.dumps({"event": "span", "stage": name, "ms": round(seconds * 1000, 3), "error": error}))
+
+
+def snapshot():
+    """
+    Per-stage histogram data.
+
+    Returns:
+    --------
+    dict
+        Maps stage name to ``count``, ``sum`` (seconds) and ``buckets``, a
+        list of (upper bound, cumulative count) pairs
+    """
+    with _lock:
+        data = {}
+        for name, histogram in _histograms.items():
+            cumulative, buckets = 0, []
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            data[name] = {"count": histogram.count, "sum": histogram.total, "buckets": buckets}
+        return data
+
+
+def render_prometheus():
+    """Render the histograms in the Prometheus text exposition format."""
+    lines = [
+        "# HELP calculator_stage_seconds Time spent in each stage of an app rerun or batch job.",
+        "# TYPE calculator_stage_seconds histogram",
+    ]
+    for name, data in sorted(snapshot().items()):
+        for bound, count in data["buckets"]:
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'calculator_stage_seconds_bucket{{stage="{name}",le="{le}"}} {count}')
+        lines.append(f'calculator_stage_seconds_sum{{stage="{name}"}} {data["sum"]:.6f}')
+        lines.append(f'calculator_stage_seconds_count{{stage="{name}"}} {data["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=DEFAULT_PORT, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread; later calls return the running server."""
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(json.dumps({"event": "metrics_server_started", "host": host, "port": _server.server_port}))
+        return _server
+
+
+def ensure_log_handler(log):
+    """Show INFO records from ``log`` on stderr when logging has not been configured otherwise."""
+    log.setLevel(logging.INFO)
+    if not logging.getLogger().handlers and not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+
+
+def configure(log=False, http=False, port=DEFAULT_PORT):
+    """Enable the given sinks. Metrics stay disabled if neither is requested."""
+    global _enabled, _log_spans
+    _log_spans = log
+    _enabled = log or http
+    if http:
+        start_metrics_server(port)
+
+
+def configure_from_env():
+    """Configure sinks from CALCULATOR_METRICS / CALCULATOR_METRICS_PORT; safe to call on every rerun."""
+    sinks = {sink.strip().lower() for sink in os.environ.get("CALCULATOR_METRICS", "").split(",") if sink.strip()}
+    if not sinks or _enabled:
+        return
+    if "log" in sinks:
+        ensure_log_handler(logger)
+    configure(
+        log="log" in sinks,
+        http="http" in sinks,
+        port=int(os.environ.get("CALCULATOR_METRICS_PORT", DEFAULT_PORT)),
+    )
@@ -1,255 +1,273 @@
-import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from utils import calculate_savings
-from visualizations import create_savings_chart, create_comparison_chart
-from report_generator import generate_report
-from email_sender import send_contact_email
-import base64
-from datetime import datetime
-
-# Page configuration
-st.set_page_config(
-    page_title="Proactive Mental Health Cost Savings Calculator for K-12 Schools",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
+"""
+Command-line entry point for scoring school rosters without Streamlit.
+
+Usage:
+    python main.py score roster.csv -o scored.parquet
+    python main.py export roster.csv -o export/ --years 5
+    python main.py optimize roster.csv --budget 250000 -o allocation.csv
+    python main.py report --num-students 1200 --offline -o report.html.gz
+    python main.py reports roster.csv -o reports.zip
+    python main.py rollup roster.csv -o district.html
+    python main.py rates --incidents incidents.csv --attendance attendance.parquet -o roster.csv
+    python main.py outbox --deliver
+"""
+import argparse
+import sys
+import time
+
+from calculations import (
+    DEFAULT_INPUTS, DEFAULT_STAFFING, INPUT_COLUMNS, PROGRAM_COST_COLUMNS, STAFFING_COLUMNS, build_results,
+    format_currency
 )
+from bulk_reports import DEFAULT_REPORT_CHUNKSIZE
+from instrumentation import configure_from_env
+from roster import DEFAULT_CHUNKSIZE, RosterWriter, read_roster_chunks, score_roster_file
+
+
+def cmd_score(args):
+    start = time.perf_counter()
+    summary = score_roster_file(args.input, args.output, chunksize=args.chunksize, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Scored {summary['schools']:,} schools in {elapsed:.2f}s -> {args.output}\n"
+        f"Total current costs: {format_currency(summary['total_current'])}\n"
+        f"Total projected costs: {format_currency(summary['total_projected'])}\n"
+        f"Total estimated savings: {format_currency(summary['total_savings'])}\n"
+        f"Staff time saved: {summary['staff_hours_annual']:,.0f} hours/year ({summary['staff_fte']:,.1f} FTE)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def cmd_export(args):
+    from export import export_roster
+
+    start = time.perf_counter()
+    summary = export_roster(
+        args.input, args.output, chunksize=args.chunksize, format=args.format, years=args.years,
+        enrollment_growth=args.enrollment_growth, cost_inflation=args.cost_inflation, discount_rate=args.discount_rate
+    )
+    print(
+        f"Exported {summary['schools']:,} schools in {time.perf_counter() - start:.2f}s -> {args.output}\n"
+        f"Total estimated savings: {format_currency(summary['total_savings'])}\n"
+        f"Staff time saved: {summary['staff_hours_annual']:,.0f} hours/year ({summary['staff_fte']:,.1f} FTE)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def cmd_optimize(args):
+    import pandas as pd
+    from optimizer import allocation_frame, optimize_budget
+    from roster import institution_names
 
-# App title and description
-st.title("Proactive Mental Health Cost Savings Calculator for K-12 Schools")
-st.markdown("""
-This calculator helps schools and districts estimate potential cost savings from implementing proactive mental health 
-screening, education, and resources to reduce disciplinary issues, chronic absenteeism, and crisis management needs. 
-Please note, the estimates provided are based on national assumptions and are intended to offer a general overview 
-rather than specific outcomes for your school, as precise predictions are not feasible.
-
-**Additional Resource:** Tools like Maro ([meetmaro.com](https://meetmaro.com)) can support your efforts by making 
-mental health screening, care navigation, access to community resources, and lesson planning easier and more 
-accessible in one platform.
-""")
-
-# Display hero image
-st.markdown("""
-<div style="text-align: center">
-    <svg width="100%" height="120px" viewBox="0 0 800 120">
-        <rect width="100%" height="100%" fill="#1565C0" />
-        <text x="50%" y="50%" font-family="Arial" font-size="24px" fill="white" text-anchor="middle" dominant-baseline="middle">
-            Proactive Mental Health Cost Savings Estimator
-        </text>
-        <text x="50%" y="75%" font-family="Arial" font-size="16px" fill="white" text-anchor="middle" dominant-baseline="middle">
-            Helping schools optimize resources through preventative mental health programs
-        </text>
-    </svg>
-</div>
-""", unsafe_allow_html=True)
-
-# Main content in a single column layout
-st.header("Cost Savings Calculator")
-
-# Institution Information
-st.subheader("Institution Information")
-col_inst1, col_inst2 = st.columns([1, 1])
-with col_inst1:
-    institution_name = st.text_input("Institution Name", "My School District")
-with col_inst2:
-    num_students = st.number_input("Number of Students", min_value=1, value=1000, step=100)
-
-# Create a visual separator
-st.markdown("---")
-
-# Current Statistics
-st.subheader("Current Statistics")
-st.markdown("*Enter your institution's current rates or use the default national averages*")
-
-col_a, col_b, col_c = st.columns(3)
-with col_a:
-    discipline_rate = st.number_input("Current Disciplinary Rate (%)", 
-                                  min_value=0.0, max_value=100.0, value=10.0, step=0.5, key="main_discipline_rate") / 100
-with col_b:
-    absenteeism_rate = st.number_input("Current Chronic Absenteeism Rate (%)", 
-                                   min_value=0.0, max_value=100.0, value=15.0, step=0.5, key="main_absenteeism_rate") / 100
-with col_c:
-    crisis_rate = st.number_input("Current Crisis Management Rate (%)", 
-                              min_value=0.0, max_value=100.0, value=5.0, step=0.5, key="main_crisis_rate") / 100
-
-# Cost Per Instance
-st.subheader("Cost Per Instance")
-st.markdown("*Enter your institution's cost per case or use the default estimates*")
-
-col_d, col_e, col_f = st.columns(3)
-with col_d:
-    discipline_cost = st.number_input("Cost Per Disciplinary Issue ($)", 
-                                  min_value=0, value=250, step=10, key="main_discipline_cost")
-with col_e:
-    absenteeism_cost = st.number_input("Cost Per Chronic Absenteeism Case ($)", 
-                                   min_value=0, value=1200, step=100, key="main_absenteeism_cost")
-with col_f:
-    crisis_cost = st.number_input("Cost Per Crisis Management Case ($)", 
-                              min_value=0, value=10000, step=1000, key="main_crisis_cost")
-
-# Estimated Improvements
-st.subheader("Estimated Improvements")
-st.markdown("*These values are preset to national averages when implementing proactive mental health resources. You can adjust them based on your expectations.*")
-
-col_g, col_h, col_i = st.columns(3)
-with col_g:
-    discipline_drop = st.slider("Drop in Disciplinary Issues (%)", 
-                             min_value=0, max_value=100, value=38, step=1, key="main_discipline_drop") / 100
-with col_h:
-    absenteeism_drop = st.slider("Drop in Chronic Absenteeism (%)", 
-                              min_value=0, max_value=100, value=20, step=1, key="main_absenteeism_drop") / 100
-with col_i:
-    crisis_drop = st.slider("Drop in Crisis Management (%)", 
-                         min_value=0, max_value=100, value=30, step=1, key="main_crisis_drop") / 100
-
-# Create a visual separator
-st.markdown("---")
-
-# Calculator section
-st.subheader("Calculate Your Potential Savings")
-
-# Calculate button
-calculate_button = st.button("Calculate Potential Savings", key="calculate_button") 
-if calculate_button:
-    # Perform calculations
-    discipline_savings, absenteeism_savings, crisis_savings, total_savings = calculate_savings(
-        num_students, discipline_rate, absenteeism_rate, crisis_rate,
-        discipline_drop, absenteeism_drop, crisis_drop,
-        discipline_cost, absenteeism_cost, crisis_cost
+    if args.budget <= 0:
+        print("--budget must be positive", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    roster = pd.concat(read_roster_chunks(args.input, args.chunksize), ignore_index=True)
+    inputs = {name: roster[name] if name in roster else DEFAULT_INPUTS[name] for name in INPUT_COLUMNS}
+    inputs.update({name: roster[name] for name in roster.columns if name.endswith("_spend_scale")})
+    allocation = optimize_budget(inputs, args.budget)
+    frame = allocation_frame(allocation, institution_names(roster))
+    with RosterWriter(args.output) as writer:
+        writer.write(frame)
+    print(
+        f"Allocated {format_currency(allocation['total_spend'])} across {frame['school'].nunique():,} of "
+        f"{len(roster):,} schools in {time.perf_counter() - start:.2f}s -> {args.output}\n"
+        f"Estimated savings: {format_currency(allocation['total_savings'])} "
+        f"(last dollar returns ${allocation['shadow_price']:,.2f})",
+        file=sys.stderr,
     )
-    
-    # Store results in session state
-    st.session_state.results = {
-        "discipline_savings": discipline_savings,
-        "absenteeism_savings": absenteeism_savings,
-        "crisis_savings": crisis_savings,
-        "total_savings": total_savings,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "institution_name": institution_name,
-        "num_students": num_students,
-        "discipline_rate": discipline_rate,
-        "absenteeism_rate": absenteeism_rate,
-        "crisis_rate": crisis_rate,
-        "discipline_drop": discipline_drop,
-        "absenteeism_drop": absenteeism_drop,
-        "crisis_drop": crisis_drop,
-        "discipline_cost": discipline_cost,
-        "absenteeism_cost": absenteeism_cost,
-        "crisis_cost": crisis_cost
-    }
-    
-    # Display results
-    st.subheader("Savings Summary")
-    
-    # Create metrics in rows
-    metric_col1, metric_col2, metric_col3 = st.columns(3)
-    metric_col1.metric("Disciplinary Savings", f"${discipline_savings:,.0f}")
-    metric_col2.metric("Absenteeism Savings", f"${absenteeism_savings:,.0f}")
-    metric_col3.metric("Crisis Management Savings", f"${crisis_savings:,.0f}")
-    
-    st.metric("Total Estimated Annual Savings", f"${total_savings:,.0f}")
-    
-    # Create and display charts
-    fig = create_savings_chart(discipline_savings, absenteeism_savings, crisis_savings)
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Show comparison chart
-    compare_fig = create_comparison_chart(
-        num_students, discipline_rate, absenteeism_rate, crisis_rate,
-        discipline_drop, absenteeism_drop, crisis_drop,
-        discipline_cost, absenteeism_cost, crisis_cost
+    return 0
+
+
+def cmd_report(args):
+    from report_generator import generate_report, write_report
+
+    inputs = {name: getattr(args, name) for name in INPUT_COLUMNS + PROGRAM_COST_COLUMNS + STAFFING_COLUMNS}
+    results = build_results(inputs, institution_name=args.institution_name)
+    html_content = generate_report(results, offline=args.offline)
+    size = write_report(html_content, args.output, compress=args.gzip or None)
+    print(f"Wrote {args.output} ({size:,} bytes)", file=sys.stderr)
+    return 0
+
+
+def cmd_reports(args):
+    from bulk_reports import generate_bulk_reports
+
+    start = time.perf_counter()
+
+    def progress(written, skipped):
+        print(f"\r{written:,} reports written, {skipped:,} already done", end="", file=sys.stderr, flush=True)
+
+    counts = generate_bulk_reports(
+        args.input, args.output, chunksize=args.chunksize, workers=args.workers,
+        offline=args.offline, progress=progress
+    )
+    print(
+        f"\nWrote {counts['written']:,} reports ({counts['skipped']:,} skipped) "
+        f"in {time.perf_counter() - start:.1f}s -> {args.output}",
+        file=sys.stderr,
     )
-    st.plotly_chart(compare_fig, use_container_width=True)
-    
-    # Generate report button
-    report_button = st.button("Generate Downloadable Report", key="report_button")
-    if report_button:
-        report_html = generate_report(st.session_state.results)
-        b64 = base64.b64encode(report_html.encode()).decode()
-        href = f'<a href="data:text/html;base64,{b64}" download="savings_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.html">Download Report</a>'
-        st.markdown(href, unsafe_allow_html=True)
-    
-# Contact Form Section
-st.markdown("---")
-st.subheader("Contact Us")
-st.markdown("""
-If your district is looking to take a more proactive approach to mental health, please fill out the contact form below. 
-Kris from the Maro team will reach out to schedule a time to discuss affordable resources tailored to your district's needs.
-""")
-
-contact_col1, contact_col2, contact_col3 = st.columns(3)
-with contact_col1:
-    name_input = st.text_input("Your Name", key="contact_name_input")
-with contact_col2:
-    district_input = st.text_input("School District", key="contact_district_input")
-with contact_col3:
-    email_input = st.text_input("Email Address", key="contact_email_input")
-
-contact_button = st.button("Request Information", key="contact_button")
-
-if contact_button:
-    if name_input and district_input and email_input:
-        email_sent = send_contact_email(name_input, district_input, email_input)
-        
-        if email_sent:
-            st.success(f"Thank you {name_input}! Kris from Maro will reach out to you soon!")
-        else:
-            st.warning("There was an issue sending your information. Please try again later or contact Maro directly.")
-    else:
-        st.warning("Please fill out all fields to submit your request.")
-
-# Information section
-st.header("About the Calculator")
-st.markdown("""
-### How It Works
-
-This calculator estimates potential cost savings based on implementing proactive mental health resources:
-
-1. **Disciplinary Issues**: Each disciplinary incident costs schools in staff time, 
-   administrative resources, and potential loss of instructional time. Proactive mental health
-   resources have been shown to reduce these incidents through early intervention.
-
-2. **Chronic Absenteeism**: Student absences impact funding, require intervention 
-   resources, and affect overall educational outcomes. Mental health support helps address
-   underlying factors contributing to attendance problems.
-
-3. **Crisis Management**: Behavioral crises require significant resources, 
-   specialized staff, and can disrupt the educational environment. Preventative approaches
-   can significantly reduce the frequency and severity of crises.
-
-### Calculation Methodology
-
-For each category, we calculate:
-```
-Savings = Number of Students × Current Rate × Expected Drop × Cost Per Incident
-```
-
-The calculator uses national averages for expected improvements based on research on
-proactive mental health programs in schools, but allows for customization based on 
-your specific context and expectations.
-
-### Using The Results
-
-The estimated savings can help:
-- Justify investments in proactive mental health programs
-- Allocate resources more effectively
-- Demonstrate potential return on investment (ROI)
-- Facilitate data-driven decision making about student wellbeing initiatives
-""")
-
-st.info("""
-**Note**: Actual savings may vary based on implementation quality, 
-consistency, and other contextual factors. This calculator provides 
-estimates to support decision-making but should be used alongside 
-other evaluation methods.
-""")
-
-# Footer
-st.markdown("---")
-st.markdown("""
-<div style="text-align: center">
-    Proactive Mental Health Cost Savings Calculator | Developed for School Administrators and District Leaders | Product of <a href="https://meetmaro.com" target="_blank">meetmaro.com</a>
-</div>
-""", unsafe_allow_html=True)
+    return 0
+
+
+def cmd_rollup(args):
+    from rollup_report import write_rollup_report
+
+    chunks = read_roster_chunks(args.input, args.chunksize)
+    size = write_rollup_report(chunks, args.output, title=args.title, top_n=args.top_n)
+    print(f"Wrote {args.output} ({size:,} bytes)", file=sys.stderr)
+    return 0
+
+
+def cmd_rates(args):
+    from incident_logs import ingest_logs
+
+    if args.incidents is None and args.attendance is None:
+        print("Give --incidents and/or --attendance", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    rates = ingest_logs(
+        args.incidents, args.attendance, enrollment=args.enrollment, chunksize=args.chunksize,
+        memory_map=args.memory_map, chronic_threshold=args.chronic_threshold
+    )
+    with RosterWriter(args.output) as writer:
+        writer.write(rates)
+    print(f"Derived rates for {len(rates):,} schools in {time.perf_counter() - start:.2f}s -> {args.output}",
+          file=sys.stderr)
+    unmatched = rates.attrs["unmatched_schools"]
+    if unmatched:
+        print(f"Skipped {len(unmatched):,} schools with no enrolled students: {', '.join(unmatched[:10])}"
+              + (", ..." if len(unmatched) > 10 else ""), file=sys.stderr)
+    return 0
+
+
+def cmd_outbox(args):
+    from outbox import OutboxWorker, default_channels, get_outbox
+
+    outbox = get_outbox()
+    if args.deliver:
+        delivered = OutboxWorker(outbox, default_channels()).run_once()
+        print(f"Delivered {delivered:,} messages", file=sys.stderr)
+    counts = outbox.counts()
+    if not counts:
+        print("Outbox is empty", file=sys.stderr)
+    for (channel, status), count in sorted(counts.items()):
+        print(f"{channel:12s} {status:10s} {count:8,d}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Proactive Mental Health Cost Savings Calculator (batch mode)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    score = subparsers.add_parser("score", help="Score a roster of schools")
+    score.add_argument("input", help="Roster file (.csv or .parquet), one row per school")
+    score.add_argument("-o", "--output", required=True, help="Output file (.csv or .parquet)")
+    score.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                       help="Rows per chunk (default: %(default)s)")
+    score.add_argument("--workers", type=int, default=None,
+                       help="Worker processes (default: CPU count, 1 = in-process)")
+    score.set_defaults(func=cmd_score)
+
+    export = subparsers.add_parser("export", help="Export per-school, per-category and per-year results as Parquet/Arrow")
+    export.add_argument("input", help="Roster file (.csv or .parquet), one row per school")
+    export.add_argument("-o", "--output", required=True,
+                        help="Output directory for the schools, categories and projections tables")
+    export.add_argument("--format", choices=("parquet", "arrow"), default="parquet",
+                        help="Parquet, or Arrow IPC/Feather (default: %(default)s)")
+    export.add_argument("--years", type=int, default=5, help="Years to project, 0 for none (default: %(default)s)")
+    export.add_argument("--enrollment-growth", type=float, default=0.0,
+                        help="Annual enrollment growth, as a decimal (default: %(default)s)")
+    export.add_argument("--cost-inflation", type=float, default=0.03,
+                        help="Annual cost inflation, as a decimal (default: %(default)s)")
+    export.add_argument("--discount-rate", type=float, default=0.03,
+                        help="Discount rate for discounted savings, as a decimal (default: %(default)s)")
+    export.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="Rows per chunk (default: %(default)s)")
+    export.set_defaults(func=cmd_export)
+
+    optimize = subparsers.add_parser("optimize", help="Split a program budget across schools and focus areas")
+    optimize.add_argument("input", help="Roster file (.csv or .parquet), one row per school")
+    optimize.add_argument("--budget", type=float, required=True, help="Total program budget ($)")
+    optimize.add_argument("-o", "--output", required=True,
+                          help="Output file (.csv or .parquet): one row per funded school and category")
+    optimize.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                          help="Rows per chunk (default: %(default)s)")
+    optimize.set_defaults(func=cmd_optimize)
+
+    report = subparsers.add_parser("report", help="Generate the HTML savings report for one institution")
+    report.add_argument("-o", "--output", required=True, help="Output file (.html, or .html.gz to compress)")
+    report.add_argument("--institution-name", default="My School District")
+    for name in INPUT_COLUMNS:
+        report.add_argument(f"--{name.replace('_', '-')}", dest=name, default=DEFAULT_INPUTS[name],
+                            type=int if name == "num_students" else float,
+                            help="(default: %(default)s)")
+    for name in PROGRAM_COST_COLUMNS:
+        report.add_argument(f"--{name.replace('_', '-')}", dest=name, type=float, default=0.0,
+                            help="(default: %(default)s)")
+    for name in STAFFING_COLUMNS:
+        estimated = "" if name == "school_weeks" else "; 0 estimates it from enrollment"
+        report.add_argument(f"--{name.replace('_', '-')}", dest=name, type=float, default=DEFAULT_STAFFING[name],
+                            help=f"(default: %(default)s{estimated})")
+    report.add_argument("--offline", action="store_true",
+                        help="Inline plotly.js so the report works without internet access")
+    report.add_argument("--gzip", action="store_true", help="Gzip-compress the output")
+    report.set_defaults(func=cmd_report)
+
+    reports = subparsers.add_parser("reports", help="Generate one HTML report per school in a roster")
+    reports.add_argument("input", help="Roster file (.csv or .parquet), one row per school")
+    reports.add_argument("-o", "--output", required=True,
+                         help="Output directory, or a .zip file; rerun the same command to resume")
+    reports.add_argument("--chunksize", type=int, default=DEFAULT_REPORT_CHUNKSIZE,
+                         help="Reports per worker batch (default: %(default)s)")
+    reports.add_argument("--workers", type=int, default=None,
+                         help="Worker processes (default: CPU count, 1 = in-process)")
+    reports.add_argument("--offline", action="store_true",
+                         help="Inline plotly.js in every report (much larger files)")
+    reports.set_defaults(func=cmd_reports)
+
+    rollup = subparsers.add_parser("rollup", help="Generate one district-level report for a whole roster")
+    rollup.add_argument("input", help="Roster file (.csv or .parquet), one row per school")
+    rollup.add_argument("-o", "--output", required=True, help="Output HTML file")
+    rollup.add_argument("--title", default="District Savings Rollup")
+    rollup.add_argument("--top-n", type=int, default=10, help="Schools in the top-savings chart (default: %(default)s)")
+    rollup.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="Rows per chunk (default: %(default)s)")
+    rollup.set_defaults(func=cmd_rollup)
+
+    rates = subparsers.add_parser("rates", help="Derive per-school rates from incident and attendance logs")
+    rates.add_argument("--incidents", help="Incident log (.csv or .parquet): school_id, student_id, category")
+    rates.add_argument("--attendance",
+                       help="Attendance log (.csv or .parquet): school_id, student_id, absent, one row per day")
+    rates.add_argument("-o", "--output", required=True,
+                       help="Output roster (.csv or .parquet), ready for the score, reports and rollup commands")
+    rates.add_argument("--enrollment", type=int, default=None,
+                       help="Students per school (default: distinct students in the attendance log)")
+    rates.add_argument("--chronic-threshold", type=float, default=0.10,
+                       help="Share of days missed that counts as chronic absence (default: %(default)s)")
+    rates.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                       help="Rows per chunk (default: %(default)s)")
+    rates.add_argument("--memory-map", action="store_true", help="Memory-map the log files")
+    rates.set_defaults(func=cmd_rates)
+
+    outbox = subparsers.add_parser("outbox", help="Show queued contact submissions and other outgoing messages")
+    outbox.add_argument("--deliver", action="store_true",
+                        help="Deliver every message that is due now before showing the counts")
+    outbox.set_defaults(func=cmd_outbox)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_from_env()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Allocate a fixed program budget across schools and focus areas.
+
+Each school and category has a concave cost curve: spending ``x`` dollars
+there achieves
+
+    drop(x) = entered drop * (1 - exp(-x / scale))
+
+of the category's cases, so savings approach the calculator's savings for
+that school and category (calculate_batch) with diminishing returns. The
+``scale`` is the spend that reaches 63% of the full effect; it defaults to
+SPEND_SCALE_PER_STUDENT dollars per student and can be set per school with
+``<category>_spend_scale`` roster columns.
+
+With concave curves the optimum is a water-filling solution: every funded
+school and category ends at the same marginal savings per dollar (the
+shadow price lambda), and nothing is spent where the first dollar earns
+less than that. Spend is a closed-form function of lambda, so lambda is
+found by bisection and each step is one vectorized pass over every school
+and category. A budget large enough to fund every school and category to
+its full effect (see SATURATION) is allocated that way directly, leaving
+the rest unspent.
+"""
+import numpy as np
+
+from calculations import CATEGORIES, calculate_batch
+
+# Spend per student, per category, that reaches 63% of the entered drop
+SPEND_SCALE_PER_STUDENT = {
+    "discipline": 20.0,
+    "absenteeism": 30.0,
+    "crisis": 25.0,
+}
+
+# Shortfall from the full effect at which a school and category count as
+# fully funded: beyond scale * ln(1 / SATURATION) dollars, more spend buys
+# less than this fraction of the entered drop
+SATURATION = 1e-6
+
+
+def spend_scales(inputs, defaults=SPEND_SCALE_PER_STUDENT):
+    """(schools, categories) curve scales from ``<category>_spend_scale`` columns or the per-student defaults."""
+    num_students = np.atleast_1d(np.asarray(inputs["num_students"], dtype=np.float64))
+    columns = []
+    for category in CATEGORIES:
+        name = f"{category}_spend_scale"
+        if name in inputs:
+            columns.append(np.broadcast_to(np.asarray(inputs[name], dtype=np.float64), num_students.shape))
+        else:
+            columns.append(num_students * defaults[category])
+    return np.column_stack(columns)
+
+
+def _spend(full_savings, scales, shadow_price):
+    # Spend where marginal savings per dollar, (full / scale) * exp(-x / scale),
+    # falls to the shadow price; zero where the first dollar earns less
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spend = scales * np.log(full_savings / (scales * shadow_price))
+    return np.where(np.isfinite(spend) & (spend > 0), spend, 0.0)
+
+
+def optimize_budget(inputs, budget, scales=None, tolerance=1e-9, max_iterations=200):
+    """
+    Split ``budget`` across schools and categories to maximize total savings.
+
+    Parameters:
+    -----------
+    inputs : dict or pd.DataFrame
+        Calculator inputs (see calculations.INPUT_COLUMNS), scalars for one
+        school or one value per school
+    budget : float
+        Total program dollars to allocate
+    scales : array-like, optional
+        (schools, categories) cost curve scales; defaults to spend_scales(inputs)
+    tolerance : float
+        Relative accuracy of the shadow price at which bisection stops
+    max_iterations : int
+        Limit on bisection steps
+
+    Returns:
+    --------
+    dict
+        (schools, categories) arrays ``spend``, ``drop`` (achieved),
+        ``savings`` and ``marginal_savings_per_dollar`` (at the allocation),
+        plus ``shadow_price`` (marginal savings per dollar of the last
+        dollar spent), ``total_spend`` and ``total_savings``. A budget
+        beyond full funding is not all spent: ``total_spend`` is then
+        less than ``budget``.
+    """
+    batch = calculate_batch(inputs)
+    full_savings = np.column_stack(
+        [np.atleast_1d(batch[f"{category}_savings"]) for category in CATEGORIES]
+    )
+    drops = np.column_stack(
+        [np.broadcast_to(np.asarray(inputs[f"{category}_drop"], dtype=np.float64), full_savings.shape[:1])
+         for category in CATEGORIES]
+    )
+    scales = spend_scales(inputs) if scales is None else np.asarray(scales, dtype=np.float64)
+    scales = np.broadcast_to(scales, full_savings.shape)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first_dollar = np.where(scales > 0, full_savings / scales, 0.0)
+    spend = np.zeros_like(full_savings)
+    shadow_price = float(first_dollar.max(initial=0.0))
+    funded = first_dollar > 0
+    saturated = np.where(funded, scales * -np.log(SATURATION), 0.0)
+    if budget > 0 and shadow_price > 0 and budget >= saturated.sum():
+        # Enough to fund everything to its full effect
+        spend = saturated
+        shadow_price = float((first_dollar[funded] * SATURATION).min())
+    elif budget > 0 and shadow_price > 0:
+        # Bisect on log(lambda): spend falls from unbounded to zero as
+        # lambda rises to the best first-dollar return. The budget is below
+        # full funding, so the bracket closes before lambda reaches the
+        # saturation point; stop anyway if exp(low) underflows
+        high = np.log(shadow_price)
+        low = high - 1.0
+        while np.exp(low) > 0 and _spend(full_savings, scales, np.exp(low)).sum() < budget:
+            low -= 2 * (high - low)
+        for _ in range(max_iterations):
+            middle = (low + high) / 2
+            if _spend(full_savings, scales, np.exp(middle)).sum() > budget:
+                low = middle
+            else:
+                high = middle
+            if high - low < tolerance:
+                break
+        # The upper end never overspends
+        shadow_price = float(np.exp(high))
+        spend = _spend(full_savings, scales, shadow_price)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        effect = np.where(scales > 0, -np.expm1(-spend / scales), 0.0)
+        marginal = np.where(scales > 0, first_dollar * np.exp(-spend / scales), 0.0)
+    savings = full_savings * effect
+    return {
+        "spend": spend,
+        "drop": drops * effect,
+        "savings": savings,
+        "marginal_savings_per_dollar": marginal,
+        "shadow_price": shadow_price,
+        "total_spend": float(spend.sum()),
+        "total_savings": float(savings.sum()),
+    }
+
+
+def allocation_frame(allocation, names=None):
+    """
+    The funded schools and categories of an allocation, largest spend first.
+
+    Returns:
+    --------
+    pd.DataFrame
+        ``school`` (row number), ``institution_name``, ``category``,
+        ``spend``, ``drop``, ``savings``, ``savings_per_dollar`` and
+        ``marginal_savings_per_dollar``
+    """
+    import pandas as pd
+
+    spend = allocation["spend"]
+    schools, categories = np.nonzero(spend > 0)
+    if names is None:
+        names = [f"School {row + 1}" for row in range(spend.shape[0])]
+    frame = pd.DataFrame({
+        "school": schools,
+        "institution_name": np.asarray(names, dtype=object)[schools],
+        "category": np.asarray(CATEGORIES)[categories],
+        "spend": spend[schools, categories],
+        "drop": allocation["drop"][schools, categories],
+        "savings": allocation["savings"][schools, categories],
+        "marginal_savings_per_dollar": allocation["marginal_savings_per_dollar"][schools, categories],
+    })
+    frame.insert(6, "savings_per_dollar", frame["savings"] / frame["spend"])
+    return frame.sort_values("spend", ascending=False, kind="stable", ignore_index=True)
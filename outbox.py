@@ -0,0 +1,328 @@
+"""
+Durable outbox for contact submissions and other outgoing messages.
+
+Messages are written to a local SQLite database and delivered by a
+background worker thread, so the page that submits them returns at once and
+nothing is lost if the app restarts before delivery. Each message belongs to
+a channel, and each channel has a handler that delivers a batch of messages:
+
+- ``contact``: POSTs contact form submissions to the form endpoint
+  (``$CALCULATOR_CONTACT_URL``, default getform) over a pooled HTTP session
+- ``email``: sends notification emails over one persistent SMTP connection
+  (email_sender.SMTPChannel); only enabled when ``[email]`` secrets exist
+
+Failed deliveries are retried with exponential backoff and jitter;
+permanent errors (or running out of attempts) mark the message failed.
+Delivery is at-least-once: a message claimed by a worker that dies is
+picked up again once its lease expires.
+
+The database path defaults to ``outbox.sqlite3`` and can be changed with
+``$CALCULATOR_OUTBOX_PATH``.
+"""
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("calculator.outbox")
+
+DEFAULT_PATH = "outbox.sqlite3"
+DEFAULT_CONTACT_URL = "https://getform.io/f/bpjndonb"
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    sent_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_due ON messages (status, next_attempt_at);
+"""
+
+
+class PermanentError(Exception):
+    """A delivery failure that retrying will not fix (e.g. a rejected request)."""
+
+
+class Outbox:
+    """SQLite-backed message queue; safe to share between threads and processes."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = str(path)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # A short-lived connection per call keeps the outbox usable from any
+        # thread; submissions are rare enough that this costs nothing
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return _Closing(conn)
+
+    def enqueue(self, channel, payload):
+        """Store a message for delivery; returns its id."""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO messages (channel, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (channel, json.dumps(payload), now, now),
+            )
+            return cursor.lastrowid
+
+    def claim(self, channel, limit=20, lease=300.0):
+        """
+        Claim up to ``limit`` due messages of a channel for delivery.
+
+        Claimed messages are leased for ``lease`` seconds; if they are not
+        marked sent, retried or failed by then, they become due again.
+
+        Returns:
+        --------
+        list of dict
+            ``id``, ``attempts`` and the decoded ``payload`` of each message
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, attempts, payload FROM messages "
+                "WHERE channel = ? AND status IN (?, ?) AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, id LIMIT ?",
+                (channel, PENDING, SENDING, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE messages SET status = ?, attempts = attempts + 1, next_attempt_at = ? WHERE id = ?",
+                [(SENDING, now + lease, row["id"]) for row in rows],
+            )
+            conn.execute("COMMIT")
+        return [
+            {"id": row["id"], "attempts": row["attempts"] + 1, "payload": json.loads(row["payload"])}
+            for row in rows
+        ]
+
+    def mark_sent(self, message_ids):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE messages SET status = ?, sent_at = ?, last_error = NULL WHERE id = ?",
+                [(SENT, now, message_id) for message_id in message_ids],
+            )
+
+    def mark_retry(self, message_id, error, delay):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE messages SET status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (PENDING, time.time() + delay, str(error), message_id),
+            )
+
+    def mark_failed(self, message_id, error):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE messages SET status = ?, last_error = ? WHERE id = ?",
+                (FAILED, str(error), message_id),
+            )
+
+    def counts(self):
+        """Number of messages per (channel, status)."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT channel, status, COUNT(*) FROM messages GROUP BY channel, status").fetchall()
+        return {(channel, status): count for channel, status, count in rows}
+
+    def next_due(self):
+        """Earliest time any undelivered message is due, or None if there are none."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(next_attempt_at) FROM messages WHERE status IN (?, ?)", (PENDING, SENDING)
+            ).fetchone()
+        return row[0]
+
+
+class _Closing:
+    """Context manager that closes (not just commits) a sqlite3 connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.close()
+        return False
+
+
+class FormPostChannel:
+    """
+    Deliver messages as form POSTs over one pooled, keep-alive HTTP session.
+
+    Responses with a 5xx, 408 or 429 status and connection errors are
+    retried; any other non-2xx status is a permanent failure.
+    """
+
+    def __init__(self, url, timeout=10.0, pool_size=4):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __call__(self, payloads):
+        import requests
+
+        errors = []
+        for payload in payloads:
+            try:
+                response = self.session.post(self.url, data=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                errors.append(e)
+                continue
+            if response.ok:
+                errors.append(None)
+            elif response.status_code >= 500 or response.status_code in (408, 429):
+                errors.append(RuntimeError(f"HTTP {response.status_code}"))
+            else:
+                errors.append(PermanentError(f"HTTP {response.status_code}"))
+        return errors
+
+
+class OutboxWorker:
+    """
+    Background thread that delivers outbox messages through channel handlers.
+
+    A handler is called with a list of message payloads and returns one
+    entry per payload: None when it was delivered, or the exception that
+    prevented delivery (PermanentError to stop retrying). A handler that
+    raises fails the whole batch with that error.
+    """
+
+    def __init__(self, outbox, channels, batch_size=20, poll_interval=30.0, max_attempts=8,
+                 base_delay=2.0, max_delay=600.0):
+        self.outbox = outbox
+        self.channels = dict(channels)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def backoff(self, attempts):
+        """Seconds to wait before retry number ``attempts``: exponential, capped, with jitter."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def run_once(self):
+        """Deliver every due message once, batch by batch; returns the number delivered."""
+        delivered = 0
+        for channel, handler in self.channels.items():
+            while True:
+                messages = self.outbox.claim(channel, self.batch_size)
+                if not messages:
+                    break
+                try:
+                    errors = handler([message["payload"] for message in messages])
+                except Exception as e:
+                    errors = [e] * len(messages)
+                sent = [message["id"] for message, error in zip(messages, errors) if error is None]
+                self.outbox.mark_sent(sent)
+                delivered += len(sent)
+                for message, error in zip(messages, errors):
+                    if error is None:
+                        continue
+                    if isinstance(error, PermanentError) or message["attempts"] >= self.max_attempts:
+                        self.outbox.mark_failed(message["id"], error)
+                        logger.warning(json.dumps({"event": "outbox_failed", "channel": channel,
+                                                   "id": message["id"], "error": str(error)}))
+                    else:
+                        self.outbox.mark_retry(message["id"], error, self.backoff(message["attempts"]))
+                if len(messages) < self.batch_size:
+                    break
+        return delivered
+
+    def notify(self):
+        """Wake the worker so a freshly enqueued message goes out without waiting for the next poll."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Outbox delivery pass failed")
+            next_due = self.outbox.next_due()
+            timeout = self.poll_interval if next_due is None else min(self.poll_interval, max(0.0, next_due - time.time()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_lock = threading.Lock()
+_outbox = None
+_worker = None
+
+
+def default_channels():
+    """Channel handlers for the app, configured from the environment and Streamlit secrets."""
+    from email_sender import SMTPChannel, email_config
+
+    channels = {"contact": FormPostChannel(os.environ.get("CALCULATOR_CONTACT_URL", DEFAULT_CONTACT_URL))}
+    config = email_config()
+    if config is not None:
+        channels["email"] = SMTPChannel(config)
+    return channels
+
+
+def get_outbox():
+    """The process-wide outbox at ``$CALCULATOR_OUTBOX_PATH``."""
+    global _outbox
+    with _lock:
+        if _outbox is None:
+            _outbox = Outbox(os.environ.get("CALCULATOR_OUTBOX_PATH", DEFAULT_PATH))
+        return _outbox
+
+
+def start_worker(channels=None):
+    """Start the process-wide delivery worker; later calls return the running worker."""
+    global _worker
+    outbox = get_outbox()
+    with _lock:
+        if _worker is None:
+            _worker = OutboxWorker(outbox, channels if channels is not None else default_channels()).start()
+        return _worker
+
+
+def submit(channel, payload):
+    """Enqueue a message and wake the worker, if one is running; returns the message id."""
+    message_id = get_outbox().enqueue(channel, payload)
+    if _worker is not None:
+        _worker.notify()
+    return message_id
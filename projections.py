@@ -0,0 +1,103 @@
+import numpy as np
+from calculations import CATEGORIES
+
+
+def ramp_curve(ramp, years):
+    """
+    Fraction of the full drop achieved in each program year.
+
+    Parameters:
+    -----------
+    ramp : float or sequence of float
+        Either the number of years to reach the full effect (linear ramp,
+        ``0`` or ``1`` meaning full effect from year one), or an explicit
+        curve of per-year fractions. A curve shorter than ``years`` holds its
+        last value.
+    years : int
+        Projection length
+
+    Returns:
+    --------
+    np.ndarray
+        Shape (years,) with values in [0, 1]
+    """
+    if np.ndim(ramp) == 0:
+        ramp_years = max(float(ramp), 1.0)
+        curve = np.minimum(np.arange(1, years + 1) / ramp_years, 1.0)
+    else:
+        curve = np.asarray(ramp, dtype=np.float64)[:years]
+        if curve.size < years:
+            curve = np.concatenate([curve, np.full(years - curve.size, curve[-1])])
+    return np.clip(curve, 0.0, 1.0)
+
+
+def _category_matrix(inputs, field):
+    columns = [np.asarray(inputs[f"{category}_{field}"], dtype=np.float64) for category in CATEGORIES]
+    return np.stack(np.broadcast_arrays(*columns), axis=-1)
+
+
+def project_savings(inputs, years=5, enrollment_growth=0.0, cost_inflation=0.0, discount_rate=0.0, ramp=1):
+    """
+    Project costs and savings over several years for one or many schools.
+
+    Every year, school and category is computed in one broadcasted array
+    operation with shape (years, schools, categories).
+
+    Parameters:
+    -----------
+    inputs : dict or pd.DataFrame
+        Calculator inputs (see calculations.INPUT_COLUMNS); scalars for one
+        school or one value per school
+    years : int
+        Number of program years to project
+    enrollment_growth : float or array-like
+        Annual enrollment growth rate (as a decimal), scalar or per school
+    cost_inflation : float
+        Annual growth in the cost per case (as a decimal)
+    discount_rate : float
+        Annual discount rate for NPV (as a decimal). Year 1 cash flows are
+        discounted by one full year (end-of-year convention).
+    ramp : float, sequence, or dict
+        Program ramp-up, see ramp_curve; a dict maps each category to its own
+        ramp
+
+    Returns:
+    --------
+    dict
+        ``years`` (1..N), ``current``, ``projected`` and ``savings`` arrays of
+        shape (years, schools, categories), ``discount_factors`` (years,),
+        ``npv_savings`` (schools, categories) and ``npv_total`` (schools,)
+    """
+    num_students = np.atleast_1d(np.asarray(inputs["num_students"], dtype=np.float64))
+    # (schools, categories), or (categories,) when the inputs are scalars
+    rates = _category_matrix(inputs, "rate")
+    drops = _category_matrix(inputs, "drop")
+    costs = _category_matrix(inputs, "cost")
+
+    if isinstance(ramp, dict):
+        ramps = np.stack([ramp_curve(ramp.get(c, 1), years) for c in CATEGORIES], axis=-1)
+    else:
+        ramps = np.repeat(ramp_curve(ramp, years)[:, None], len(CATEGORIES), axis=1)
+
+    year_index = np.arange(years, dtype=np.float64)
+    growth = np.atleast_1d(np.asarray(enrollment_growth, dtype=np.float64))
+    students = num_students * (1 + growth) ** year_index[:, None]           # (Y, S)
+    inflation = (1 + cost_inflation) ** year_index                          # (Y,)
+    discount_factors = (1 + discount_rate) ** -(year_index + 1)             # (Y,)
+
+    current = students[:, :, None] * rates * (costs * inflation[:, None, None])  # (Y, S, C)
+    effective_drops = drops * ramps[:, None, :]
+    savings = current * effective_drops
+    projected = current - savings
+
+    npv_savings = np.tensordot(discount_factors, savings, axes=1)           # (S, C)
+
+    return {
+        "years": np.arange(1, years + 1),
+        "current": current,
+        "projected": projected,
+        "savings": savings,
+        "discount_factors": discount_factors,
+        "npv_savings": npv_savings,
+        "npv_total": npv_savings.sum(axis=-1),
+    }
@@ -1,37 +1,116 @@
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import functools
+import gzip
 from datetime import datetime
-from utils import format_currency, create_summary_dataframe, calculate_time_saved
-from visualizations import create_savings_chart, create_roi_chart, create_time_savings_charts
+from pathlib import Path
+from calculations import as_results, format_currency
+from visualizations import (
+    create_savings_chart, create_roi_chart, create_time_savings_charts, figure_compact_json, figure_html
+)
 
-def generate_report(results):
-    summary_df = create_summary_dataframe(results)
+CDN_PLOTLY_SCRIPT = '<script src="https://cdn.plot.ly/plotly-latest.min.js"></script>'
+
+@functools.lru_cache(maxsize=1)
+def _inline_plotly_script():
+    # The plotly.js bundled with the installed plotly package, so the
+    # report's JS always matches the figure JSON it renders
+    from plotly.offline import get_plotlyjs
+
+    return f'<script type="text/javascript">{get_plotlyjs()}</script>'
+
+def _offline_charts(figures):
+    """
+    Chart placeholders plus one script that renders every figure.
+
+    Figures are embedded as compact JSON and layout templates shared between
+    figures are written once.
+    """
+    templates = []
+    specs = []
+    for fig in figures:
+        body, template = figure_compact_json(fig)
+        if template not in templates:
+            templates.append(template)
+        specs.append(f"[{body},{templates.index(template)}]")
+
+    placeholders = [f'<div id="report-chart-{i}" class="plotly-chart"></div>' for i in range(len(figures))]
+    script = f"""<script type="text/javascript">
+    (function () {{
+        var templates = [{",".join(templates)}];
+        var charts = [{",".join(specs)}];
+        charts.forEach(function (chart, i) {{
+            var layout = chart[0].layout || {{}};
+            layout.template = templates[chart[1]];
+            Plotly.newPlot("report-chart-" + i, chart[0].data, layout, {{responsive: true}});
+        }});
+    }})();
+    </script>"""
+    return placeholders, script
+
+def write_report(html_content, path, compress=None):
+    """
+    Write a report to ``path``, gzip-compressed if ``compress`` is true
+    (by default, when the path ends in ``.gz``).
+
+    Returns:
+    --------
+    int
+        Size of the written file in bytes
+    """
+    path = Path(path)
+    if compress is None:
+        compress = path.suffix == ".gz"
+    data = html_content.encode("utf-8")
+    if compress:
+        data = gzip.compress(data, compresslevel=9)
+    path.write_bytes(data)
+    return len(data)
+
+def generate_report(results, offline=False):
+    """
+    Build the HTML savings report for a Results (or a results dictionary).
+
+    With ``offline=True`` the report inlines plotly.js and compact figure
+    JSON instead of loading plotly.js from a CDN, so it also works without
+    internet access.
+    """
+    results = as_results(results)
 
     # Create savings and ROI charts
     savings_chart = create_savings_chart(
-        results["discipline_savings"],
-        results["absenteeism_savings"],
-        results["crisis_savings"]
+        results.discipline_savings,
+        results.absenteeism_savings,
+        results.crisis_savings
     )
     roi_chart = create_roi_chart(results)
 
-    # Time savings
-    num_students = results["num_students"]
-    discipline_drop = results["discipline_drop"]
-    crisis_drop = results["crisis_drop"]
-    absenteeism_drop = results["absenteeism_drop"]
-
-    time_savings = calculate_time_saved(num_students, discipline_drop, crisis_drop)
-    teacher_time_saved_weekly = time_savings["teacher"]
-    counselor_time_saved_weekly = time_savings["counselor"]
-
-    # Create time savings charts
+    # Create time savings charts (weekly hours per person shown to one
+    # decimal place, annual hours across all staff to the hour)
+    teacher_time_saved_weekly = results.teacher_hours_weekly
+    counselor_time_saved_weekly = results.counselor_hours_weekly
     weekly_chart_fig, annual_chart_fig = create_time_savings_charts(
-        teacher_time_saved_weekly, counselor_time_saved_weekly
+        round(teacher_time_saved_weekly, 1), round(counselor_time_saved_weekly, 1),
+        round(results.teacher_hours_annual), round(results.counselor_hours_annual)
     )
-    weekly_chart = weekly_chart_fig.to_html(full_html=False, include_plotlyjs=False)
-    annual_chart = annual_chart_fig.to_html(full_html=False, include_plotlyjs=False)
+    figures = [savings_chart, roi_chart, weekly_chart_fig, annual_chart_fig]
+    if offline:
+        plotly_script = _inline_plotly_script()
+        charts, charts_script = _offline_charts(figures)
+    else:
+        plotly_script = CDN_PLOTLY_SCRIPT
+        charts = [figure_html(fig) for fig in figures]
+        charts_script = ""
+    savings_chart_html, roi_chart_html, weekly_chart, annual_chart = charts
+
+    # Program cost and ROI, when a program cost was entered
+    program_cost = results.program_cost
+    roi_summary = ""
+    if program_cost > 0:
+        net_savings = results.total_savings - program_cost
+        roi_summary = f"""
+            <p>
+                With an annual program cost of <strong>{format_currency(program_cost)}</strong>, net savings are
+                <strong>{format_currency(net_savings)}</strong> (ROI <strong>{net_savings / program_cost:.0%}</strong>).
+            </p>"""
 
     # Build HTML
     html_content = f"""
@@ -40,12 +119,13 @@ def generate_report(results):
     <head>
         <meta charset="UTF-8">
         <title>Proactive Mental Health Cost Savings Report - {results["institution_name"]}</title>
-        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+        {plotly_script}
         <style>
             body {{ font-family: Arial, sans-serif; padding: 20px; max-width: 900px; margin: auto; }}
             h1, h2, h3 {{ color: #1565C0; }}
             .summary-box {{ background-color: #f5f5f5; border-left: 5px solid #1565C0; padding: 15px; margin-bottom: 20px; }}
             .chart-container {{ height: 340px; margin-bottom: 25px; }}
+            .plotly-chart {{ height: 100%; width: 100%; }}
             .footer {{ font-size: 0.8em; text-align: center; color: #666; margin-top: 40px; border-top: 1px solid #ccc; padding-top: 10px; }}
         </style>
     </head>
@@ -61,12 +141,12 @@ def generate_report(results):
             <p>
                 Based on a student population of <strong>{results["num_students"]:,}</strong>, 
                 your estimated annual cost savings is <strong>{format_currency(results["total_savings"])}</strong>.
-            </p>
+            </p>{roi_summary}
         </div>
 
         <h3>Cost Savings Breakdown</h3>
-        <div class="chart-container">{savings_chart.to_html(full_html=False, include_plotlyjs=False)}</div>
-        <div class="chart-container">{roi_chart.to_html(full_html=False, include_plotlyjs=False)}</div>
+        <div class="chart-container">{savings_chart_html}</div>
+        <div class="chart-container">{roi_chart_html}</div>
 
         <h3>Team Time Savings</h3>
         <div class="summary-box">
@@ -74,6 +154,11 @@ def generate_report(results):
                 <strong>Teachers:</strong> Estimated <strong>{teacher_time_saved_weekly:.1f} hours per week</strong><br>
                 <strong>Counselors:</strong> Estimated <strong>{counselor_time_saved_weekly:.1f} hours per week</strong>
             </p>
+            <p>
+                Across {results.teacher_headcount:,.1f} teachers and {results.counselor_headcount:,.1f} counselors over
+                a {results.school_weeks:,.0f}-week school year, that is <strong>{results.teacher_hours_annual + results.counselor_hours_annual:,.0f}
+                staff hours</strong>, or <strong>{results.teacher_fte + results.counselor_fte:,.1f} full-time equivalents</strong>.
+            </p>
             <p>These time savings can be redirected toward proactive student support and improving school climate.</p>
         </div>
 
@@ -86,6 +171,7 @@ def generate_report(results):
         <div class="footer">
             <p>Powered by the Proactive Mental Health Cost Savings Calculator • meetmaro.com</p>
         </div>
+        {charts_script}
     </body>
     </html>
     """
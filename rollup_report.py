@@ -0,0 +1,236 @@
+import html
+import json
+from datetime import datetime
+
+import numpy as np
+from calculations import CATEGORIES, STAFF_ROLES, format_currency
+from report_generator import CDN_PLOTLY_SCRIPT
+from roster import institution_names, score_roster
+from visualizations import create_savings_chart, create_top_schools_chart, figure_html
+
+# Columns of each table row sent to the browser
+TABLE_COLUMNS = ("School", "Students") + tuple(
+    f"{label} Savings" for label in ("Disciplinary", "Absenteeism", "Crisis")
+) + ("Total Savings",)
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def _script_json(obj):
+    # "</" is escaped so the JSON can be inlined in a <script> element
+    return json.dumps(obj, separators=(",", ":")).replace("</", "<\\/")
+
+
+def _page_head(title):
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{html.escape(title)}</title>
+    {CDN_PLOTLY_SCRIPT}
+    <style>
+        body {{ font-family: Arial, sans-serif; padding: 20px; max-width: 1100px; margin: auto; }}
+        main {{ display: flex; flex-direction: column; }}
+        #summary {{ order: -1; }}
+        h1, h2, h3 {{ color: #1565C0; }}
+        .summary-box {{ background-color: #f5f5f5; border-left: 5px solid #1565C0; padding: 15px; margin-bottom: 20px; }}
+        .chart-container {{ margin-bottom: 25px; }}
+        table {{ border-collapse: collapse; width: 100%; font-size: 0.9em; }}
+        th, td {{ border-bottom: 1px solid #ddd; padding: 6px 8px; text-align: right; }}
+        th:first-child, td:first-child {{ text-align: left; }}
+        th {{ background-color: #1565C0; color: white; cursor: pointer; user-select: none; }}
+        .table-controls {{ display: flex; gap: 12px; align-items: center; margin: 10px 0; }}
+        .footer {{ font-size: 0.8em; text-align: center; color: #666; margin-top: 40px; border-top: 1px solid #ccc; padding-top: 10px; }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>{html.escape(title)}</h1>
+        <p><em>Generated on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</em></p>
+    </div>
+<main>
+    <section id="schools">
+        <h3>School Detail</h3>
+        <div class="table-controls">
+            <input id="table-filter" type="search" placeholder="Filter schools...">
+            <button id="table-prev">&laquo; Prev</button>
+            <span id="table-status"></span>
+            <button id="table-next">Next &raquo;</button>
+        </div>
+        <table>
+            <thead><tr>{"".join(f'<th data-column="{i}">{html.escape(name)}</th>' for i, name in enumerate(TABLE_COLUMNS))}</tr></thead>
+            <tbody id="table-body"></tbody>
+        </table>
+    </section>
+<script>var rows = [];</script>
+"""
+
+
+def _rows_script(names, scored):
+    columns = [scored["num_students"].to_numpy()]
+    columns += [scored[f"{category}_savings"].to_numpy() for category in CATEGORIES]
+    columns.append(scored["total_savings"].to_numpy())
+    values = np.round(np.column_stack(columns)).astype(np.int64).tolist()
+    rows = [[name] + row for name, row in zip(names, values)]
+    return f"<script>rows.push.apply(rows, {_script_json(rows)});</script>\n"
+
+
+def _table_script(page_size):
+    # Renders one page of rows at a time, so the browser only ever builds a
+    # few dozen table rows however many schools the report holds
+    return f"""<script>
+(function () {{
+    var pageSize = {page_size}, page = 0, sortColumn = 5, sortDescending = true, filtered = rows;
+    var money = new Intl.NumberFormat("en-US", {{style: "currency", currency: "USD", maximumFractionDigits: 0}});
+    var count = new Intl.NumberFormat("en-US");
+    var body = document.getElementById("table-body");
+    var status = document.getElementById("table-status");
+
+    function applySort() {{
+        filtered.sort(function (a, b) {{
+            var x = a[sortColumn], y = b[sortColumn];
+            var order = x < y ? -1 : x > y ? 1 : 0;
+            return sortDescending ? -order : order;
+        }});
+    }}
+
+    function render() {{
+        var pages = Math.max(1, Math.ceil(filtered.length / pageSize));
+        page = Math.min(Math.max(page, 0), pages - 1);
+        var html = [];
+        filtered.slice(page * pageSize, (page + 1) * pageSize).forEach(function (row) {{
+            var name = document.createElement("span");
+            name.textContent = row[0];
+            html.push("<tr><td>" + name.innerHTML + "</td><td>" + count.format(row[1]) + "</td>" +
+                row.slice(2).map(function (v) {{ return "<td>" + money.format(v) + "</td>"; }}).join("") + "</tr>");
+        }});
+        body.innerHTML = html.join("");
+        status.textContent = "Page " + (page + 1) + " of " + pages + " (" + count.format(filtered.length) + " schools)";
+    }}
+
+    document.getElementById("table-prev").onclick = function () {{ page--; render(); }};
+    document.getElementById("table-next").onclick = function () {{ page++; render(); }};
+    document.getElementById("table-filter").oninput = function (event) {{
+        var needle = event.target.value.toLowerCase();
+        filtered = needle ? rows.filter(function (row) {{ return row[0].toLowerCase().indexOf(needle) >= 0; }}) : rows.slice();
+        applySort(); page = 0; render();
+    }};
+    document.querySelectorAll("th[data-column]").forEach(function (th) {{
+        th.onclick = function () {{
+            var column = Number(th.getAttribute("data-column"));
+            sortDescending = column === sortColumn ? !sortDescending : column !== 0;
+            sortColumn = column;
+            applySort(); page = 0; render();
+        }};
+    }});
+
+    filtered = rows.slice();
+    applySort();
+    render();
+}})();
+</script>
+"""
+
+
+def _summary_section(totals, top_names, top_savings):
+    savings_chart = create_savings_chart(
+        totals["discipline_savings"], totals["absenteeism_savings"], totals["crisis_savings"]
+    )
+    top_chart = create_top_schools_chart(top_names, top_savings, title=f"Top {len(top_names)} Schools by Estimated Savings")
+    return f"""
+    <section id="summary">
+        <div class="summary-box">
+            <h3>District Summary</h3>
+            <p>
+                Across <strong>{totals["schools"]:,}</strong> schools and
+                <strong>{totals["num_students"]:,.0f}</strong> students, current costs of
+                <strong>{format_currency(totals["total_current"])}</strong> are projected to fall to
+                <strong>{format_currency(totals["total_projected"])}</strong>, an estimated annual saving of
+                <strong>{format_currency(totals["total_savings"])}</strong>.
+            </p>
+            <p>
+                Teachers and counselors would save an estimated
+                <strong>{totals["teacher_hours_annual"] + totals["counselor_hours_annual"]:,.0f} hours</strong> a
+                school year, or <strong>{totals["teacher_fte"] + totals["counselor_fte"]:,.1f} full-time
+                equivalents</strong>.
+            </p>
+        </div>
+        <div class="chart-container">{figure_html(savings_chart)}</div>
+        <div class="chart-container">{figure_html(top_chart)}</div>
+    </section>
+"""
+
+
+def iter_rollup_report(chunks, title="District Savings Rollup", top_n=10, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Stream a multi-school rollup report as HTML text chunks.
+
+    Each roster chunk is scored and emitted as table rows right away; only
+    running totals and the current top ``top_n`` schools are kept, so memory
+    stays flat however many schools the roster holds. The summary and charts
+    are written last and moved to the top of the page with CSS. The school
+    table is paginated client-side.
+
+    Parameters:
+    -----------
+    chunks : iterable of pd.DataFrame
+        Roster chunks, e.g. from roster.read_roster_chunks
+    title : str
+        Report title
+    top_n : int
+        Number of schools in the top-savings chart
+    page_size : int
+        Table rows per page
+
+    Yields:
+    -------
+    str
+        Consecutive pieces of the HTML document
+    """
+    yield _page_head(title)
+
+    totals = {"schools": 0, "num_students": 0.0}
+    for kind in ("current", "projected", "savings"):
+        for category in CATEGORIES + ("total",):
+            totals[f"{category}_{kind}"] = 0.0
+    for role in STAFF_ROLES:
+        totals[f"{role}_hours_annual"] = totals[f"{role}_fte"] = 0.0
+    top_names, top_savings = [], np.empty(0)
+
+    for chunk in chunks:
+        names = institution_names(chunk, totals["schools"])
+        scored = score_roster(chunk)
+        yield _rows_script(names, scored)
+
+        totals["schools"] += len(scored)
+        totals["num_students"] += float(scored["num_students"].sum())
+        for key in totals:
+            if key not in ("schools", "num_students"):
+                totals[key] += float(scored[key].sum())
+
+        # Merge this chunk into the running top N
+        candidate_names = top_names + names
+        candidate_savings = np.concatenate([top_savings, scored["total_savings"].to_numpy()])
+        keep = np.argsort(candidate_savings, kind="stable")[::-1][:top_n]
+        top_names = [candidate_names[i] for i in keep]
+        top_savings = candidate_savings[keep]
+
+    yield _table_script(page_size)
+    yield _summary_section(totals, top_names, top_savings.tolist())
+    yield """</main>
+    <div class="footer">
+        <p>Powered by the Proactive Mental Health Cost Savings Calculator • meetmaro.com</p>
+    </div>
+</body>
+</html>
+"""
+
+
+def write_rollup_report(chunks, path, **kwargs):
+    """Write iter_rollup_report output to ``path`` piece by piece; returns the byte size."""
+    size = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for piece in iter_rollup_report(chunks, **kwargs):
+            f.write(piece)
+            size += len(piece.encode("utf-8"))
+    return size
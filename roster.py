@@ -0,0 +1,197 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from breakeven import solve_breakeven
+from instrumentation import span
+from calculations import (
+    DEFAULT_INPUTS, DEFAULT_STAFFING, INPUT_COLUMNS, PROGRAM_COST_COLUMNS, STAFFING_COLUMNS, calculate_batch,
+    calculate_staff_time_batch
+)
+
+DEFAULT_CHUNKSIZE = 50_000
+
+# Roster columns tried, in order, for each school's display name
+NAME_COLUMNS = ("institution_name", "school_name", "name", "school_id")
+
+
+def read_roster_chunks(path, chunksize=DEFAULT_CHUNKSIZE, columns=None, memory_map=False):
+    """
+    Stream a CSV or Parquet roster as DataFrame chunks of at most ``chunksize`` rows.
+
+    Parameters:
+    -----------
+    path : str, Path or file-like
+        Roster file; ``.parquet``/``.pq`` files are read with pyarrow, anything
+        else as CSV. File-like objects (e.g. uploads) are typed by their
+        ``name``.
+    chunksize : int
+        Maximum rows per chunk
+    columns : list of str, optional
+        Only read these columns
+    memory_map : bool
+        Memory-map the file instead of reading it through buffered I/O
+        (paths only)
+    """
+    name = getattr(path, "name", path)
+    memory_map = memory_map and isinstance(path, (str, Path))
+    if Path(str(name)).suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path, memory_map=memory_map)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns, memory_map=memory_map)
+
+
+def institution_names(chunk, start_row=0):
+    """
+    Display name for each row of a roster chunk.
+
+    Uses the first of NAME_COLUMNS present in the chunk, falling back to
+    "School <n>" numbered from ``start_row``.
+    """
+    name_column = next((column for column in NAME_COLUMNS if column in chunk), None)
+    if name_column is None:
+        return [f"School {start_row + offset + 1}" for offset in range(len(chunk))]
+    return chunk[name_column].astype(str).tolist()
+
+
+def score_roster(chunk, defaults=DEFAULT_INPUTS):
+    """
+    Score one roster chunk.
+
+    Parameters:
+    -----------
+    chunk : pd.DataFrame
+        One row per school. Missing input columns are filled from ``defaults``;
+        rates and drops are decimals. Optional ``teachers``, ``counselors``
+        and ``school_weeks`` columns feed the staffing model (missing ones
+        take calculations.DEFAULT_STAFFING).
+    defaults : dict
+        Fallback values for absent input columns
+
+    Returns:
+    --------
+    pd.DataFrame
+        The input chunk with current/projected/savings columns per category
+        and in total, plus the staff time saved columns of
+        calculations.TIME_COLUMNS. When the
+        roster has program cost columns, ROI, payback and break-even columns
+        from breakeven.solve_breakeven are added too.
+    """
+    columns = {
+        name: chunk[name].to_numpy(dtype="float64") if name in chunk else defaults[name]
+        for name in INPUT_COLUMNS
+    }
+    batch = calculate_batch(columns)
+    staffing = {
+        name: chunk[name].to_numpy(dtype="float64") if name in chunk else DEFAULT_STAFFING[name]
+        for name in STAFFING_COLUMNS
+    }
+    time_saved = calculate_staff_time_batch(
+        columns["num_students"], columns["discipline_drop"], columns["crisis_drop"], **staffing
+    )
+
+    scored = chunk.copy()
+    for name in INPUT_COLUMNS:
+        if name not in scored:
+            scored[name] = defaults[name]
+    for name, values in batch.items():
+        scored[name] = values
+    for name, values in time_saved.items():
+        scored[name] = values
+
+    if any(name in chunk for name in PROGRAM_COST_COLUMNS):
+        breakeven = solve_breakeven(scored)
+        for name in ("program_cost", "net_savings", "roi", "payback_months", "breakeven_scale") + tuple(
+            f"breakeven_{category}_drop" for category in ("discipline", "absenteeism", "crisis")
+        ):
+            scored[name] = breakeven[name]
+    return scored
+
+
+class RosterWriter:
+    """Append scored chunks to a CSV or Parquet file, creating it on the first write."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.is_parquet = self.path.suffix.lower() in (".parquet", ".pq")
+        self._writer = None
+        self._wrote_header = False
+
+    def write(self, frame):
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="a" if self._wrote_header else "w",
+                         header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def map_chunks(func, chunks, workers=None):
+    """
+    Apply ``func`` to each chunk, in order, over a process pool.
+
+    At most ``2 * workers`` chunks are in flight at once, so memory stays
+    bounded however long the input is. ``workers=1`` runs in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            yield func(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(func, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_roster_file(input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, workers=None):
+    """
+    Score a roster file chunk by chunk and write the results to ``output_path``.
+
+    Returns:
+    --------
+    dict
+        Number of schools scored, summed current, projected and savings
+        totals, and summed annual staff hours and FTEs saved
+    """
+    summary = {"schools": 0, "total_current": 0.0, "total_projected": 0.0, "total_savings": 0.0,
+               "staff_hours_annual": 0.0, "staff_fte": 0.0}
+    chunks = read_roster_chunks(input_path, chunksize)
+    with RosterWriter(output_path) as writer:
+        for scored in map_chunks(score_roster, chunks, workers):
+            with span("write_chunk"):
+                writer.write(scored)
+            summary["schools"] += len(scored)
+            for key in ("total_current", "total_projected", "total_savings"):
+                summary[key] += float(scored[key].sum())
+            summary["staff_hours_annual"] += float((scored["teacher_hours_annual"] + scored["counselor_hours_annual"]).sum())
+            summary["staff_fte"] += float((scored["teacher_fte"] + scored["counselor_fte"]).sum())
+    return summary
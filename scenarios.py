@@ -0,0 +1,172 @@
+"""
+Shareable scenarios: canonical URL query parameters and a cross-session cache.
+
+A scenario is the full set of calculator inputs plus the institution name.
+encode_scenario turns it into canonical query parameters (fixed order, numbers in
+a fixed format, defaults omitted), so the same numbers always produce the
+same link. Computed results, figures and report HTML are kept in
+process-wide LRU caches keyed on the scenario, so every session opening the
+same link, or entering the same numbers, reuses them. Cached results carry
+no timestamp: each caller gets them stamped with the time it asked, and
+shared report HTML gets its "Generated on" time filled in when served.
+"""
+import math
+from datetime import datetime
+
+from calculations import DEFAULT_INPUTS, DEFAULT_STAFFING, INPUT_COLUMNS, PROGRAM_COST_COLUMNS, STAFFING_COLUMNS, input_bounds
+from cache import LRUCache, normalize_key
+from instrumentation import span
+
+SCENARIO_FIELDS = ("institution_name",) + INPUT_COLUMNS + PROGRAM_COST_COLUMNS + STAFFING_COLUMNS
+
+DEFAULT_SCENARIO = dict(DEFAULT_INPUTS, institution_name="My School District",
+                        **dict.fromkeys(PROGRAM_COST_COLUMNS, 0), **DEFAULT_STAFFING)
+
+# Reports are much larger than results and figures (offline ones embed
+# plotly.js), so they get a smaller cache of their own
+_scenario_cache = LRUCache(maxsize=256)
+_report_cache = LRUCache(maxsize=32)
+
+MAX_NAME_LENGTH = 200
+
+# Stands in for the timestamp in cached report HTML
+_TIMESTAMP_PLACEHOLDER = "\x00generated-on\x00"
+
+# Graph nodes kept for each cached scenario
+SCENARIO_NODES = ("results", "savings_chart", "comparison_chart", "time_charts")
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _format_number(value):
+    return f"{float(value):.12g}"
+
+
+def scenario_key(scenario):
+    """Canonical cache key for a scenario; equal numbers in any type share a key."""
+    return normalize_key({name: scenario[name] for name in SCENARIO_FIELDS})
+
+
+def encode_scenario(scenario):
+    """
+    Canonical query parameters for a scenario.
+
+    Returns:
+    --------
+    dict
+        Field name to string value, in SCENARIO_FIELDS order, omitting
+        fields that equal DEFAULT_SCENARIO
+    """
+    params = {}
+    for name in SCENARIO_FIELDS:
+        value = scenario[name]
+        if normalize_key(value) == normalize_key(DEFAULT_SCENARIO[name]):
+            continue
+        params[name] = str(value) if name == "institution_name" else _format_number(value)
+    return params
+
+
+def decode_scenario(params):
+    """
+    Scenario from query parameters, falling back to defaults.
+
+    Unknown parameters are ignored, and values that do not parse or fall
+    outside an input's valid range are clipped or replaced by the default,
+    so a hand-edited link can never break the page.
+
+    Parameters:
+    -----------
+    params : mapping
+        Query parameters, e.g. ``st.query_params.to_dict()``
+
+    Returns:
+    --------
+    dict
+        A value for every name in SCENARIO_FIELDS
+    """
+    scenario = dict(DEFAULT_SCENARIO)
+    for name in SCENARIO_FIELDS:
+        if name not in params:
+            continue
+        raw = params[name]
+        if name == "institution_name":
+            scenario[name] = str(raw).strip()[:MAX_NAME_LENGTH] or DEFAULT_SCENARIO[name]
+            continue
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            continue
+        if not math.isfinite(value):
+            continue
+        low, high = input_bounds(name)
+        value = min(max(value, low), high)
+        scenario[name] = int(value) if name == "num_students" else value
+    if scenario["num_students"] < 1:
+        scenario["num_students"] = DEFAULT_SCENARIO["num_students"]
+    return scenario
+
+
+def cached_scenario(scenario):
+    """The cached entry for a scenario, or None if it has not been computed yet."""
+    return _scenario_cache.get(scenario_key(scenario))
+
+
+def store_scenario(scenario, entry):
+    """Cache a computed entry (results, figures, ...) for a scenario and return it."""
+    _scenario_cache.put(scenario_key(scenario), entry)
+    return entry
+
+
+def compute_scenario(scenario, graph=None):
+    """
+    The cached entry for a scenario, computing and caching it on a miss.
+
+    Parameters:
+    -----------
+    scenario : dict
+        A value for every name in SCENARIO_FIELDS
+    graph : compute_graph.ComputeGraph, optional
+        A calculator_graph to compute misses with. Reusing one graph (e.g.
+        per session) means a miss only recomputes the nodes downstream of
+        the inputs that changed since it was last used.
+
+    Returns:
+    --------
+    dict
+        The value of each of SCENARIO_NODES; ``results`` is stamped with
+        the current time
+    """
+    entry = cached_scenario(scenario)
+    if entry is None:
+        if graph is None:
+            from compute_graph import calculator_graph
+
+            graph = calculator_graph()
+        graph.set_inputs(**scenario)
+        entry = {node: graph.get(node) for node in SCENARIO_NODES}
+        # The first caller's timestamp must not leak to other sessions
+        entry["results"] = entry["results"]._replace(timestamp=None)
+        store_scenario(scenario, entry)
+    return dict(entry, results=entry["results"]._replace(timestamp=_now()))
+
+
+def scenario_report(scenario, results, offline=False):
+    """
+    Report HTML for a scenario, rendered once per scenario and shared across
+    sessions, with its "Generated on" time set to now.
+    """
+    def render():
+        from report_generator import generate_report
+
+        with span("generate_report"):
+            return generate_report(results._replace(timestamp=_TIMESTAMP_PLACEHOLDER), offline=offline)
+
+    html_content = _report_cache.get_or_create((scenario_key(scenario), offline), render)
+    return html_content.replace(_TIMESTAMP_PLACEHOLDER, _now(), 1)
+
+
+def scenario_cache_stats():
+    """Hit/miss counters for the scenario and report caches."""
+    return {"scenarios": _scenario_cache.stats(), "reports": _report_cache.stats()}
@@ -0,0 +1,100 @@
+import numpy as np
+from calculations import CATEGORIES, INPUT_COLUMNS, INPUT_LABELS, calculate_batch, input_bounds
+
+# The nine rate/drop/cost inputs a sensitivity analysis perturbs
+SENSITIVITY_INPUTS = tuple(
+    f"{category}_{field}" for field in ("rate", "drop", "cost") for category in CATEGORIES
+)
+
+
+def _perturbed_values(name, base_value, low_factor, high_factor, steps):
+    low, high = input_bounds(name)
+    return np.clip(np.linspace(base_value * low_factor, base_value * high_factor, steps), low, high)
+
+
+def tornado_analysis(base_inputs, low_factor=0.8, high_factor=1.2, steps=21, output="total_savings"):
+    """
+    Rank inputs by how much they move an output when varied one at a time.
+
+    Each of SENSITIVITY_INPUTS is swept from ``low_factor`` to
+    ``high_factor`` times its base value while the other inputs stay at
+    their base values. All sweeps are evaluated in a single batch.
+
+    Parameters:
+    -----------
+    base_inputs : dict
+        Point values for every name in INPUT_COLUMNS
+    low_factor, high_factor : float
+        Range of the sweep relative to each base value
+    steps : int
+        Points per sweep (at least 2)
+    output : str
+        Batch output to analyse, e.g. "total_savings" or "crisis_savings"
+
+    Returns:
+    --------
+    list of dict
+        One entry per input, sorted by descending ``swing``, with ``name``,
+        ``label``, ``values`` and ``outputs`` (the sweep), ``low_output`` and
+        ``high_output`` (at the sweep ends), ``base_output`` and ``swing``
+        (max minus min output over the sweep)
+    """
+    n_inputs = len(SENSITIVITY_INPUTS)
+    columns = {
+        name: np.full((n_inputs, steps), float(base_inputs[name])) for name in INPUT_COLUMNS
+    }
+    sweeps = {}
+    for row, name in enumerate(SENSITIVITY_INPUTS):
+        sweeps[name] = _perturbed_values(name, float(base_inputs[name]), low_factor, high_factor, steps)
+        columns[name][row] = sweeps[name]
+
+    outputs = calculate_batch(columns)[output]
+    base_output = float(calculate_batch(base_inputs)[output])
+
+    ranking = []
+    for row, name in enumerate(SENSITIVITY_INPUTS):
+        ranking.append({
+            "name": name,
+            "label": INPUT_LABELS[name],
+            "values": sweeps[name],
+            "outputs": outputs[row],
+            "low_output": float(outputs[row, 0]),
+            "high_output": float(outputs[row, -1]),
+            "base_output": base_output,
+            "swing": float(outputs[row].max() - outputs[row].min()),
+        })
+    ranking.sort(key=lambda entry: entry["swing"], reverse=True)
+    return ranking
+
+
+def grid_sweep(base_inputs, x_name, x_values, y_name, y_values, output="total_savings"):
+    """
+    Evaluate an output over a 2-D grid of two inputs in one broadcasted pass.
+
+    Parameters:
+    -----------
+    base_inputs : dict
+        Point values for every name in INPUT_COLUMNS
+    x_name, y_name : str
+        Inputs varied along the x and y axes
+    x_values, y_values : array-like
+        Grid values for each axis
+    output : str
+        Batch output to return
+
+    Returns:
+    --------
+    np.ndarray
+        Shape (len(y_values), len(x_values)); row i, column j is the output
+        at ``y_values[i]`` and ``x_values[j]``
+    """
+    if x_name == y_name:
+        raise ValueError("x_name and y_name must be different inputs")
+
+    x_values = np.asarray(x_values, dtype=np.float64)
+    y_values = np.asarray(y_values, dtype=np.float64)
+    columns = dict(base_inputs)
+    columns[x_name] = x_values[None, :]
+    columns[y_name] = y_values[:, None]
+    result = calculate_batch(columns)[output]
+    return np.broadcast_to(result, (y_values.size, x_values.size))
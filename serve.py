@@ -0,0 +1,32 @@
+"""
+Start the Streamlit app with warm caches.
+
+Usage:
+    python serve.py [streamlit run options, e.g. --server.port 8501]
+
+Runs warmup.warm_up() (logging the cold-start time) and then starts the
+Streamlit server for app.py in the same process, so the first visitor gets
+the preloaded modules and the cached default scenario, figures and report.
+"""
+import sys
+from pathlib import Path
+
+from instrumentation import configure_from_env
+from warmup import warm_up
+
+APP_PATH = Path(__file__).resolve().parent / "app.py"
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    configure_from_env()
+    warm_up()
+
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run", str(APP_PATH), *argv]
+    return stcli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
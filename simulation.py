@@ -0,0 +1,134 @@
+import numpy as np
+from calculations import CATEGORIES, INPUT_COLUMNS, calculate_batch, input_bounds
+
+DISTRIBUTIONS = ("fixed", "uniform", "triangular", "normal")
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+
+def _draw(rng, spec, n_draws):
+    kind, *params = spec
+    if kind == "fixed":
+        return np.full(n_draws, float(params[0]))
+    if kind == "uniform":
+        low, high = params
+        return rng.uniform(low, high, n_draws)
+    if kind == "triangular":
+        low, mode, high = params
+        if low == high:
+            return np.full(n_draws, float(mode))
+        return rng.triangular(low, mode, high, n_draws)
+    if kind == "normal":
+        mean, sd = params
+        return rng.normal(mean, sd, n_draws)
+    raise ValueError(f"Unknown distribution '{kind}', expected one of {DISTRIBUTIONS}")
+
+
+def draw_inputs(base_inputs, distributions, n_draws=100_000, seed=42):
+    """
+    Draw calculator inputs for a Monte Carlo run.
+
+    Parameters:
+    -----------
+    base_inputs : dict
+        Point values for every name in INPUT_COLUMNS
+    distributions : dict
+        Maps input names to a spec tuple: ("fixed", value),
+        ("uniform", low, high), ("triangular", low, mode, high) or
+        ("normal", mean, sd). Inputs without a spec keep their point value.
+    n_draws : int
+        Number of draws
+    seed : int
+        Seed for the random generator, so runs are reproducible
+
+    Returns:
+    --------
+    dict
+        Input arrays of length ``n_draws`` (point values stay scalars)
+    """
+    rng = np.random.default_rng(seed)
+    draws = {}
+    # Iterate in INPUT_COLUMNS order so a seed always maps to the same draws
+    for name in INPUT_COLUMNS:
+        if name in distributions:
+            low, high = input_bounds(name)
+            draws[name] = np.clip(_draw(rng, distributions[name], n_draws), low, high)
+        else:
+            draws[name] = base_inputs[name]
+    return draws
+
+
+def spread_distributions(base_inputs, kind="triangular", rate_spread=0.2, drop_spread=0.2, cost_spread=0.2):
+    """
+    Build distribution specs centred on the point inputs.
+
+    Parameters:
+    -----------
+    base_inputs : dict
+        Point values for every name in INPUT_COLUMNS
+    kind : str
+        "uniform", "triangular" or "normal"
+    rate_spread, drop_spread, cost_spread : float
+        Relative half-width of each group (0.2 = ±20%). For "normal" the
+        spread is treated as two standard deviations.
+
+    Returns:
+    --------
+    dict
+        Distribution specs for the rate, drop and cost inputs
+    """
+    spreads = {"rate": rate_spread, "drop": drop_spread, "cost": cost_spread}
+    distributions = {}
+    for category in CATEGORIES:
+        for group, spread in spreads.items():
+            name = f"{category}_{group}"
+            value = float(base_inputs[name])
+            half_width = abs(value) * spread
+            if kind == "uniform":
+                distributions[name] = ("uniform", value - half_width, value + half_width)
+            elif kind == "triangular":
+                distributions[name] = ("triangular", value - half_width, value, value + half_width)
+            elif kind == "normal":
+                distributions[name] = ("normal", value, half_width / 2)
+            else:
+                raise ValueError(f"Unknown distribution '{kind}', expected one of {DISTRIBUTIONS}")
+    return distributions
+
+
+def simulate_savings(base_inputs, distributions, n_draws=100_000, seed=42, percentiles=DEFAULT_PERCENTILES):
+    """
+    Run a vectorized Monte Carlo simulation of the savings estimate.
+
+    Parameters:
+    -----------
+    base_inputs : dict
+        Point values for every name in INPUT_COLUMNS
+    distributions : dict
+        Distribution specs, see draw_inputs
+    n_draws : int
+        Number of draws
+    seed : int
+        Seed for the random generator
+    percentiles : sequence of float
+        Percentiles to report
+
+    Returns:
+    --------
+    dict
+        For each of ``<category>_savings`` and ``total_savings``, a dict with
+        ``mean`` and ``p<N>`` entries for every requested percentile
+    """
+    draws = draw_inputs(base_inputs, distributions, n_draws, seed)
+    batch = calculate_batch(draws)
+
+    keys = [f"{category}_savings" for category in CATEGORIES] + ["total_savings"]
+    stacked = np.stack([np.broadcast_to(batch[key], (n_draws,)) for key in keys])
+    values = np.percentile(stacked, percentiles, axis=1)
+    means = stacked.mean(axis=1)
+
+    summary = {}
+    for i, key in enumerate(keys):
+        summary[key] = {"mean": float(means[i])}
+        for j, pct in enumerate(percentiles):
+            summary[key][f"p{pct:g}"] = float(values[j, i])
+    return summary
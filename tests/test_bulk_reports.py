@@ -0,0 +1,75 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+from bulk_reports import _row_jobs, generate_bulk_reports
+from calculations import DEFAULT_INPUTS
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def roster_path(tmp_path):
+    path = tmp_path / "roster.csv"
+    pd.DataFrame({
+        "num_students": [200, 400, 600, 800, 1000],
+        "institution_name": ["Alder", "Birch", "Cedar", "Dogwood", "Elm"],
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_zip_resumes_after_interruption(tmp_path, roster_path):
+    output = tmp_path / "reports.zip"
+
+    def stop_after_first_batch(written, skipped):
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        generate_bulk_reports(roster_path, output, chunksize=2, workers=1, progress=stop_after_first_batch)
+    with zipfile.ZipFile(output) as archive:
+        assert archive.testzip() is None
+        assert len(archive.namelist()) == 2
+
+    counts = generate_bulk_reports(roster_path, output, chunksize=2, workers=1)
+
+    assert counts == {"written": 3, "skipped": 2}
+    with zipfile.ZipFile(output) as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist())[0] == "000000_alder.html"
+        assert len(archive.namelist()) == 5
+    assert not (tmp_path / "reports.zip.parts").exists()
+
+
+def test_zip_resumes_from_parts_left_by_a_crash(tmp_path, roster_path):
+    # A hard crash skips the final merge; the finished parts still count
+    output = tmp_path / "reports.zip"
+    generate_bulk_reports(roster_path, output, chunksize=2, workers=1)
+    parts_dir = tmp_path / "reports.zip.parts"
+    parts_dir.mkdir()
+    output.rename(parts_dir / "000000.zip")
+    (parts_dir / "000001.tmp").write_bytes(b"truncated")
+
+    counts = generate_bulk_reports(roster_path, output, chunksize=2, workers=1)
+
+    assert counts == {"written": 0, "skipped": 5}
+    with zipfile.ZipFile(output) as archive:
+        assert len(archive.namelist()) == 5
+    assert not parts_dir.exists()
+
+
+def test_blank_cells_take_defaults(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("institution_name,num_students,crisis_rate,teachers\nAlder,,0.02,\nBirch,300,,12\n")
+    chunk = pd.read_csv(path)
+
+    (_, _, alder), (_, _, birch) = _row_jobs(chunk, 0)
+
+    assert alder["num_students"] == DEFAULT_INPUTS["num_students"]
+    assert alder["crisis_rate"] == 0.02
+    assert alder["teachers"] == 0
+    assert birch["num_students"] == 300
+    assert birch["crisis_rate"] == DEFAULT_INPUTS["crisis_rate"]
+    assert generate_bulk_reports(path, tmp_path / "reports", workers=1) == {"written": 2, "skipped": 0}
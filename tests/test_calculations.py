@@ -0,0 +1,72 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from calculations import (
+    CATEGORIES, DEFAULT_INPUTS, INPUT_COLUMNS, calculate_batch, calculate_current_costs, calculate_projected_costs,
+    calculate_savings
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.mark.parametrize("module", ["calculations", "utils"])
+def test_import_stays_light(module):
+    # A fresh interpreter, since this test session has long since imported both
+    code = (
+        f"import sys, {module}; "
+        "heavy = [name for name in ('pandas', 'plotly') if name in sys.modules]; "
+        f"sys.exit(f'{module} imported {{heavy}}' if heavy else 0)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+# Default inputs plus edge rows: no students, no incidents, a 100% drop and
+# a very large district
+PARITY_ROWS = [
+    DEFAULT_INPUTS,
+    dict(DEFAULT_INPUTS, num_students=0),
+    dict(DEFAULT_INPUTS, discipline_rate=0, absenteeism_rate=0, crisis_rate=0),
+    dict(DEFAULT_INPUTS, discipline_drop=1, absenteeism_drop=1, crisis_drop=1),
+    dict(DEFAULT_INPUTS, num_students=987_654, discipline_rate=0.123, absenteeism_drop=0.07, crisis_cost=12_345.67),
+]
+
+
+def _baseline(row):
+    # The scalar formulas from before the vectorized core, kept verbatim as
+    # the reference
+    current = tuple(row["num_students"] * row[f"{category}_rate"] * row[f"{category}_cost"]
+                    for category in CATEGORIES)
+    projected = tuple(value * (1 - row[f"{category}_drop"]) for value, category in zip(current, CATEGORIES))
+    savings = tuple(row["num_students"] * row[f"{category}_rate"] * row[f"{category}_drop"] * row[f"{category}_cost"]
+                    for category in CATEGORIES)
+    return {kind: values + (values[0] + values[1] + values[2],)
+            for kind, values in (("current", current), ("projected", projected), ("savings", savings))}
+
+
+def test_default_savings():
+    assert calculate_savings(*(DEFAULT_INPUTS[name] for name in INPUT_COLUMNS)) == (9_500, 36_000, 150_000, 195_500)
+
+
+@pytest.mark.parametrize("row", PARITY_ROWS)
+def test_scalar_matches_baseline(row):
+    expected = _baseline(row)
+    args = [row[name] for name in INPUT_COLUMNS]
+    cost_args = [row[name] for name in INPUT_COLUMNS if not name.endswith("_drop")]
+    assert calculate_savings(*args) == expected["savings"]
+    assert calculate_current_costs(*cost_args) == expected["current"]
+    assert calculate_projected_costs(*args) == expected["projected"]
+
+
+def test_batch_matches_baseline_row_by_row():
+    batch = calculate_batch({name: np.array([row[name] for row in PARITY_ROWS]) for name in INPUT_COLUMNS})
+    for index, row in enumerate(PARITY_ROWS):
+        expected = _baseline(row)
+        for kind, values in expected.items():
+            actual = tuple(float(batch[f"{category}_{kind}"][index]) for category in CATEGORIES + ("total",))
+            # Bit for bit, not approximately
+            assert actual == values, (index, kind)
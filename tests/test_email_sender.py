@@ -0,0 +1,120 @@
+import email
+import socket
+from email import policy
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+import email_sender
+import outbox
+from email_sender import SMTPChannel, send_contact_email
+from outbox import FAILED, SENT, Outbox, OutboxWorker
+
+REFUSED = "nobody@example.com"
+
+
+class Recorder:
+    """aiosmtpd handler that keeps every message and refuses REFUSED."""
+
+    def __init__(self):
+        self.envelopes = []
+        self.sessions = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == REFUSED:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        self.sessions.add(id(session))
+        return "250 Message accepted"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    recorder = Recorder()
+    port = _free_port()
+    controller = aiosmtpd_controller.Controller(recorder, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield recorder, {"smtp_server": "127.0.0.1", "smtp_port": port,
+                     "sender": "calculator@example.com", "recipient": "team@example.com"}
+    controller.stop()
+
+
+@pytest.fixture
+def local_outbox(tmp_path, monkeypatch):
+    queue = Outbox(tmp_path / "outbox.sqlite3")
+    monkeypatch.setattr(outbox, "_outbox", queue)
+    monkeypatch.setattr(outbox, "_worker", None)
+    return queue
+
+
+def _parse(envelope):
+    return email.message_from_bytes(envelope.content, policy=policy.default)
+
+
+def test_contact_request_and_report_are_emailed(smtp_server, local_outbox, monkeypatch):
+    recorder, config = smtp_server
+    monkeypatch.setattr(email_sender, "email_config", lambda: config)
+    report_html = "<html><body><h1>Savings Report</h1></body></html>"
+
+    assert send_contact_email("Ada", "Springfield USD", "ada@example.com", report_html=report_html)
+    worker = OutboxWorker(local_outbox, {"email": SMTPChannel(config)})
+    assert worker.run_once() == 2
+    assert local_outbox.counts()[("email", SENT)] == 2
+
+    notification, report = recorder.envelopes
+    assert notification.rcpt_tos == ["team@example.com"]
+    assert notification.mail_from == "calculator@example.com"
+    message = _parse(notification)
+    assert message["Subject"] == "New calculator contact request from Springfield USD"
+    assert message["Reply-To"] == "ada@example.com"
+    assert "Email: ada@example.com" in message.get_content()
+
+    assert report.rcpt_tos == ["ada@example.com"]
+    message = _parse(report)
+    assert message["Subject"] == "Your Mental Health Cost Savings Report"
+    attachments = list(message.iter_attachments())
+    assert [attachment.get_filename() for attachment in attachments] == ["savings_report.html"]
+    assert attachments[0].get_content_type() == "text/html"
+    assert attachments[0].get_content().rstrip("\r\n") == report_html
+
+    # Both messages went over one reused connection
+    assert len(recorder.sessions) == 1
+
+
+def test_refused_recipient_fails_permanently(smtp_server, local_outbox):
+    recorder, config = smtp_server
+    message_id = local_outbox.enqueue("email", {"to": REFUSED, "subject": "Hello", "body": "Hi"})
+    OutboxWorker(local_outbox, {"email": SMTPChannel(config)}).run_once()
+    assert local_outbox.counts() == {("email", FAILED): 1}
+    assert recorder.envelopes == []
+    with local_outbox._connect() as conn:
+        last_error = conn.execute("SELECT last_error FROM messages WHERE id = ?", (message_id,)).fetchone()[0]
+    assert "550" in last_error
+
+
+def test_malformed_payload_fails_alone(smtp_server, local_outbox):
+    # A payload that cannot be built must not fail (and resend) the rest of
+    # its batch
+    recorder, config = smtp_server
+    local_outbox.enqueue("email", {"to": "first@example.com", "subject": "One", "body": "Hi"})
+    bad_id = local_outbox.enqueue("email", {"to": "x@example.com\nBcc: y@example.com", "subject": "Two", "body": "Hi"})
+    local_outbox.enqueue("email", {"to": "third@example.com", "subject": "Three", "body": "Hi"})
+
+    OutboxWorker(local_outbox, {"email": SMTPChannel(config)}).run_once()
+
+    assert local_outbox.counts() == {("email", SENT): 2, ("email", FAILED): 1}
+    assert [envelope.rcpt_tos for envelope in recorder.envelopes] == [["first@example.com"], ["third@example.com"]]
+    with local_outbox._connect() as conn:
+        last_error = conn.execute("SELECT last_error FROM messages WHERE id = ?", (bad_id,)).fetchone()[0]
+    assert "Invalid email payload" in last_error
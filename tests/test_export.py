@@ -0,0 +1,45 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from calculations import CATEGORIES
+from export import export_roster
+
+
+def _read(path):
+    if path.suffix == ".parquet":
+        return pq.read_table(path)
+    with pa.ipc.open_file(path) as reader:
+        return reader.read_all()
+
+
+@pytest.mark.parametrize("format, suffix", [("parquet", ".parquet"), ("arrow", ".arrow")])
+def test_multi_chunk_export_round_trips(tmp_path, format, suffix):
+    # Regression: every chunk used to bring its own institution_name
+    # dictionary, which the Arrow IPC file format rejects after the first
+    roster = pd.DataFrame({
+        "num_students": [100 * (row + 1) for row in range(25)],
+        "institution_name": [f"School {row}" for row in range(25)],
+    })
+    roster_path = tmp_path / "roster.csv"
+    roster.to_csv(roster_path, index=False)
+
+    summary = export_roster(roster_path, tmp_path / "out", chunksize=10, format=format, years=2)
+
+    assert summary["schools"] == 25
+    schools = _read(tmp_path / "out" / f"schools{suffix}").to_pandas()
+    assert schools["school"].tolist() == list(range(25))
+    assert schools["institution_name"].tolist() == roster["institution_name"].tolist()
+    assert schools["total_savings"].sum() == pytest.approx(summary["total_savings"])
+
+    categories = _read(tmp_path / "out" / f"categories{suffix}").to_pandas()
+    assert len(categories) == 25 * len(CATEGORIES)
+    assert categories["institution_name"].tolist() == [
+        name for name in roster["institution_name"] for _ in CATEGORIES
+    ]
+    assert categories["savings"].sum() == pytest.approx(summary["total_savings"])
+
+    projections = _read(tmp_path / "out" / f"projections{suffix}")
+    assert projections.num_rows == 2 * 25 * len(CATEGORIES)
+    assert sorted(set(projections.column("school").to_pylist())) == list(range(25))
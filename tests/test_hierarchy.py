@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hierarchy import AggregationTree
+
+
+@pytest.fixture
+def roster():
+    rng = np.random.default_rng(7)
+    size = 60
+    return pd.DataFrame({
+        "institution_name": [f"School {row}" for row in range(size)],
+        "state": rng.choice(["CA", "NV", "OR"], size),
+        "district": rng.choice(["North", "South", "East"], size),
+        "num_students": rng.integers(50, 5000, size).astype(float),
+        "discipline_rate": rng.uniform(0.01, 0.3, size),
+        "absenteeism_rate": rng.uniform(0.01, 0.3, size),
+        "crisis_drop": rng.uniform(0.05, 0.6, size),
+        "teachers": rng.integers(5, 300, size).astype(float),
+    })
+
+
+def assert_matches_rebuild(tree, roster):
+    rebuilt = AggregationTree.from_roster(roster)
+    for path, node in tree._paths.items():
+        if path in rebuilt._paths:
+            np.testing.assert_array_equal(tree.totals[node], rebuilt.totals[rebuilt.node(*path)], err_msg=str(path))
+        else:
+            # Emptied by a move or removal
+            assert not tree.totals[node].any(), path
+    assert tree.names[tree.school_start:] == rebuilt.names[rebuilt.school_start:]
+    np.testing.assert_array_equal(tree.inputs, rebuilt.inputs)
+    np.testing.assert_array_equal(tree.totals[tree.school_start:], rebuilt.totals[rebuilt.school_start:])
+    for school in range(tree.num_schools):
+        assert tree.names[tree.parents[tree.school_node(school)]] == roster["district"].iloc[school]
+
+
+def test_update_school_matches_rebuild(roster):
+    tree = AggregationTree.from_roster(roster)
+    for school, students, rate in ((3, 1234.0, 0.05), (17, 0.0, 0.2), (3, 987.0, 0.11)):
+        tree.update_school(school, num_students=students, discipline_rate=rate)
+        roster.loc[school, ["num_students", "discipline_rate"]] = [students, rate]
+    assert_matches_rebuild(tree, roster)
+
+
+def test_move_school_matches_rebuild(roster):
+    tree = AggregationTree.from_roster(roster)
+    school = 5
+    target = ("NV", "North") if roster.loc[school, "state"] != "NV" else ("OR", "South")
+    recomputed = tree.move_school(school, *target)
+    roster.loc[school, ["state", "district"]] = list(target)
+
+    assert tree.node(*target) in recomputed
+    assert school in tree.schools_under(tree.node(*target))
+    assert_matches_rebuild(tree, roster)
+
+
+def test_move_school_needs_a_district(roster):
+    tree = AggregationTree.from_roster(roster)
+    with pytest.raises(ValueError):
+        tree.move_school(0, "CA")
+
+
+def test_remove_school_matches_rebuild(roster):
+    tree = AggregationTree.from_roster(roster)
+    tree.remove_school(10)
+    tree.remove_school(0)
+    roster = roster.drop(index=[0, 10]).reset_index(drop=True)
+    assert tree.num_schools == len(roster)
+    assert_matches_rebuild(tree, roster)
+
+
+def test_emptied_district_keeps_zero_totals(roster):
+    tree = AggregationTree.from_roster(roster)
+    district = tree.node("CA", "East")
+    schools = tree.schools_under(district)
+    for school in schools[::-1]:
+        tree.remove_school(int(school))
+    roster = roster.drop(index=schools).reset_index(drop=True)
+    assert len(tree.children(district)) == 0
+    assert_matches_rebuild(tree, roster)
@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+import incident_logs
+from incident_logs import RateAccumulator, ingest_logs
+
+
+def _attendance(days_absent, days=20, school="A"):
+    # One student per entry, each enrolled ``days`` days
+    rows = []
+    for student, absent in enumerate(days_absent):
+        rows.extend({"school_id": school, "student_id": f"{school}{student}", "absent": int(day < absent)}
+                    for day in range(days))
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("compact_rows", [1_000_000, 2])
+def test_incidents_deduplicate_across_chunks(tmp_path, monkeypatch, compact_rows):
+    # Also with merging forced after every chunk
+    monkeypatch.setattr(incident_logs, "_COMPACT_ROWS", compact_rows)
+    incidents = pd.DataFrame({
+        "school_id": ["A"] * 7,
+        "student_id": ["s1", "s2", "s1", "s1", "s3", "s2", "s1"],
+        "category": ["Discipline", "discipline", "DISCIPLINE", "crisis", "other", "Discipline", "Crisis"],
+    })
+    path = tmp_path / "incidents.csv"
+    incidents.to_csv(path, index=False)
+
+    rates = ingest_logs(incidents=path, enrollment=10, chunksize=2)
+
+    row = rates.iloc[0]
+    assert row["discipline_students"] == 2
+    assert row["crisis_students"] == 1
+    assert row["discipline_rate"] == pytest.approx(0.2)
+    assert row["crisis_rate"] == pytest.approx(0.1)
+
+
+def test_chronic_absence_threshold(tmp_path):
+    # 2 of 20 days is exactly 10% and counts; 1 of 20 does not
+    path = tmp_path / "attendance.csv"
+    _attendance([0, 1, 2, 5]).to_csv(path, index=False)
+
+    rates = ingest_logs(attendance=path, chunksize=7)
+
+    row = rates.iloc[0]
+    assert row["enrolled_students"] == 4
+    assert row["chronically_absent_students"] == 2
+    assert row["absenteeism_rate"] == 0.5
+    assert ingest_logs(attendance=path, chunksize=7, chronic_threshold=0.25).iloc[0]["absenteeism_rate"] == 0.25
+
+
+def test_attendance_days_add_up_across_chunks():
+    # Absent on the first and last of 20 days: 10% overall, though the
+    # first chunk alone shows 1 of 15 days
+    attendance = _attendance([0])
+    attendance.loc[[0, 19], "absent"] = 1
+    accumulator = RateAccumulator()
+    accumulator.add_attendance(attendance.iloc[:15])
+    assert accumulator.rates().iloc[0]["absenteeism_rate"] == 0.0
+    accumulator.add_attendance(attendance.iloc[15:])
+
+    row = accumulator.rates().iloc[0]
+    assert row["enrolled_students"] == 1
+    assert row["absenteeism_rate"] == 1.0
+
+
+def test_incident_only_schools_are_reported():
+    accumulator = RateAccumulator()
+    accumulator.add_attendance(_attendance([0, 4], school="A"))
+    accumulator.add_incidents(pd.DataFrame({"school_id": ["A", "B"], "student_id": ["A0", "B7"],
+                                            "category": ["discipline", "discipline"]}))
+
+    rates = accumulator.rates()
+
+    assert rates["school_id"].tolist() == ["A"]
+    assert rates.attrs["unmatched_schools"] == ["B"]
+    assert rates.iloc[0]["discipline_rate"] == 0.5
+
+
+def test_no_enrolled_schools_raises():
+    accumulator = RateAccumulator()
+    accumulator.add_incidents(pd.DataFrame({"school_id": ["A"], "student_id": ["s1"], "category": ["crisis"]}))
+    with pytest.raises(ValueError, match="enrolled"):
+        accumulator.rates({"B": 100})
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from calculations import CATEGORIES, DEFAULT_INPUTS, calculate_batch
+from optimizer import SATURATION, optimize_budget, spend_scales
+
+
+def test_spends_the_budget():
+    inputs = dict(DEFAULT_INPUTS, num_students=np.array([200.0, 1000.0, 3000.0]))
+    allocation = optimize_budget(inputs, 50_000)
+    assert allocation["total_spend"] == pytest.approx(50_000)
+    # Every funded line returns the same savings on its next dollar
+    funded = allocation["spend"] > 0
+    np.testing.assert_allclose(allocation["marginal_savings_per_dollar"][funded], allocation["shadow_price"],
+                               rtol=1e-6)
+
+
+def test_oversized_budget_funds_everything():
+    # Regression: the bracket search used to loop forever once exp(low)
+    # underflowed to zero
+    inputs = dict(DEFAULT_INPUTS, num_students=100)
+    allocation = optimize_budget(inputs, 1e7)
+
+    expected_spend = spend_scales(inputs) * -np.log(SATURATION)
+    np.testing.assert_allclose(allocation["spend"], expected_spend)
+    assert allocation["total_spend"] < 1e7
+    full_savings = calculate_batch(inputs)
+    for index, category in enumerate(CATEGORIES):
+        assert allocation["savings"][0, index] == pytest.approx(float(full_savings[f"{category}_savings"]), rel=1e-5)
+
+
+def test_zero_budget_spends_nothing():
+    allocation = optimize_budget(DEFAULT_INPUTS, 0)
+    assert allocation["total_spend"] == 0
+    assert allocation["total_savings"] == 0
@@ -0,0 +1,150 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from outbox import FAILED, PENDING, SENDING, SENT, FormPostChannel, Outbox, OutboxWorker
+
+
+class FormEndpoint:
+    """Local stand-in for the form endpoint: answers with queued statuses, then 200."""
+
+    def __init__(self):
+        self.statuses = []
+        self.received = []
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+                status = endpoint.statuses.pop(0) if endpoint.statuses else 200
+                if status == 200:
+                    endpoint.received.append({key: values[0] for key, values in parse_qs(body).items()})
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/form"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def endpoint():
+    endpoint = FormEndpoint()
+    yield endpoint
+    endpoint.close()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "outbox.sqlite3"
+
+
+def _row(outbox, message_id):
+    with outbox._connect() as conn:
+        return dict(conn.execute("SELECT * FROM messages WHERE id = ?", (message_id,)).fetchone())
+
+
+def _worker(outbox, endpoint, **options):
+    return OutboxWorker(outbox, {"contact": FormPostChannel(endpoint.url, timeout=5)}, **options)
+
+
+def test_enqueue_and_deliver(path, endpoint):
+    outbox = Outbox(path)
+    message_id = outbox.enqueue("contact", {"name": "Ada", "email": "ada@example.com"})
+    assert _row(outbox, message_id)["status"] == PENDING
+
+    assert _worker(outbox, endpoint).run_once() == 1
+    assert endpoint.received == [{"name": "Ada", "email": "ada@example.com"}]
+    row = _row(outbox, message_id)
+    assert row["status"] == SENT
+    assert row["attempts"] == 1
+    assert outbox.counts() == {("contact", SENT): 1}
+
+
+def test_server_error_is_retried_with_backoff(path, endpoint):
+    outbox = Outbox(path)
+    message_id = outbox.enqueue("contact", {"name": "Ada"})
+    endpoint.statuses = [503, 502]
+    worker = _worker(outbox, endpoint, base_delay=0.2)
+
+    before = time.time()
+    assert worker.run_once() == 0
+    row = _row(outbox, message_id)
+    assert row["status"] == PENDING
+    assert row["last_error"] == "HTTP 503"
+    # First retry waits between half and all of base_delay
+    assert before + 0.1 <= row["next_attempt_at"] <= time.time() + 0.2
+    # Not due yet, so an immediate pass does not resend it
+    assert worker.run_once() == 0
+    assert endpoint.statuses == [502]
+
+    # The second attempt also fails and backs off twice as long
+    time.sleep(row["next_attempt_at"] - time.time() + 0.01)
+    before = time.time()
+    assert worker.run_once() == 0
+    row = _row(outbox, message_id)
+    assert row["attempts"] == 2
+    assert before + 0.2 <= row["next_attempt_at"] <= time.time() + 0.4
+
+    # Eventually delivered
+    time.sleep(row["next_attempt_at"] - time.time() + 0.01)
+    assert worker.run_once() == 1
+    assert _row(outbox, message_id)["status"] == SENT
+    assert endpoint.received == [{"name": "Ada"}]
+
+
+def test_client_error_fails_permanently(path, endpoint):
+    outbox = Outbox(path)
+    message_id = outbox.enqueue("contact", {"name": "Ada"})
+    endpoint.statuses = [400]
+    assert _worker(outbox, endpoint).run_once() == 0
+    row = _row(outbox, message_id)
+    assert row["status"] == FAILED
+    assert row["last_error"] == "HTTP 400"
+
+
+def test_gives_up_after_max_attempts(path, endpoint):
+    outbox = Outbox(path)
+    message_id = outbox.enqueue("contact", {"name": "Ada"})
+    endpoint.statuses = [500, 500]
+    worker = _worker(outbox, endpoint, base_delay=0.0, max_attempts=2)
+    worker.run_once()
+    worker.run_once()
+    assert _row(outbox, message_id)["status"] == FAILED
+    assert endpoint.received == []
+
+
+def test_pending_rows_survive_restart(path, endpoint):
+    # A process enqueues two messages and dies mid-delivery of one of them
+    outbox = Outbox(path)
+    claimed = outbox.enqueue("contact", {"name": "Ada"})
+    waiting = outbox.enqueue("contact", {"name": "Grace"})
+    assert [message["id"] for message in outbox.claim("contact", limit=1, lease=0.05)] == [claimed]
+    assert _row(outbox, waiting)["status"] == PENDING
+    assert _row(outbox, claimed)["status"] == SENDING
+    del outbox
+
+    # After a restart, the new process delivers both once the lease expires
+    time.sleep(0.1)
+    restarted = Outbox(path)
+    worker = _worker(restarted, endpoint, poll_interval=0.05).start()
+    try:
+        deadline = time.time() + 5
+        while restarted.counts().get(("contact", SENT), 0) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        worker.stop()
+    assert restarted.counts() == {("contact", SENT): 2}
+    assert sorted(message["name"] for message in endpoint.received) == ["Ada", "Grace"]
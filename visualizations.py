@@ -1,7 +1,85 @@
+import functools
+import json
 import plotly.express as px
 import plotly.graph_objects as go
-from utils import calculate_current_costs, calculate_projected_costs, format_currency
+from plotly.utils import PlotlyJSONEncoder
+from cache import LRUCache, normalize_key
+from instrumentation import span
+from calculations import (
+    INPUT_COLUMNS, PROGRAM_COST_COLUMNS, SCHOOL_WEEKS, as_results, calculate_current_costs,
+    calculate_projected_costs, format_currency
+)
 
+# Process-wide cache shared by all sessions. Cached figures are shared
+# objects, so callers must not mutate them (copy with go.Figure(fig) first).
+_figure_cache = LRUCache(maxsize=512)
+
+def cached_figure(key_func=None):
+    """
+    Cache a figure builder's output on its normalized inputs.
+
+    ``key_func`` receives the builder's arguments and returns the values the
+    figure actually depends on; by default all arguments are used.
+    """
+    def decorator(builder):
+        @functools.wraps(builder)
+        def wrapper(*args, **kwargs):
+            inputs = key_func(*args, **kwargs) if key_func else (args, kwargs)
+            key = (builder.__name__, normalize_key(inputs))
+
+            def build():
+                result = builder(*args, **kwargs)
+                figures = result if isinstance(result, tuple) else (result,)
+                for index, fig in enumerate(figures):
+                    fig._cache_key = (key, index)
+                return result
+
+            with span(f"build_figure.{builder.__name__}"):
+                return _figure_cache.get_or_create(key, build)
+
+        wrapper.uncached = builder
+        return wrapper
+    return decorator
+
+def figure_html(fig):
+    """Render a figure as an HTML fragment without plotly.js, reusing the cached string for cached figures."""
+    render = functools.partial(fig.to_html, full_html=False, include_plotlyjs=False)
+    cache_key = getattr(fig, "_cache_key", None)
+    if cache_key is None:
+        return render()
+    return _figure_cache.get_or_create(("html", cache_key), render)
+
+def _compact_dumps(obj):
+    # "</" is escaped so the JSON can be inlined in a <script> element
+    return json.dumps(obj, cls=PlotlyJSONEncoder, separators=(",", ":")).replace("</", "<\\/")
+
+def figure_compact_json(fig):
+    """
+    Serialize a figure as compact JSON with its layout template split out.
+
+    Returns a ``(figure_json, template_json)`` pair so a page holding several
+    figures can embed their shared template once. Cached like figure_html.
+    """
+    def render():
+        spec = fig.to_plotly_json()
+        layout = dict(spec.get("layout", {}))
+        template = layout.pop("template", {})
+        return _compact_dumps({"data": spec["data"], "layout": layout}), _compact_dumps(template)
+
+    cache_key = getattr(fig, "_cache_key", None)
+    if cache_key is None:
+        return render()
+    return _figure_cache.get_or_create(("compact", cache_key), render)
+
+def figure_cache_stats():
+    """Hit/miss/eviction counters for the shared figure cache."""
+    return _figure_cache.stats()
+
+def _roi_inputs(results):
+    # Everything else in the results is derived from these
+    return {key: results.get(key, 0) for key in INPUT_COLUMNS + PROGRAM_COST_COLUMNS}
+
+@cached_figure()
 def create_savings_chart(discipline_savings, absenteeism_savings, crisis_savings):
     labels = ['Disciplinary Issues', 'Chronic Absenteeism', 'Crisis Management']
     values = [discipline_savings, absenteeism_savings, crisis_savings]
@@ -31,6 +109,7 @@ def create_savings_chart(discipline_savings, absenteeism_savings, crisis_savings
 
     return fig
 
+@cached_figure()
 def create_comparison_chart(
     num_students,
     discipline_rate,
@@ -95,19 +174,13 @@ def create_comparison_chart(
 
     return fig
 
+@cached_figure(key_func=_roi_inputs)
 def create_roi_chart(results):
-    discipline_current = results["num_students"] * results["discipline_rate"] * results["discipline_cost"]
-    absenteeism_current = results["num_students"] * results["absenteeism_rate"] * results["absenteeism_cost"]
-    crisis_current = results["num_students"] * results["crisis_rate"] * results["crisis_cost"]
-
-    discipline_projected = discipline_current * (1 - results["discipline_drop"])
-    absenteeism_projected = absenteeism_current * (1 - results["absenteeism_drop"])
-    crisis_projected = crisis_current * (1 - results["crisis_drop"])
-
+    results = as_results(results)
     categories = ['Disciplinary Issues', 'Chronic Absenteeism', 'Crisis Management']
-    current = [discipline_current, absenteeism_current, crisis_current]
-    projected = [discipline_projected, absenteeism_projected, crisis_projected]
-    savings = [results["discipline_savings"], results["absenteeism_savings"], results["crisis_savings"]]
+    current = [results.discipline_current, results.absenteeism_current, results.crisis_current]
+    projected = [results.discipline_projected, results.absenteeism_projected, results.crisis_projected]
+    savings = [results.discipline_savings, results.absenteeism_savings, results.crisis_savings]
 
     fig = go.Figure()
 
@@ -139,8 +212,30 @@ def create_roi_chart(results):
         hovertemplate='%{text} savings<extra></extra>'
     ))
 
+    title = 'Cost Reduction Analysis'
+    program_cost = results.program_cost
+    if program_cost > 0:
+        total_savings = results.total_savings
+        fig.add_trace(go.Bar(
+            name='Annual Savings',
+            x=['Savings vs. Program Cost'],
+            y=[total_savings],
+            marker_color='#4CAF50',
+            text=[format_currency(total_savings)],
+            textposition='auto',
+        ))
+        fig.add_trace(go.Bar(
+            name='Program Cost',
+            x=['Savings vs. Program Cost'],
+            y=[program_cost],
+            marker_color='#E57373',
+            text=[format_currency(program_cost)],
+            textposition='auto',
+        ))
+        title += f' (ROI {(total_savings - program_cost) / program_cost:.0%})'
+
     fig.update_layout(
-        title='Cost Reduction Analysis',
+        title=title,
         xaxis_title='Category',
         yaxis_title='Amount ($)',
         barmode='group',
@@ -156,9 +251,18 @@ def create_roi_chart(results):
 
     return fig
 
-def create_time_savings_charts(teacher_weekly, counselor_weekly):
-    teacher_annual = teacher_weekly * 36
-    counselor_annual = counselor_weekly * 36
+@cached_figure()
+def create_time_savings_charts(teacher_weekly, counselor_weekly, teacher_annual=None, counselor_annual=None):
+    """
+    Weekly hours saved per teacher and counselor, and annual hours saved
+    across all of them (``<role>_hours_annual`` from
+    calculations.calculate_staff_time_batch). Without annual hours, one
+    staff member's weekly hours over SCHOOL_WEEKS are shown instead.
+    """
+    if teacher_annual is None:
+        teacher_annual = teacher_weekly * SCHOOL_WEEKS
+    if counselor_annual is None:
+        counselor_annual = counselor_weekly * SCHOOL_WEEKS
 
     # Weekly chart
     fig_weekly = go.Figure()
@@ -169,7 +273,7 @@ def create_time_savings_charts(teacher_weekly, counselor_weekly):
         marker_color="#1f77b4"
     ))
     fig_weekly.update_layout(
-        title="Weekly Team Time Savings",
+        title="Weekly Time Savings per Staff Member",
         yaxis_title="Hours Saved per Week",
         height=300
     )
@@ -184,8 +288,192 @@ def create_time_savings_charts(teacher_weekly, counselor_weekly):
     ))
     fig_annual.update_layout(
         title="Annual Team Time Savings",
-        yaxis_title="Hours Saved per Year",
+        yaxis_title="Hours Saved per School Year",
         height=300
     )
 
     return fig_weekly, fig_annual
+
+@cached_figure()
+def create_uncertainty_chart(summary):
+    keys = ['discipline_savings', 'absenteeism_savings', 'crisis_savings', 'total_savings']
+    categories = ['Disciplinary Issues', 'Chronic Absenteeism', 'Crisis Management', 'Total']
+    p5 = [summary[key]['p5'] for key in keys]
+    p50 = [summary[key]['p50'] for key in keys]
+    p95 = [summary[key]['p95'] for key in keys]
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=categories,
+        y=p50,
+        name='Median Savings (P50)',
+        marker_color='#1565C0',
+        error_y=dict(
+            type='data',
+            symmetric=False,
+            array=[high - mid for high, mid in zip(p95, p50)],
+            arrayminus=[mid - low for low, mid in zip(p5, p50)],
+            color='#90CAF9',
+            thickness=2,
+        ),
+        customdata=list(zip(p5, p95)),
+        hovertemplate='<b>%{x}</b><br>P50: $%{y:,.0f}<br>P5–P95: $%{customdata[0]:,.0f} – $%{customdata[1]:,.0f}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title='Savings Uncertainty Range (P5–P95)',
+        xaxis_title='Category',
+        yaxis_title='Savings ($)',
+        yaxis=dict(tickprefix="$", tickformat=",.0f")
+    )
+
+    return fig
+
+@cached_figure()
+def create_projection_chart(years, discipline_savings, absenteeism_savings, crisis_savings, npv_total=None):
+    labels = ['Disciplinary Issues', 'Chronic Absenteeism', 'Crisis Management']
+    colors = ['#1565C0', '#42A5F5', '#90CAF9']
+    series = [discipline_savings, absenteeism_savings, crisis_savings]
+    years = [f"Year {year}" for year in years]
+
+    fig = go.Figure()
+
+    for label, color, values in zip(labels, colors, series):
+        fig.add_trace(go.Bar(
+            x=years,
+            y=values,
+            name=label,
+            marker_color=color,
+            hovertemplate='<b>%{x}</b><br>' + label + ': $%{y:,.0f}<extra></extra>'
+        ))
+
+    cumulative = []
+    running_total = 0
+    for annual in zip(*series):
+        running_total += sum(annual)
+        cumulative.append(running_total)
+
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=cumulative,
+        name='Cumulative Savings',
+        mode='lines+markers',
+        marker=dict(color='#4CAF50', size=8),
+        line=dict(color='#4CAF50', width=3),
+        hovertemplate='<b>%{x}</b><br>Cumulative: $%{y:,.0f}<extra></extra>'
+    ))
+
+    title = 'Multi-Year Savings Projection'
+    if npv_total is not None:
+        title += f' (NPV {format_currency(npv_total)})'
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Program Year',
+        yaxis_title='Savings ($)',
+        barmode='stack',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5
+        ),
+        yaxis=dict(tickprefix="$", tickformat=",.0f")
+    )
+
+    return fig
+
+@cached_figure()
+def create_tornado_chart(labels, low_outputs, high_outputs, base_output):
+    # Smallest swing at the bottom, largest at the top
+    labels = list(labels)[::-1]
+    low_outputs = list(low_outputs)[::-1]
+    high_outputs = list(high_outputs)[::-1]
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=[low - base_output for low in low_outputs],
+        base=base_output,
+        orientation='h',
+        name='Input Decreased',
+        marker_color='#90CAF9',
+        customdata=low_outputs,
+        hovertemplate='<b>%{y}</b><br>Total: $%{customdata:,.0f}<extra></extra>'
+    ))
+
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=[high - base_output for high in high_outputs],
+        base=base_output,
+        orientation='h',
+        name='Input Increased',
+        marker_color='#1565C0',
+        customdata=high_outputs,
+        hovertemplate='<b>%{y}</b><br>Total: $%{customdata:,.0f}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title='Sensitivity of Total Savings to Each Input',
+        xaxis_title='Total Savings ($)',
+        barmode='overlay',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5
+        ),
+        xaxis=dict(tickprefix="$", tickformat=",.0f")
+    )
+    fig.add_vline(x=base_output, line_dash='dash', line_color='#666')
+
+    return fig
+
+# Not cached: the grid can hold up to a million values, and keying on them
+# would cost more than rebuilding the figure.
+def create_sensitivity_heatmap(x_label, x_values, y_label, y_values, z):
+    fig = go.Figure(go.Heatmap(
+        x=x_values,
+        y=y_values,
+        z=z,
+        colorscale='Blues',
+        colorbar=dict(title='Savings ($)', tickprefix='$', tickformat=',.0f'),
+        hovertemplate=x_label + ': %{x:,.3g}<br>' + y_label + ': %{y:,.3g}<br>Savings: $%{z:,.0f}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=f'Total Savings by {x_label} and {y_label}',
+        xaxis_title=x_label,
+        yaxis_title=y_label
+    )
+
+    return fig
+
+@cached_figure()
+def create_top_schools_chart(names, total_savings, title='Top Schools by Estimated Savings'):
+    # Largest at the top of the horizontal bar chart
+    names = list(names)[::-1]
+    total_savings = list(total_savings)[::-1]
+
+    fig = go.Figure(go.Bar(
+        x=total_savings,
+        y=names,
+        orientation='h',
+        marker_color='#1565C0',
+        text=[format_currency(value) for value in total_savings],
+        textposition='auto',
+        hovertemplate='<b>%{y}</b><br>$%{x:,.0f}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Estimated Annual Savings ($)',
+        xaxis=dict(tickprefix="$", tickformat=",.0f"),
+        height=max(300, 40 * len(names) + 120)
+    )
+
+    return fig
@@ -0,0 +1,141 @@
+"""
+Warm-start preloading for the Streamlit server.
+
+warm_up() imports the heavy modules and fills the process-wide caches with
+the default scenario (results, figures, the downloadable report and the
+charts in the analysis panels) before the first visitor arrives, then logs
+how long that took as one JSON line on the ``calculator.startup`` logger.
+
+``python serve.py`` runs it before starting the server. The app also calls
+start_warm_up() on its first run, which does the same in a background
+thread when the server was started some other way (e.g. on Streamlit
+Cloud); either way it only runs once per process.
+"""
+import json
+import logging
+import threading
+import time
+
+from instrumentation import ensure_log_handler, record
+
+logger = logging.getLogger("calculator.startup")
+
+# _lock is held for the whole warm-up; _start_lock only guards starting the
+# background thread, so app reruns calling start_warm_up never wait on it
+_lock = threading.Lock()
+_start_lock = threading.Lock()
+_timings = None
+_thread = None
+
+
+def _import_modules():
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import plotly.express  # noqa: F401
+    import plotly.graph_objects  # noqa: F401
+    import plotly.io  # noqa: F401
+    import report_generator  # noqa: F401
+    import visualizations  # noqa: F401
+
+
+def _default_scenario():
+    from scenarios import DEFAULT_SCENARIO, compute_scenario
+
+    entry = compute_scenario(DEFAULT_SCENARIO)
+    # Serialize once so Plotly's validators and JSON encoder are warm too
+    for node in ("savings_chart", "comparison_chart"):
+        entry[node].to_json()
+    for fig in entry["time_charts"]:
+        fig.to_json()
+    return entry
+
+
+def _default_report(entry):
+    from report_generator import _inline_plotly_script
+    from scenarios import DEFAULT_SCENARIO, scenario_report
+
+    scenario_report(DEFAULT_SCENARIO, entry["results"])
+    # The offline report's plotly.js bundle is read on first use; load it now
+    _inline_plotly_script()
+
+
+def _analysis_charts(entry):
+    # Same arguments as the app's default panel settings, so these land in
+    # the figure cache exactly where the first calculation looks for them
+    from projections import project_savings
+    from sensitivity import tornado_analysis
+    from visualizations import create_projection_chart, create_roi_chart, create_tornado_chart
+
+    results = entry["results"]
+    base_inputs = results.inputs
+    create_roi_chart(results)
+
+    projection = project_savings(base_inputs, years=5, enrollment_growth=0.0, cost_inflation=0.03,
+                                 discount_rate=0.03, ramp={"discipline": 1, "absenteeism": 2, "crisis": 1})
+    annual_savings = projection["savings"].sum(axis=1)
+    create_projection_chart(projection["years"], annual_savings[:, 0], annual_savings[:, 1], annual_savings[:, 2],
+                            float(projection["npv_total"].sum()))
+
+    ranking = tornado_analysis(base_inputs, 1 - 0.2, 1 + 0.2)
+    create_tornado_chart(
+        [item["label"] for item in ranking],
+        [item["low_output"] for item in ranking],
+        [item["high_output"] for item in ranking],
+        ranking[0]["base_output"],
+    )
+
+
+def warm_up():
+    """
+    Preload modules and caches for the default scenario, once per process.
+
+    Returns:
+    --------
+    dict
+        Seconds spent in each stage and in ``total``
+    """
+    global _timings
+    with _lock:
+        if _timings is not None:
+            return _timings
+
+        timings = {}
+        start = time.perf_counter()
+
+        def stage(name, func, *args):
+            stage_start = time.perf_counter()
+            value = func(*args)
+            timings[name] = time.perf_counter() - stage_start
+            record(f"warmup.{name}", timings[name])
+            return value
+
+        stage("imports", _import_modules)
+        entry = stage("default_scenario", _default_scenario)
+        stage("report", _default_report, entry)
+        stage("analysis_charts", _analysis_charts, entry)
+        timings["total"] = time.perf_counter() - start
+
+        ensure_log_handler(logger)
+        logger.info(json.dumps({
+            "event": "warm_start",
+            "seconds": round(timings["total"], 3),
+            "stages": {name: round(seconds, 3) for name, seconds in timings.items() if name != "total"},
+        }))
+        _timings = timings
+        return timings
+
+
+def start_warm_up():
+    """Run warm_up() in a daemon thread unless it already ran or is running."""
+    global _thread
+    with _start_lock:
+        if _timings is None and _thread is None:
+            _thread = threading.Thread(target=_run_logged, name="warm-up", daemon=True)
+            _thread.start()
+
+
+def _run_logged():
+    try:
+        warm_up()
+    except Exception:
+        logger.exception("Warm-up failed")